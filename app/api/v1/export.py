@@ -0,0 +1,79 @@
+"""
+API эндпоинты потоковой выгрузки данных.
+"""
+from collections.abc import AsyncIterator
+from datetime import date
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+
+from app.api.deps import require_roles
+from app.core.constants import ExportFormat, UserRole
+from app.database import async_session_maker
+from app.services.export import MEDIA_TYPES, ExportFilters, ExportService, make_encoder
+
+router = APIRouter()
+
+ExportRoles = Annotated[
+    UserRole, Depends(require_roles(UserRole.TEACHER, UserRole.TUTOR, UserRole.ADMIN))
+]
+
+
+def _response(query: Select, export_format: ExportFormat, name: str) -> StreamingResponse:
+    """Потоковый ответ с выгрузкой результата запроса."""
+    encoder = make_encoder(export_format, query)
+
+    async def body() -> AsyncIterator[bytes]:
+        # Своя сессия: поток читается уже после выхода из обработчика
+        async with async_session_maker() as session:
+            async for chunk in ExportService(session).stream(query, encoder):
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format}"'},
+    )
+
+
+@router.get("/attempts")
+async def export_attempts(
+    _: ExportRoles,
+    format: ExportFormat = ExportFormat.CSV,
+    student_id: int | None = None,
+    class_id: int | None = None,
+    organization_id: int | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+):
+    """
+    Выгрузить попытки выполнения заданий.
+
+    Фильтры по ученику, классу, организации и дате начала попытки (UTC).
+    Строки передаются потоком, объём выгрузки не ограничен.
+    """
+    filters = ExportFilters(student_id, class_id, organization_id, date_from, date_to)
+    query = ExportService.attempts_query(filters)
+    return _response(query, format, "attempts")
+
+
+@router.get("/tasks")
+async def export_tasks(
+    _: ExportRoles,
+    format: ExportFormat = ExportFormat.CSV,
+    student_id: int | None = None,
+    class_id: int | None = None,
+    organization_id: int | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+):
+    """
+    Выгрузить задания.
+
+    Фильтры по ученику, классу, организации и дате создания (UTC).
+    """
+    filters = ExportFilters(student_id, class_id, organization_id, date_from, date_to)
+    query = ExportService.tasks_query(filters)
+    return _response(query, format, "tasks")
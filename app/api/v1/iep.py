@@ -16,28 +16,30 @@ from app.schemas.iep import (
     IEPResponse,
     IEPUpdate,
 )
+from app.schemas.pagination import Page
 from app.services.iep import IEPService
 from app.services.student import StudentService
 
 router = APIRouter()
 
 
-@router.get("/", response_model=list[IEPResponse])
+@router.get("/", response_model=Page[IEPResponse])
 async def get_ieps(
     db: DbSession,
     current_role: CurrentUserRole,
-    skip: int = Query(0, ge=0),
+    cursor: str | None = None,
     limit: int = Query(100, ge=1, le=100),
     student_id: int | None = None,
 ):
     """
-    Получить список ИОП.
+    Получить страницу ИОП, новые первыми.
     """
     if current_role not in (UserRole.ADMIN, UserRole.TEACHER, UserRole.TUTOR):
         raise ForbiddenException("Нет доступа к списку ИОП")
 
     service = IEPService(db)
-    return await service.get_all(skip=skip, limit=limit, student_id=student_id)
+    items, next_cursor = await service.get_all(cursor=cursor, limit=limit, student_id=student_id)
+    return Page(items=items, next_cursor=next_cursor)
 
 
 @router.get("/student/{student_id}", response_model=list[IEPResponse])
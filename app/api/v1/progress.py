@@ -1,23 +1,38 @@
 """
 API эндпоинты для прогресса и аналитики.
 """
-from fastapi import APIRouter, Query
+from datetime import UTC, date, datetime
+from typing import Annotated
 
-from app.api.deps import CurrentUserId, DbSession
-from app.core.constants import Subject
+from fastapi import APIRouter, Depends, Query
+
+from app.api.deps import CurrentUserId, DbSession, require_roles
+from app.core.constants import ReadMode, RecommendationStrategy, StatsBucket, Subject, UserRole
 from app.schemas.progress import (
+    CohortPosition,
+    DueReview,
     GoalProgress,
+    GroupAnalytics,
     IEPProgress,
     ProgressSummary,
+    RangeStats,
     StudentAnalytics,
     SubjectProgress,
     TaskRecommendation,
     WeeklyReport,
 )
+from app.services.cohorts import CohortSketchService
+from app.services.group_analytics import GroupAnalyticsService
 from app.services.progress import AnalyticsService, ProgressService, RecommendationEngine
+from app.services.review import ReviewScheduler
 
 router = APIRouter()
 
+ReadModeQuery = Annotated[
+    ReadMode,
+    Query(description="live — по текущим данным, snapshot — по материализованным представлениям"),
+]
+
 
 # === Progress Endpoints ===
 
@@ -46,6 +61,7 @@ async def get_subject_progress(
     subject: Subject,
     db: DbSession,
     _: CurrentUserId,
+    mode: ReadModeQuery = ReadMode.LIVE,
 ):
     """
     Получить прогресс по предмету.
@@ -55,7 +71,7 @@ async def get_subject_progress(
     - Сильные и слабые темы
     - Рекомендуемый уровень сложности
     """
-    service = ProgressService(db)
+    service = ProgressService(db, mode)
     return await service.get_subject_progress(student_id, subject)
 
 
@@ -76,11 +92,28 @@ async def get_iep_progress(
     return await service.get_iep_progress(student_id)
 
 
+@router.get("/iep/{iep_id}/goals", response_model=list[GoalProgress])
+async def get_iep_goals_progress(
+    iep_id: int,
+    db: DbSession,
+    _: CurrentUserId,
+    mode: ReadModeQuery = ReadMode.LIVE,
+):
+    """
+    Получить прогресс по всем целям ИОП.
+
+    Одним запросом для экрана ИОП, в порядке отображения целей.
+    """
+    service = ProgressService(db, mode)
+    return await service.get_iep_goals_progress(iep_id)
+
+
 @router.get("/goal/{goal_id}", response_model=GoalProgress)
 async def get_goal_progress(
     goal_id: int,
     db: DbSession,
     _: CurrentUserId,
+    mode: ReadModeQuery = ReadMode.LIVE,
 ):
     """
     Получить прогресс по цели ИОП.
@@ -90,7 +123,7 @@ async def get_goal_progress(
     - Количество выполненных заданий
     - Средний балл
     """
-    service = ProgressService(db)
+    service = ProgressService(db, mode)
     return await service.get_goal_progress(goal_id)
 
 
@@ -100,6 +133,7 @@ async def get_weekly_report(
     db: DbSession,
     _: CurrentUserId,
     week_start: str | None = Query(None, description="Начало недели (YYYY-MM-DD)"),
+    mode: ReadModeQuery = ReadMode.LIVE,
 ):
     """
     Получить недельный отчёт.
@@ -109,8 +143,55 @@ async def get_weekly_report(
     - Тренд улучшения
     - Рекомендации
     """
+    service = ProgressService(db, mode)
+    report = await service.get_weekly_report(student_id, week_start)
+    await db.commit()  # отчёт за завершившуюся неделю сохраняется
+    return report
+
+
+@router.get("/weekly/{student_id}/history", response_model=list[WeeklyReport])
+async def get_weekly_history(
+    student_id: int,
+    db: DbSession,
+    _: CurrentUserId,
+    before: date | None = Query(None, description="Недели раньше недели с этой датой (YYYY-MM-DD)"),
+    limit: int = Query(12, ge=1, le=52),
+):
+    """
+    Получить историю недельных отчётов, от новых к старым.
+
+    Включает только завершившиеся недели. Для следующей страницы
+    передайте в before начало последней полученной недели.
+    """
     service = ProgressService(db)
-    return await service.get_weekly_report(student_id, week_start)
+    history = await service.get_weekly_history(student_id, before, limit)
+    await db.commit()  # недостающие отчёты сохраняются
+    return history
+
+
+@router.get("/range/{student_id}", response_model=RangeStats)
+async def get_range_stats(
+    student_id: int,
+    db: DbSession,
+    _: CurrentUserId,
+    date_from: date = Query(..., alias="from", description="Начало периода (YYYY-MM-DD)"),
+    date_to: date = Query(..., alias="to", description="Конец периода (YYYY-MM-DD)"),
+    bucket: StatsBucket = StatsBucket.DAY,
+    mode: ReadModeQuery = ReadMode.LIVE,
+):
+    """
+    Получить статистику за период.
+
+    Включает:
+    - Статистику по дням, неделям или месяцам
+    - Пустые интервалы с нулевыми значениями
+    - Часовой пояс организации, в котором считались интервалы
+
+    Период ограничен: до 366 дней по дням, до 7 × 366 по неделям,
+    до 31 × 366 по месяцам; более длинный период — 400.
+    """
+    service = ProgressService(db, mode)
+    return await service.get_range_stats(student_id, date_from, date_to, bucket)
 
 
 # === Analytics Endpoints ===
@@ -120,6 +201,7 @@ async def get_student_analytics(
     student_id: int,
     db: DbSession,
     _: CurrentUserId,
+    mode: ReadModeQuery = ReadMode.LIVE,
 ):
     """
     Получить полную аналитику ученика.
@@ -131,10 +213,96 @@ async def get_student_analytics(
     - Сильные стороны и области для улучшения
     - Рекомендации
     """
-    service = AnalyticsService(db)
+    service = AnalyticsService(db, mode)
     return await service.get_full_analytics(student_id)
 
 
+@router.get("/cohorts/{student_id}", response_model=list[CohortPosition])
+async def get_cohort_positions(
+    student_id: int,
+    db: DbSession,
+    _: CurrentUserId,
+):
+    """
+    Сравнить ученика с параллелью, классом и группами ОВЗ.
+
+    Для среднего балла, времени и числа подсказок — перцентиль среди
+    средних учеников когорты (приближённый, по квантильным скетчам,
+    которые пересобираются периодически).
+    """
+    service = CohortSketchService(db)
+    return await service.get_positions(student_id)
+
+
+@router.get("/class/{class_id}", response_model=GroupAnalytics)
+async def get_class_analytics(
+    class_id: int,
+    db: DbSession,
+    _: Annotated[UserRole, Depends(require_roles(UserRole.TEACHER, UserRole.TUTOR, UserRole.ADMIN))],
+):
+    """
+    Получить аналитику класса.
+
+    Включает:
+    - Распределение средних баллов учеников
+    - Трудные для класса темы
+    - Учеников группы риска
+    """
+    service = GroupAnalyticsService(db)
+    return await service.get_class_analytics(class_id)
+
+
+@router.get("/organization/{org_id}", response_model=GroupAnalytics)
+async def get_organization_analytics(
+    org_id: int,
+    db: DbSession,
+    _: Annotated[UserRole, Depends(require_roles(UserRole.TEACHER, UserRole.ADMIN))],
+):
+    """
+    Получить аналитику организации (школы, центра).
+
+    Включает те же показатели, что и аналитика класса,
+    по всем ученикам всех классов организации.
+    """
+    service = GroupAnalyticsService(db)
+    return await service.get_organization_analytics(org_id)
+
+
+# === Review Endpoints ===
+
+@router.get("/due/{student_id}", response_model=list[DueReview])
+async def get_due_reviews(
+    student_id: int,
+    db: DbSession,
+    _: CurrentUserId,
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Получить темы, которые пора повторить.
+
+    Срок повторения считается по интервальной схеме SM-2 после каждой
+    оценённой попытки. Самые просроченные темы идут первыми.
+    """
+    service = ReviewScheduler(db)
+    return await service.get_due(student_id, datetime.now(UTC), limit)
+
+
+@router.get("/class/{class_id}/due", response_model=list[DueReview])
+async def get_class_due_reviews(
+    class_id: int,
+    db: DbSession,
+    _: Annotated[UserRole, Depends(require_roles(UserRole.TEACHER, UserRole.TUTOR, UserRole.ADMIN))],
+):
+    """
+    Получить повторения учеников класса на сегодня.
+
+    Включает просроченные темы и темы со сроком до конца дня
+    в часовом поясе организации.
+    """
+    service = ReviewScheduler(db)
+    return await service.get_class_due_today(class_id, datetime.now(UTC))
+
+
 # === Recommendations Endpoints ===
 
 @router.get("/recommendations/{student_id}", response_model=list[TaskRecommendation])
@@ -144,6 +312,7 @@ async def get_recommendations(
     _: CurrentUserId,
     subject: Subject | None = None,
     limit: int = Query(5, ge=1, le=20),
+    strategy: RecommendationStrategy = RecommendationStrategy.RULES,
 ):
     """
     Получить персонализированные рекомендации.
@@ -152,6 +321,9 @@ async def get_recommendations(
     - Слабые темы ученика
     - Текущий уровень
     - Прогресс по предметам
+
+    strategy=bandit подбирает темы сэмплированием Томпсона по приросту
+    навыка: исследует мало практикованные темы, а не только крайние.
     """
     engine = RecommendationEngine(db)
-    return await engine.get_recommendations(student_id, subject, limit)
+    return await engine.get_recommendations(student_id, subject, limit, strategy)
@@ -3,7 +3,7 @@
 """
 from fastapi import APIRouter
 
-from app.api.v1 import auth, generation, iep, progress, students, tasks, users
+from app.api.v1 import auth, export, generation, iep, progress, students, tasks, users
 
 api_router = APIRouter()
 
@@ -22,3 +22,4 @@ api_router.include_router(iep.router, prefix="/iep", tags=["IEP"])
 api_router.include_router(tasks.router, prefix="/tasks", tags=["Tasks"])
 api_router.include_router(generation.router, prefix="/generate", tags=["Generation"])
 api_router.include_router(progress.router, prefix="/progress", tags=["Progress"])
+api_router.include_router(export.router, prefix="/export", tags=["Export"])
@@ -8,6 +8,7 @@ from fastapi import APIRouter, Depends, Query
 from app.api.deps import CurrentUserId, CurrentUserRole, DbSession, require_roles
 from app.core.constants import UserRole
 from app.core.exceptions import ForbiddenException
+from app.schemas.pagination import Page
 from app.schemas.student import (
     StudentCreate,
     StudentListResponse,
@@ -21,22 +22,25 @@ from app.services.student import StudentService
 router = APIRouter()
 
 
-@router.get("/", response_model=list[StudentListResponse])
+@router.get("/", response_model=Page[StudentListResponse])
 async def get_students(
     db: DbSession,
     _: Annotated[UserRole, Depends(require_roles(UserRole.ADMIN, UserRole.TEACHER, UserRole.TUTOR))],
-    skip: int = Query(0, ge=0),
+    cursor: str | None = None,
     limit: int = Query(100, ge=1, le=100),
     class_id: int | None = None,
     grade: int | None = None,
 ):
     """
-    Получить список учеников.
+    Получить страницу учеников, новые первыми.
 
     Доступно для учителей, тьюторов и администраторов.
     """
     service = StudentService(db)
-    return await service.get_all(skip=skip, limit=limit, class_id=class_id, grade=grade)
+    items, next_cursor = await service.get_all(
+        cursor=cursor, limit=limit, class_id=class_id, grade=grade
+    )
+    return Page(items=items, next_cursor=next_cursor)
 
 
 @router.get("/my-children", response_model=list[StudentResponse])
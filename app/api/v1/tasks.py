@@ -7,11 +7,14 @@ from fastapi import APIRouter, Depends, Query
 
 from app.api.deps import CurrentUserId, CurrentUserRole, DbSession, require_roles
 from app.core.constants import Subject, TaskStatus, UserRole
+from app.schemas.pagination import Page
 from app.schemas.task import (
-    TaskAttemptCreate,
+    AttemptEventBatch,
+    AttemptEventsAccepted,
     TaskAttemptResponse,
     TaskAttemptSubmit,
     TaskAttemptUpdate,
+    TaskBulkCreate,
     TaskCreate,
     TaskListResponse,
     TaskResponse,
@@ -21,6 +24,7 @@ from app.schemas.task import (
     TaskUpdate,
 )
 from app.services.task import TaskAttemptService, TaskService, TaskTemplateService
+from app.services.telemetry import get_event_buffer
 
 router = APIRouter()
 
@@ -98,27 +102,28 @@ async def delete_template(
 
 # === Tasks ===
 
-@router.get("", response_model=list[TaskListResponse])
+@router.get("", response_model=Page[TaskListResponse])
 async def get_tasks(
     db: DbSession,
     _: CurrentUserId,
-    skip: int = Query(0, ge=0),
+    cursor: str | None = None,
     limit: int = Query(100, ge=1, le=100),
     student_id: int | None = None,
     subject: Subject | None = None,
     status: TaskStatus | None = None,
     iep_goal_id: int | None = None,
 ):
-    """Получить список заданий."""
+    """Получить страницу заданий, новые первыми."""
     service = TaskService(db)
-    return await service.get_all(
-        skip=skip,
+    items, next_cursor = await service.get_all(
+        cursor=cursor,
         limit=limit,
         student_id=student_id,
         subject=subject,
         status=status,
         iep_goal_id=iep_goal_id,
     )
+    return Page(items=items, next_cursor=next_cursor)
 
 
 @router.get("/student/{student_id}", response_model=list[TaskListResponse])
@@ -155,6 +160,17 @@ async def create_task(
     return await service.create(data)
 
 
+@router.post("/bulk", response_model=list[TaskListResponse], status_code=201)
+async def create_tasks_bulk(
+    data: TaskBulkCreate,
+    db: DbSession,
+    _: Annotated[UserRole, Depends(require_roles(UserRole.TEACHER, UserRole.TUTOR, UserRole.ADMIN))],
+):
+    """Создать пачку заданий (до 5000) одной транзакцией: банк заданий, задания классу."""
+    service = TaskService(db)
+    return await service.create_many(data)
+
+
 @router.patch("/{task_id}", response_model=TaskResponse)
 async def update_task(
     task_id: int,
@@ -217,30 +233,13 @@ async def get_task_attempts(
 async def start_attempt(
     task_id: int,
     db: DbSession,
-    user_id: CurrentUserId,
-    role: CurrentUserRole,
+    _: CurrentUserId,
 ):
     """Начать новую попытку выполнения задания."""
-    # Получаем задание для проверки и получения student_id
-    task_service = TaskService(db)
-    task = await task_service.get_by_id(task_id)
-
-    # Проверка доступа: ученик может начать попытку только своего задания
-    # или учитель/родитель может начать демо-попытку
-    if role == UserRole.STUDENT:
-        # Здесь нужно получить student_id по user_id
-        # Пока используем student_id из задания
-        student_id = task.student_id
-    else:
-        student_id = task.student_id
-
-    data = TaskAttemptCreate(
-        task_id=task_id,
-        student_id=student_id,
-    )
-
+    # Попытка заводится на ученика из задания: ученик начинает своё задание,
+    # учитель/родитель — демо-попытку за него
     service = TaskAttemptService(db)
-    return await service.start_attempt(data)
+    return await service.start_task_attempt(task_id)
 
 
 @router.post("/attempts/{attempt_id}/submit", response_model=TaskAttemptResponse)
@@ -249,13 +248,13 @@ async def submit_attempt(
     data: TaskAttemptSubmit,
     db: DbSession,
     user_id: CurrentUserId,
+    role: CurrentUserRole,
 ):
-    """Отправить ответ на задание."""
-    # Получаем попытку для получения student_id
+    """Отправить ответ на задание (ученик — свою попытку, родитель — попытку ребёнка)."""
     service = TaskAttemptService(db)
-    attempt = await service.get_by_id(attempt_id)
-
-    return await service.submit_attempt(attempt_id, data, attempt.student_id)
+    return await service.submit_attempt(
+        attempt_id, data, owner=TaskAttemptService.owner_condition(role, user_id)
+    )
 
 
 @router.patch("/attempts/{attempt_id}", response_model=TaskAttemptResponse)
@@ -275,21 +274,44 @@ async def use_hint(
     attempt_id: int,
     db: DbSession,
     user_id: CurrentUserId,
+    role: CurrentUserRole,
 ):
-    """Использовать подсказку."""
+    """Использовать подсказку (ученик — в своей попытке, родитель — в попытке ребёнка)."""
     service = TaskAttemptService(db)
-    attempt = await service.get_by_id(attempt_id)
+    return await service.use_hint(attempt_id, owner=TaskAttemptService.owner_condition(role, user_id))
+
+
+@router.post(
+    "/attempts/{attempt_id}/events", response_model=AttemptEventsAccepted, status_code=202
+)
+async def record_attempt_events(
+    attempt_id: int,
+    data: AttemptEventBatch,
+    db: DbSession,
+    user_id: CurrentUserId,
+    role: CurrentUserRole,
+):
+    """
+    Принять события телеметрии попытки (пульс, подсказки, смена ответа, фокус).
 
-    return await service.use_hint(attempt_id, attempt.student_id)
+    Попытка должна быть открыта и доступна пользователю (одна выборка
+    по первичному ключу), иначе 404. События ставятся в буфер процесса
+    и записываются пачками в фоне.
+    """
+    service = TaskAttemptService(db)
+    await service.check_open(attempt_id, TaskAttemptService.owner_condition(role, user_id))
+    return AttemptEventsAccepted(accepted=get_event_buffer().add(attempt_id, data.events))
 
 
-@router.get("/attempts/student/{student_id}", response_model=list[TaskAttemptResponse])
+@router.get("/attempts/student/{student_id}", response_model=Page[TaskAttemptResponse])
 async def get_student_attempts(
     student_id: int,
     db: DbSession,
     _: CurrentUserId,
+    cursor: str | None = None,
     limit: int = Query(100, ge=1, le=100),
 ):
-    """Получить попытки ученика."""
+    """Получить страницу попыток ученика, новые первыми."""
     service = TaskAttemptService(db)
-    return await service.get_by_student(student_id, limit=limit)
+    items, next_cursor = await service.get_by_student(student_id, cursor=cursor, limit=limit)
+    return Page(items=items, next_cursor=next_cursor)
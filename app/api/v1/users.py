@@ -7,27 +7,31 @@ from fastapi import APIRouter, Depends, Query
 
 from app.api.deps import CurrentUserId, CurrentUserRole, DbSession, require_roles
 from app.core.constants import UserRole
+from app.schemas.pagination import Page
 from app.schemas.user import UserCreate, UserResponse, UserUpdate
 from app.services.user import UserService
 
 router = APIRouter()
 
 
-@router.get("/", response_model=list[UserResponse])
+@router.get("/", response_model=Page[UserResponse])
 async def get_users(
     db: DbSession,
     _: Annotated[UserRole, Depends(require_roles(UserRole.ADMIN, UserRole.TEACHER))],
-    skip: int = Query(0, ge=0),
+    cursor: str | None = None,
     limit: int = Query(100, ge=1, le=100),
     organization_id: int | None = None,
 ):
     """
-    Получить список пользователей.
+    Получить страницу пользователей, новые первыми.
 
     Доступно только для администраторов и учителей.
     """
     service = UserService(db)
-    return await service.get_all(skip=skip, limit=limit, organization_id=organization_id)
+    items, next_cursor = await service.get_all(
+        cursor=cursor, limit=limit, organization_id=organization_id
+    )
+    return Page(items=items, next_cursor=next_cursor)
 
 
 @router.get("/{user_id}", response_model=UserResponse)
@@ -0,0 +1 @@
+"""CLI модуль - служебные команды."""
@@ -0,0 +1,219 @@
+"""
+Пересчёт навыков (student_topic_stats.skill_rating) и счётчиков прироста
+навыка для бандита рекомендаций (gain_successes, gain_failures)
+по всей истории попыток.
+
+Нужен после изменения модели навыка или её параметров. Ученики делятся
+на шарды по student_id % shards, каждый шард обрабатывает отдельный
+процесс: попытки читаются серверным курсором в порядке
+(ученик, предмет, тема, время), пачка пересчитывается векторно
+(replay_ratings) и записывается одним bulk upsert.
+
+Онлайн-модель учитывает переоценку попытки поправкой, а пересчёт —
+сразу итоговым баллом, поэтому рейтинги после него могут немного
+отличаться от накопленных.
+
+Запуск:
+    python -m app.cli.backfill_skills                       # все ученики
+    python -m app.cli.backfill_skills --workers 8 --chunk-size 50000
+"""
+import argparse
+import asyncio
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+if sys.platform == "win32":
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+import numpy as np
+from sqlalchemy import Float, case, cast, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import get_settings
+from app.models.progress import StudentTopicStats, TaskAttempt
+from app.models.task import Task
+from app.services.skills import replay_ratings
+
+UPSERT_BATCH_SIZE = 5000
+
+
+def _attempts_query(shard: int, shards: int):
+    """Оценённые попытки шарда в порядке применения к модели."""
+    # То же, что attempt_outcome: балл 0..1, иначе правильность
+    outcome = case(
+        (TaskAttempt.score < 0, 0.0),
+        (TaskAttempt.score > 100, 1.0),
+        (TaskAttempt.score.isnot(None), TaskAttempt.score / 100.0),
+        (TaskAttempt.is_correct.is_(True), 1.0),
+        else_=0.0,
+    )
+    return (
+        select(
+            TaskAttempt.student_id,
+            Task.subject,
+            Task.topic,
+            Task.difficulty,
+            cast(outcome, Float).label("outcome"),
+        )
+        .join(Task, Task.id == TaskAttempt.task_id)
+        .where(
+            TaskAttempt.completed_at.isnot(None),
+            (TaskAttempt.score.isnot(None)) | (TaskAttempt.is_correct.isnot(None)),
+            TaskAttempt.student_id % shards == shard,
+        )
+        .order_by(
+            TaskAttempt.student_id,
+            Task.subject,
+            Task.topic,
+            TaskAttempt.completed_at,
+            TaskAttempt.id,
+        )
+    )
+
+
+def compute_chunk(rows: list) -> list[dict]:
+    """Пересчитать рейтинги для пачки попыток, отсортированной по группам."""
+    keys = [(row.student_id, row.subject, row.topic) for row in rows]
+    is_start = np.fromiter(
+        (i == 0 or keys[i] != keys[i - 1] for i in range(len(keys))),
+        dtype=bool,
+        count=len(keys),
+    )
+    group_starts = np.flatnonzero(is_start)
+    levels = np.fromiter((row.difficulty for row in rows), dtype=np.int64, count=len(rows))
+    outcomes = np.fromiter((row.outcome for row in rows), dtype=np.float64, count=len(rows))
+
+    ratings, updates, gains = replay_ratings(group_starts, levels, outcomes)
+
+    return [
+        {
+            "student_id": keys[start][0],
+            "subject": keys[start][1],
+            "topic": keys[start][2],
+            "skill_rating": float(rating),
+            "skill_updates": int(count),
+            "gain_successes": float(gain),
+            "gain_failures": float(count - gain),
+        }
+        for start, rating, count, gain in zip(group_starts, ratings, updates, gains, strict=True)
+    ]
+
+
+async def _upsert(session: AsyncSession, results: list[dict]) -> None:
+    """Записать навыки; строки без статистики создаются с нулевыми суммами."""
+    for offset in range(0, len(results), UPSERT_BATCH_SIZE):
+        statement = pg_insert(StudentTopicStats).values(
+            results[offset:offset + UPSERT_BATCH_SIZE]
+        )
+        await session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["student_id", "subject", "topic"],
+                set_={
+                    "skill_rating": statement.excluded.skill_rating,
+                    "skill_updates": statement.excluded.skill_updates,
+                    "gain_successes": statement.excluded.gain_successes,
+                    "gain_failures": statement.excluded.gain_failures,
+                },
+            )
+        )
+
+
+async def _write_chunk(session: AsyncSession, rows: list) -> list[tuple]:
+    """Пересчитать и записать пачку отдельной короткой транзакцией."""
+    results = compute_chunk(rows)
+    await _upsert(session, results)
+    await session.commit()
+    return [(r["student_id"], r["subject"], r["topic"]) for r in results]
+
+
+async def backfill_shard(shard: int, shards: int, chunk_size: int) -> int:
+    """Пересчитать навыки учеников шарда. Возвращает число попыток."""
+    engine = create_async_engine(get_settings().DATABASE_URL, pool_size=2)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    processed = 0
+    touched: set[tuple] = set()
+
+    async with session_maker() as write_session, session_maker() as read_session:
+        result = await read_session.stream(
+            _attempts_query(shard, shards).execution_options(yield_per=chunk_size)
+        )
+
+        # Хвост последней группы пачки переносится в следующую,
+        # чтобы группа не разрезалась между пачками
+        pending: list = []
+        async for partition in result.partitions():
+            rows = pending + list(partition)
+            last_key = (rows[-1].student_id, rows[-1].subject, rows[-1].topic)
+            split = len(rows)
+            while split > 0 and (
+                rows[split - 1].student_id,
+                rows[split - 1].subject,
+                rows[split - 1].topic,
+            ) == last_key:
+                split -= 1
+
+            pending = rows[split:]
+            if split:
+                touched.update(await _write_chunk(write_session, rows[:split]))
+                processed += split
+
+        if pending:
+            touched.update(await _write_chunk(write_session, pending))
+            processed += len(pending)
+
+        # Темы, у которых больше нет оценённых попыток, теряют навык
+        stale_result = await write_session.execute(
+            select(
+                StudentTopicStats.id,
+                StudentTopicStats.student_id,
+                StudentTopicStats.subject,
+                StudentTopicStats.topic,
+            ).where(
+                StudentTopicStats.student_id % shards == shard,
+                StudentTopicStats.skill_updates > 0,
+            )
+        )
+        stale_ids = [
+            row.id
+            for row in stale_result.all()
+            if (row.student_id, row.subject, row.topic) not in touched
+        ]
+        if stale_ids:
+            await write_session.execute(
+                update(StudentTopicStats)
+                .where(StudentTopicStats.id.in_(stale_ids))
+                .values(skill_rating=0, skill_updates=0, gain_successes=0, gain_failures=0)
+            )
+            await write_session.commit()
+
+    await engine.dispose()
+    return processed
+
+
+def _run_shard(shard: int, shards: int, chunk_size: int) -> int:
+    """Точка входа процесса-воркера."""
+    return asyncio.run(backfill_shard(shard, shards, chunk_size))
+
+
+def backfill(workers: int, shards: int, chunk_size: int) -> None:
+    """Пересчитать навыки всех учеников в пуле процессов."""
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_run_shard, shard, shards, chunk_size) for shard in range(shards)
+        ]
+        processed = sum(future.result() for future in futures)
+
+    elapsed = time.perf_counter() - started
+    print(f"Навыки пересчитаны: {processed} попыток за {elapsed:.1f} с")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пересчёт навыков по истории попыток")
+    parser.add_argument("--workers", type=int, default=4, help="Число процессов")
+    parser.add_argument("--shards", type=int, default=None, help="Число шардов (по умолчанию = workers)")
+    parser.add_argument("--chunk-size", type=int, default=20000, help="Попыток в пачке")
+    args = parser.parse_args()
+    backfill(args.workers, args.shards or args.workers, args.chunk_size)
@@ -0,0 +1,61 @@
+"""
+Потоковая выгрузка попыток или заданий в файл (CSV, NDJSON, Parquet).
+
+Запуск:
+    python -m app.cli.export_data attempts --output attempts.csv
+    python -m app.cli.export_data tasks --format ndjson --class 3 > tasks.ndjson
+    python -m app.cli.export_data attempts --format parquet --from 2025-01-01 --output a.parquet
+"""
+import argparse
+import asyncio
+import sys
+from datetime import date
+
+if sys.platform == "win32":
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+from app.core.constants import ExportFormat
+from app.database import async_session_maker, engine
+from app.services.export import ExportFilters, ExportService, make_encoder
+
+
+async def export(entity: str, export_format: ExportFormat, filters: ExportFilters, output) -> None:
+    """Выгрузить данные в открытый бинарный поток."""
+    if entity == "attempts":
+        query = ExportService.attempts_query(filters)
+    else:
+        query = ExportService.tasks_query(filters)
+    encoder = make_encoder(export_format, query)
+
+    async with async_session_maker() as session:
+        async for chunk in ExportService(session).stream(query, encoder):
+            output.write(chunk)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Выгрузка task_attempts / tasks")
+    parser.add_argument("entity", choices=["attempts", "tasks"], help="Что выгружать")
+    parser.add_argument(
+        "--format", type=ExportFormat, default=ExportFormat.CSV, choices=list(ExportFormat)
+    )
+    parser.add_argument("--student", type=int, default=None, help="ID ученика")
+    parser.add_argument("--class", dest="class_id", type=int, default=None, help="ID класса")
+    parser.add_argument("--organization", type=int, default=None, help="ID организации")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, default=None)
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, default=None)
+    parser.add_argument("--output", default=None, help="Файл (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    filters = ExportFilters(
+        student_id=args.student,
+        class_id=args.class_id,
+        organization_id=args.organization,
+        date_from=args.date_from,
+        date_to=args.date_to,
+    )
+    if args.output:
+        with open(args.output, "wb") as output:
+            asyncio.run(export(args.entity, args.format, filters, output))
+    else:
+        asyncio.run(export(args.entity, args.format, filters, sys.stdout.buffer))
@@ -0,0 +1,33 @@
+"""
+Пересборка квантильных скетчей когорт (cohort_sketches) по средним учеников.
+
+Приложение пересобирает скетчи само (COHORT_SKETCHES_REBUILD_SECONDS);
+команда нужна, когда фоновая пересборка отключена, и сразу после
+пересчёта статистики тем или изменения состава классов и профилей ОВЗ.
+
+Запуск:
+    python -m app.cli.rebuild_cohort_sketches
+"""
+import asyncio
+import sys
+
+if sys.platform == "win32":
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+from app.database import async_session_maker, engine
+from app.services.cohorts import CohortSketchService
+
+
+async def rebuild() -> None:
+    """Пересобрать скетчи всех когорт."""
+    async with async_session_maker() as session:
+        processed = await CohortSketchService(session).rebuild()
+    await engine.dispose()
+    if processed is None:
+        print("Скетчи когорт уже пересобирает другой процесс")
+    else:
+        print(f"Скетчи когорт пересобраны: {processed} учеников")
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild())
@@ -0,0 +1,37 @@
+"""
+Пересчёт прогресса целей ИОП по связанным заданиям и попыткам.
+
+Нужен для первичного заполнения сумм в iep_goals и после ручных
+правок task_attempts или tasks.
+
+Запуск:
+    python -m app.cli.rebuild_goal_progress            # все цели
+    python -m app.cli.rebuild_goal_progress --goal 42
+"""
+import argparse
+import asyncio
+import sys
+
+if sys.platform == "win32":
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+from app.database import async_session_maker, engine
+from app.services.goals import GoalMetricService
+
+
+async def rebuild(goal_id: int | None) -> None:
+    """Пересчитать одну или все цели."""
+    async with async_session_maker() as session:
+        count = await GoalMetricService(session).recompute(
+            None if goal_id is None else [goal_id]
+        )
+        await session.commit()
+    await engine.dispose()
+    print(f"Прогресс целей пересчитан: {count}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пересчёт прогресса целей ИОП")
+    parser.add_argument("--goal", type=int, default=None, help="ID цели")
+    args = parser.parse_args()
+    asyncio.run(rebuild(args.goal))
@@ -0,0 +1,31 @@
+"""
+Пересчёт накопительной статистики по темам (student_topic_stats).
+
+Запуск:
+    python -m app.cli.rebuild_topic_stats            # все ученики
+    python -m app.cli.rebuild_topic_stats --student 42
+"""
+import argparse
+import asyncio
+import sys
+
+if sys.platform == "win32":
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+from app.database import async_session_maker, engine
+from app.services.stats import TopicStatsService
+
+
+async def rebuild(student_id: int | None) -> None:
+    """Пересчитать статистику одного или всех учеников."""
+    async with async_session_maker() as session:
+        await TopicStatsService(session).rebuild(student_id)
+    await engine.dispose()
+    print("Статистика по темам пересчитана")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пересчёт student_topic_stats")
+    parser.add_argument("--student", type=int, default=None, help="ID ученика")
+    args = parser.parse_args()
+    asyncio.run(rebuild(args.student))
@@ -0,0 +1,41 @@
+"""
+Сброс сохранённых недельных отчётов (weekly_reports).
+
+Нужен после ручных правок или загрузки попыток за прошедшие недели:
+удалённые отчёты пересчитываются при следующем запросе.
+
+Запуск:
+    python -m app.cli.rebuild_weekly_reports            # все ученики
+    python -m app.cli.rebuild_weekly_reports --student 42
+"""
+import argparse
+import asyncio
+import sys
+
+if sys.platform == "win32":
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+from sqlalchemy import delete
+
+from app.database import async_session_maker, engine
+from app.models.progress import WeeklyReportSnapshot
+from app.services.reports import WeeklyReportService
+
+
+async def rebuild(student_id: int | None) -> None:
+    """Удалить сохранённые отчёты одного или всех учеников."""
+    async with async_session_maker() as session:
+        if student_id is None:
+            await session.execute(delete(WeeklyReportSnapshot))
+        else:
+            await WeeklyReportService(session).invalidate(student_id)
+        await session.commit()
+    await engine.dispose()
+    print("Сохранённые недельные отчёты сброшены")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сброс weekly_reports")
+    parser.add_argument("--student", type=int, default=None, help="ID ученика")
+    args = parser.parse_args()
+    asyncio.run(rebuild(args.student))
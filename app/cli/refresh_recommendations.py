@@ -0,0 +1,36 @@
+"""
+Пересчёт заранее посчитанных рекомендаций (recommendation_candidates).
+
+Нужен после пересчёта статистики или навыков и после изменения правил
+рекомендаций; при обычной работе список обновляется оценкой попыток.
+
+Запуск:
+    python -m app.cli.refresh_recommendations            # все ученики
+    python -m app.cli.refresh_recommendations --student 42
+"""
+import argparse
+import asyncio
+import sys
+
+if sys.platform == "win32":
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+from app.database import async_session_maker, engine
+from app.services.recommendations import RecommendationService
+
+
+async def refresh(student_id: int | None) -> None:
+    """Пересчитать рекомендации одного или всех учеников."""
+    async with async_session_maker() as session:
+        count = await RecommendationService(session).rebuild(
+            None if student_id is None else [student_id]
+        )
+    await engine.dispose()
+    print(f"Рекомендации пересчитаны: {count} учеников")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пересчёт recommendation_candidates")
+    parser.add_argument("--student", type=int, default=None, help="ID ученика")
+    args = parser.parse_args()
+    asyncio.run(refresh(args.student))
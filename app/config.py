@@ -29,10 +29,20 @@ class Settings(BaseSettings):
     OPENROUTER_API_KEY: str = ""
     DEFAULT_LLM_MODEL: str = "anthropic/claude-3-haiku"
 
+    # Analytics
+    ANALYTICS_VIEWS_REFRESH_SECONDS: int = 300  # 0 — не обновлять представления
+    COHORT_SKETCHES_REBUILD_SECONDS: int = 3600  # 0 — только app.cli.rebuild_cohort_sketches
+    PROGRESS_CACHE_TTL_SECONDS: int = 60  # 0 — не кэшировать прогресс
+    PROGRESS_CACHE_MAX_STUDENTS: int = 10000
+    TELEMETRY_FLUSH_SECONDS: float = 2.0  # интервал записи буфера событий попыток
+    TELEMETRY_BATCH_SIZE: int = 1000  # запись раньше интервала при таком числе событий
+    TELEMETRY_MAX_BUFFERED: int = 100000  # сверх этого старые события отбрасываются
+
     # App
     DEBUG: bool = False
     API_V1_PREFIX: str = "/api/v1"
     LANGUAGE: str = "ru"
+    DEFAULT_TIMEZONE: str = "Europe/Moscow"  # если у организации не задан settings.timezone
     APP_NAME: str = "Adaptive Learning API"
     APP_VERSION: str = "0.1.0"
 
@@ -5,7 +5,9 @@ from app.core.constants import (
     GoalStatus,
     IEPStatus,
     LearningStyle,
+    ReadMode,
     ScaffoldingLevel,
+    StatsBucket,
     Subject,
     TaskStatus,
     UserRole,
@@ -39,6 +41,8 @@ __all__ = [
     "IEPStatus",
     "GoalStatus",
     "Subject",
+    "StatsBucket",
+    "ReadMode",
     # Exceptions
     "AppException",
     "NotFoundException",
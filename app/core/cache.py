@@ -0,0 +1,120 @@
+"""
+Кэш результатов прогресса и аналитики ученика.
+
+Результаты хранятся в памяти процесса по ключу (ученик, метод, параметры)
+и сбрасываются целиком для ученика, когда меняются его задания, попытки
+или цели ИОП. TTL ограничивает устаревание между воркерами: сброс
+видит только процесс, в котором произошло изменение.
+"""
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from functools import lru_cache, wraps
+from typing import Any, TypeVar
+
+from app.config import get_settings
+from app.core.constants import ReadMode
+
+T = TypeVar("T")
+
+
+class StudentCache:
+    """LRU-кэш по ученикам с TTL и поколениями для безопасного сброса."""
+
+    def __init__(self, ttl: float, max_students: int):
+        self.ttl = ttl
+        self.max_students = max_students
+        self._entries: OrderedDict[int, dict[Hashable, tuple[float, Any]]] = OrderedDict()
+        self._generations: dict[int, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_students > 0
+
+    async def get_or_compute(
+        self,
+        student_id: int,
+        key: Hashable,
+        compute: Callable[[], Awaitable[T]],
+    ) -> T:
+        """
+        Вернуть значение из кэша или посчитать и сохранить его.
+
+        Если за время вычисления данные ученика сбросили, результат
+        не сохраняется: он мог быть посчитан по старым данным.
+        """
+        if not self.enabled:
+            return await compute()
+
+        now = time.monotonic()
+        entries = self._entries.get(student_id)
+        if entries is not None:
+            cached = entries.get(key)
+            if cached is not None and cached[0] > now:
+                self._entries.move_to_end(student_id)
+                return cached[1]
+
+        generation = self._generations.get(student_id, 0)
+        value = await compute()
+
+        if self._generations.get(student_id, 0) == generation:
+            self._store(student_id, key, value)
+
+        return value
+
+    def _store(self, student_id: int, key: Hashable, value: Any) -> None:
+        entries = self._entries.setdefault(student_id, {})
+        entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(student_id)
+
+        while len(self._entries) > self.max_students:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *student_ids: int | None) -> None:
+        """Сбросить все результаты учеников."""
+        for student_id in student_ids:
+            if student_id is None:
+                continue
+            self._entries.pop(student_id, None)
+            self._generations[student_id] = self._generations.get(student_id, 0) + 1
+
+    def clear(self) -> None:
+        """Сбросить кэш полностью."""
+        self._entries.clear()
+        self._generations.clear()
+
+
+@lru_cache
+def get_progress_cache() -> StudentCache:
+    """Получить кэш прогресса процесса."""
+    settings = get_settings()
+    return StudentCache(
+        ttl=settings.PROGRESS_CACHE_TTL_SECONDS,
+        max_students=settings.PROGRESS_CACHE_MAX_STUDENTS,
+    )
+
+
+def cached_by_student(name: str):
+    """
+    Кэшировать результат метода сервиса по ученику и параметрам.
+
+    Первый позиционный аргумент метода — ID ученика. Кэшируется только
+    живой режим чтения: снимки и так читаются из материализованных
+    представлений. Возвращаемые объекты общие для всех запросов
+    и не должны изменяться вызывающим кодом.
+    """
+
+    def decorator(method: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @wraps(method)
+        async def wrapper(self, student_id: int, *args, **kwargs) -> T:
+            if getattr(self, "read_mode", ReadMode.LIVE) != ReadMode.LIVE:
+                return await method(self, student_id, *args, **kwargs)
+
+            key = (name, args, tuple(sorted(kwargs.items())))
+            return await get_progress_cache().get_or_compute(
+                student_id, key, lambda: method(self, student_id, *args, **kwargs)
+            )
+
+        return wrapper
+
+    return decorator
@@ -70,6 +70,25 @@ class TaskStatus(StrEnum):
     ARCHIVED = "archived"  # В архиве
 
 
+class TaskType(StrEnum):
+    """Тип задания (поле type в Task.content)."""
+
+    MULTIPLE_CHOICE = "multiple_choice"  # Выбор из вариантов
+    FILL_BLANK = "fill_blank"  # Заполнение пропуска
+    MATCHING = "matching"  # Сопоставление
+    ORDERING = "ordering"  # Упорядочивание
+    OPEN_ENDED = "open_ended"  # Развёрнутый ответ, проверяет педагог
+
+
+class AttemptEventType(StrEnum):
+    """Событие телеметрии попытки."""
+
+    HEARTBEAT = "heartbeat"  # Ученик на странице задания
+    HINT_VIEW = "hint_view"  # Просмотр подсказки
+    OPTION_CHANGE = "option_change"  # Смена выбранного ответа
+    FOCUS_LOSS = "focus_loss"  # Уход со страницы или из окна
+
+
 class IEPStatus(StrEnum):
     """Статус индивидуальной образовательной программы (ИОП)."""
 
@@ -88,6 +107,22 @@ class GoalStatus(StrEnum):
     NOT_ACHIEVED = "not_achieved"  # Не достигнута
 
 
+class GoalMetric(StrEnum):
+    """Метрика цели ИОП, которая считается автоматически."""
+
+    PERCENT_CORRECT = "percent_correct"  # Процент правильных ответов
+    TASKS_COMPLETED = "tasks_completed"  # Выполненные задания
+    AVERAGE_SCORE = "average_score"  # Средний балл
+    AVERAGE_TIME = "average_time"  # Среднее время на задание
+
+
+class GoalUnit(StrEnum):
+    """Единица целевого значения цели по времени."""
+
+    SECONDS = "seconds"  # Секунды
+    MINUTES = "minutes"  # Минуты
+
+
 class Subject(StrEnum):
     """Учебные предметы."""
 
@@ -97,3 +132,41 @@ class Subject(StrEnum):
     NATURAL_SCIENCE = "natural_science"  # Окружающий мир
     ENGLISH = "english"  # Английский язык
     OTHER = "other"  # Другое
+
+
+class StatsBucket(StrEnum):
+    """Интервал группировки статистики."""
+
+    DAY = "day"  # День
+    WEEK = "week"  # Неделя
+    MONTH = "month"  # Месяц
+
+
+class ReadMode(StrEnum):
+    """Источник данных аналитики."""
+
+    LIVE = "live"  # Актуальные данные из таблиц
+    SNAPSHOT = "snapshot"  # Материализованные представления (обновляются периодически)
+
+
+class RecommendationStrategy(StrEnum):
+    """Стратегия подбора рекомендаций."""
+
+    RULES = "rules"  # Слабые и освоенные темы по правилам
+    BANDIT = "bandit"  # Сэмплирование Томпсона по приросту навыка
+
+
+class CohortMetric(StrEnum):
+    """Метрика попыток для сравнения с когортой."""
+
+    SCORE = "score"  # Балл
+    TIME = "time"  # Время на задание, секунды
+    HINTS = "hints"  # Подсказки на задание
+
+
+class ExportFormat(StrEnum):
+    """Формат выгрузки данных."""
+
+    CSV = "csv"
+    NDJSON = "ndjson"
+    PARQUET = "parquet"  # Требует pyarrow
@@ -0,0 +1,58 @@
+"""
+Курсорная (keyset) пагинация списков.
+
+Страница выбирается условием (sort, id) < (sort, id) последней строки
+предыдущей страницы по составному индексу, а не OFFSET: стоимость
+не растёт с глубиной, и вставки между запросами не сдвигают страницы.
+Курсор — непрозрачная строка base64 с позицией последней строки.
+"""
+import base64
+import json
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import Select, tuple_
+
+from app.core.exceptions import BadRequestException
+
+
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    """Курсор на позицию после строки."""
+    payload = json.dumps([sort_value.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Разобрать курсор из запроса."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise BadRequestException("Некорректный курсор") from e
+
+
+def paginate(query: Select, sort_column, id_column, cursor: str | None, limit: int) -> Select:
+    """
+    Страница запроса по убыванию (sort, id).
+
+    Выбирает на строку больше `limit`, чтобы понять, есть ли следующая
+    страница (см. page_items).
+    """
+    if cursor:
+        query = query.where(tuple_(sort_column, id_column) < tuple_(*decode_cursor(cursor)))
+    return query.order_by(sort_column.desc(), id_column.desc()).limit(limit + 1)
+
+
+def page_items(
+    rows: Sequence[Any],
+    limit: int,
+    sort_attr: str = "created_at",
+) -> tuple[list[Any], str | None]:
+    """Строки страницы и курсор следующей (None — страница последняя)."""
+    items = list(rows[:limit])
+    if len(rows) <= limit:
+        return items, None
+    last = items[-1]
+    return items, encode_cursor(getattr(last, sort_attr), last.id)
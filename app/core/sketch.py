@@ -0,0 +1,106 @@
+"""
+Квантильный скетч KLL для приближённых перцентилей.
+
+Скетч хранит не все значения, а иерархию компакторов: уровень h держит
+значения с весом 2^h, переполненный уровень сортируется и передаёт
+каждое второе значение наверх. Размер — O(k) значений независимо от их
+числа, ошибка ранга — порядка 1/k. Скетчи сливаются (merge) без потери
+точности: скетч когорты собирается из частичных скетчей её частей.
+"""
+import random
+from bisect import bisect_right
+from typing import Any
+
+SKETCH_K = 128  # ёмкость верхнего уровня; ошибка ранга ~1.5%
+_CAPACITY_DECAY = 2 / 3  # нижние уровни меньше верхних
+
+
+class QuantileSketch:
+    """Скетч KLL для чисел."""
+
+    def __init__(self, k: int = SKETCH_K):
+        self.k = k
+        self.count = 0
+        self.levels: list[list[float]] = [[]]
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(int(self.k * _CAPACITY_DECAY**depth), 2)
+
+    def _compress(self) -> None:
+        """Сжать переполненные уровни."""
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                items = sorted(self.levels[level])
+                # Нечётное значение остаётся на уровне, чтобы вес сохранялся
+                keep = items[-1:] if len(items) % 2 else []
+                if keep:
+                    items = items[:-1]
+                self.levels[level + 1].extend(items[random.getrandbits(1)::2])
+                self.levels[level] = keep
+            level += 1
+
+    def update(self, value: float) -> None:
+        """Добавить значение."""
+        self.levels[0].append(float(value))
+        self.count += 1
+        if len(self.levels[0]) > self._capacity(0):
+            self._compress()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Добавить все значения другого скетча."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.count += other.count
+        self._compress()
+
+    def _weighted(self) -> tuple[list[float], list[int]]:
+        """Значения по возрастанию и накопленные веса."""
+        pairs = sorted(
+            (value, 1 << level) for level, items in enumerate(self.levels) for value in items
+        )
+        values = [value for value, _ in pairs]
+        cumulative = []
+        total = 0
+        for _, weight in pairs:
+            total += weight
+            cumulative.append(total)
+        return values, cumulative
+
+    def rank(self, value: float) -> float:
+        """Доля значений, не больших `value` (0..1)."""
+        values, cumulative = self._weighted()
+        if not values:
+            return 0.0
+        position = bisect_right(values, value)
+        return cumulative[position - 1] / cumulative[-1] if position else 0.0
+
+    def quantile(self, q: float) -> float | None:
+        """Значение, ниже которого доля `q` значений."""
+        values, cumulative = self._weighted()
+        if not values:
+            return None
+        target = q * cumulative[-1]
+        for value, weight in zip(values, cumulative, strict=True):
+            if weight >= target:
+                return value
+        return values[-1]
+
+    def to_dict(self) -> dict[str, Any]:
+        """Представление для JSONB."""
+        return {"k": self.k, "n": self.count, "levels": self.levels}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any] | None) -> "QuantileSketch":
+        """Восстановить скетч из JSONB."""
+        sketch = cls()
+        if data:
+            sketch.k = data.get("k", SKETCH_K)
+            sketch.count = data.get("n", 0)
+            sketch.levels = [list(items) for items in data.get("levels", [[]])] or [[]]
+        return sketch
@@ -0,0 +1,20 @@
+"""
+Часовой пояс организации.
+
+Пояс хранится в настройках организации (settings.timezone); отсутствующий
+или неизвестный пояс заменяется поясом по умолчанию из конфигурации.
+"""
+from typing import Any
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from app.config import get_settings
+
+
+def org_timezone(org_settings: dict[str, Any] | None) -> str:
+    """Имя часового пояса из настроек организации или пояс по умолчанию."""
+    tz_name = (org_settings or {}).get("timezone") or get_settings().DEFAULT_TIMEZONE
+    try:
+        ZoneInfo(tz_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        tz_name = get_settings().DEFAULT_TIMEZONE
+    return tz_name
@@ -0,0 +1,41 @@
+"""
+Получение строки под блокировкой с созданием при необходимости.
+
+Вставка с ON CONFLICT DO NOTHING безопасна при одновременном создании
+одной и той же строки, SELECT ... FOR UPDATE сериализует её обновления.
+populate_existing перечитывает строку, уже загруженную в сессию.
+"""
+from typing import Any, TypeVar
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+ModelT = TypeVar("ModelT")
+
+
+async def get_or_create_for_update(
+    db: AsyncSession,
+    model: type[ModelT],
+    key: dict[str, Any],
+    defaults: dict[str, Any] | None = None,
+) -> ModelT:
+    """
+    Получить строку `model` по уникальному ключу `key` под блокировкой.
+
+    Отсутствующая строка создаётся из `key` и `defaults`; поля `key`
+    должны составлять уникальный индекс таблицы.
+    """
+    await db.execute(
+        pg_insert(model)
+        .values(**key, **(defaults or {}))
+        .on_conflict_do_nothing(index_elements=list(key))
+    )
+
+    result = await db.execute(
+        select(model)
+        .where(*(getattr(model, name) == value for name, value in key.items()))
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
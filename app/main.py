@@ -1,6 +1,8 @@
 """
 Точка входа FastAPI приложения.
 """
+import asyncio
+import contextlib
 import logging
 from contextlib import asynccontextmanager
 
@@ -9,6 +11,10 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1.router import api_router
 from app.config import get_settings
+from app.database import engine
+from app.services.cohorts import run_rebuild_loop
+from app.services.materialized_views import run_refresh_loop
+from app.services.telemetry import get_event_buffer
 
 settings = get_settings()
 
@@ -24,8 +30,41 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Жизненный цикл приложения."""
     logger.info("Запуск приложения...")
+
+    # Периодическое обновление материализованных представлений аналитики
+    refresh_task = None
+    if settings.ANALYTICS_VIEWS_REFRESH_SECONDS > 0 and engine.dialect.name == "postgresql":
+        refresh_task = asyncio.create_task(
+            run_refresh_loop(settings.ANALYTICS_VIEWS_REFRESH_SECONDS)
+        )
+
+    # Периодическая пересборка скетчей когорт
+    cohorts_task = None
+    if settings.COHORT_SKETCHES_REBUILD_SECONDS > 0:
+        cohorts_task = asyncio.create_task(
+            run_rebuild_loop(settings.COHORT_SKETCHES_REBUILD_SECONDS)
+        )
+
+    # Запись буфера телеметрии попыток
+    event_buffer = get_event_buffer()
+    telemetry_task = asyncio.create_task(event_buffer.run(settings.TELEMETRY_FLUSH_SECONDS))
+
     yield
+
     logger.info("Остановка приложения...")
+    for task in (refresh_task, cohorts_task):
+        if task:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    telemetry_task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await telemetry_task
+    try:
+        await event_buffer.flush()
+    except Exception:
+        logger.exception("Не удалось записать буфер телеметрии при остановке")
 
 
 app = FastAPI(
@@ -4,7 +4,16 @@
 from app.models.base import Base, SoftDeleteMixin, TimestampMixin
 from app.models.iep import IEP, IEPGoal
 from app.models.organization import Class, Organization
-from app.models.progress import TaskAttempt
+from app.models.progress import (
+    AttemptEvent,
+    CohortSketch,
+    RecommendationCandidate,
+    ReviewSchedule,
+    StudentSubjectLevel,
+    StudentTopicStats,
+    TaskAttempt,
+    WeeklyReportSnapshot,
+)
 from app.models.student import Student, StudentProfile
 from app.models.task import Task, TaskTemplate
 from app.models.user import User
@@ -23,4 +32,11 @@ __all__ = [
     "TaskTemplate",
     "Task",
     "TaskAttempt",
+    "StudentTopicStats",
+    "StudentSubjectLevel",
+    "RecommendationCandidate",
+    "ReviewSchedule",
+    "WeeklyReportSnapshot",
+    "CohortSketch",
+    "AttemptEvent",
 ]
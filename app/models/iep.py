@@ -1,14 +1,14 @@
 """
 Модели индивидуальной образовательной программы (ИОП).
 """
-from datetime import date
+from datetime import date, datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Date, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import Date, DateTime, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.core.constants import GoalStatus, IEPStatus, Subject
+from app.core.constants import GoalStatus, GoalUnit, IEPStatus, Subject
 from app.models.base import Base, TimestampMixin
 
 if TYPE_CHECKING:
@@ -22,6 +22,10 @@ class IEP(Base, TimestampMixin):
     """
 
     __tablename__ = "ieps"
+    __table_args__ = (
+        # Курсорная пагинация списков (app.core.pagination)
+        Index("ix_ieps_created_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -83,8 +87,24 @@ class IEPGoal(Base, TimestampMixin):
         String(100), nullable=False
     )  # Например: "правильных ответов %"
     target_value: Mapped[float] = mapped_column(Float, nullable=False)  # Целевое значение
+    target_unit: Mapped[GoalUnit | None] = mapped_column(
+        String(20), nullable=True
+    )  # Единица времени; None — секунды
     current_value: Mapped[float] = mapped_column(Float, nullable=False, default=0)  # Текущее
 
+    # Накопительные суммы по связанным заданиям (см. app.services.goals):
+    # current_value пересчитывается из них без обхода попыток
+    attempts_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    correct_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    scored_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    score_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    timed_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    time_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # секунды
+    tasks_completed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_activity_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
     # Статус
     status: Mapped[GoalStatus] = mapped_column(
         String(20), nullable=False, default=GoalStatus.NOT_STARTED
@@ -1,13 +1,23 @@
 """
 Модели прогресса и попыток выполнения заданий.
 """
-from datetime import datetime
+from datetime import date, datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import DateTime, Float, ForeignKey, Integer
+from sqlalchemy import (
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+)
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.core.constants import DifficultyLevel, ScaffoldingLevel, Subject
 from app.models.base import Base, TimestampMixin
 
 if TYPE_CHECKING:
@@ -21,6 +31,11 @@ class TaskAttempt(Base, TimestampMixin):
     """
 
     __tablename__ = "task_attempts"
+    __table_args__ = (
+        # Агрегаты попыток по заданию и по ученику; id — для курсорной пагинации
+        Index("ix_task_attempts_task_id", "task_id"),
+        Index("ix_task_attempts_student_started", "student_id", "started_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
 
@@ -78,3 +93,246 @@ class TaskAttempt(Base, TimestampMixin):
     def is_completed(self) -> bool:
         """Проверить, завершена ли попытка."""
         return self.completed_at is not None
+
+
+class StudentTopicStats(Base, TimestampMixin):
+    """
+    Накопительная статистика ученика по теме.
+    Обновляется инкрементально при отправке и оценке попыток,
+    чтобы аналитика читала O(тем) строк вместо всех попыток.
+    """
+
+    __tablename__ = "student_topic_stats"
+    __table_args__ = (
+        UniqueConstraint("student_id", "subject", "topic", name="uq_student_topic_stats"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    # Ученик и тема
+    student_id: Mapped[int] = mapped_column(
+        ForeignKey("students.id", ondelete="CASCADE"), nullable=False
+    )
+    subject: Mapped[Subject] = mapped_column(String(50), nullable=False)
+    topic: Mapped[str] = mapped_column(String(255), nullable=False)
+
+    # Завершённые попытки
+    attempts_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    correct_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    # Суммы для средних (score и time_spent могут быть не заданы)
+    scored_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    score_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    timed_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    time_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # секунды
+    hints_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    # Последняя завершённая попытка
+    last_activity_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    # Навык по теме (рейтинг Эло, см. app.services.skills)
+    skill_rating: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    skill_updates: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    # Прирост навыка для бандита рекомендаций (доли успехов и неудач)
+    gain_successes: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    gain_failures: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return (
+            f"StudentTopicStats(student_id={self.student_id}, "
+            f"subject={self.subject}, topic={self.topic})"
+        )
+
+    @property
+    def average_score(self) -> float | None:
+        """Средний балл по оценённым попыткам."""
+        return self.score_sum / self.scored_count if self.scored_count else None
+
+
+class StudentSubjectLevel(Base, TimestampMixin):
+    """
+    Текущий уровень ученика по предмету.
+    Сложность и скэффолдинг подстраиваются лестницей (staircase)
+    после каждой оценённой попытки, генерация заданий читает их отсюда.
+    """
+
+    __tablename__ = "student_subject_levels"
+    __table_args__ = (
+        UniqueConstraint("student_id", "subject", name="uq_student_subject_levels"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    student_id: Mapped[int] = mapped_column(
+        ForeignKey("students.id", ondelete="CASCADE"), nullable=False
+    )
+    subject: Mapped[Subject] = mapped_column(String(50), nullable=False)
+
+    difficulty: Mapped[DifficultyLevel] = mapped_column(
+        Integer, nullable=False, default=DifficultyLevel.EASY
+    )
+    scaffolding_level: Mapped[ScaffoldingLevel] = mapped_column(
+        Integer, nullable=False, default=ScaffoldingLevel.MEDIUM_SUPPORT
+    )
+
+    # Успешные попытки подряд на текущем уровне
+    success_streak: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return (
+            f"StudentSubjectLevel(student_id={self.student_id}, subject={self.subject}, "
+            f"difficulty={self.difficulty})"
+        )
+
+
+class ReviewSchedule(Base, TimestampMixin):
+    """
+    Интервальное повторение темы (SM-2).
+    Срок следующего повторения сдвигается при каждой оценённой попытке,
+    очередь «что повторить сейчас» читается диапазоном по индексу
+    (student_id, due_at).
+    """
+
+    __tablename__ = "review_schedule"
+    __table_args__ = (
+        UniqueConstraint("student_id", "subject", "topic", name="uq_review_schedule_topic"),
+        Index("ix_review_schedule_student_due", "student_id", "due_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    student_id: Mapped[int] = mapped_column(
+        ForeignKey("students.id", ondelete="CASCADE"), nullable=False
+    )
+    subject: Mapped[Subject] = mapped_column(String(50), nullable=False)
+    topic: Mapped[str] = mapped_column(String(255), nullable=False)
+
+    # Параметры SM-2
+    easiness: Mapped[float] = mapped_column(Float, nullable=False, default=2.5)
+    interval_days: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    repetitions: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    last_reviewed_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    due_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self) -> str:
+        return (
+            f"ReviewSchedule(student_id={self.student_id}, topic={self.topic}, "
+            f"due_at={self.due_at})"
+        )
+
+
+class RecommendationCandidate(Base, TimestampMixin):
+    """
+    Заранее посчитанная рекомендация для ученика.
+    Список пересчитывается по предмету при оценке попытки,
+    эндпоинт рекомендаций читает его одним индексным запросом.
+    """
+
+    __tablename__ = "recommendation_candidates"
+    __table_args__ = (
+        Index("ix_recommendation_candidates_student", "student_id", "priority"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    student_id: Mapped[int] = mapped_column(
+        ForeignKey("students.id", ondelete="CASCADE"), nullable=False
+    )
+    subject: Mapped[Subject] = mapped_column(String(50), nullable=False)
+    topic: Mapped[str] = mapped_column(String(255), nullable=False)
+    difficulty: Mapped[DifficultyLevel] = mapped_column(Integer, nullable=False)
+    reason: Mapped[str] = mapped_column(String(500), nullable=False)
+    priority: Mapped[int] = mapped_column(Integer, nullable=False)  # 1-10
+    estimated_time: Mapped[int] = mapped_column(Integer, nullable=False)  # минуты
+
+    # Порядок внутри предмета при равном приоритете
+    rank: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return (
+            f"RecommendationCandidate(student_id={self.student_id}, "
+            f"topic={self.topic}, priority={self.priority})"
+        )
+
+
+class CohortSketch(Base, TimestampMixin):
+    """
+    Квантильный скетч средних учеников когорты (параллель, класс, группа ОВЗ)
+    по метрике. Пересобирается целиком, см. app.services.cohorts.
+    """
+
+    __tablename__ = "cohort_sketches"
+    __table_args__ = (
+        UniqueConstraint("cohort", "metric", name="uq_cohort_sketches"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    # "grade:3", "class:12", "disability:adhd"
+    cohort: Mapped[str] = mapped_column(String(100), nullable=False)
+    metric: Mapped[str] = mapped_column(String(20), nullable=False)
+
+    # QuantileSketch.to_dict()
+    sketch: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+
+    def __repr__(self) -> str:
+        return f"CohortSketch(cohort={self.cohort}, metric={self.metric})"
+
+
+class WeeklyReportSnapshot(Base, TimestampMixin):
+    """
+    Сохранённый недельный отчёт за завершившуюся неделю.
+    Прошедшая неделя не меняется, поэтому отчёт считается один раз
+    и удаляется только при правке попыток этой недели или пересчёте.
+    """
+
+    __tablename__ = "weekly_reports"
+    __table_args__ = (
+        UniqueConstraint("student_id", "week_start", name="uq_weekly_reports_student_week"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    student_id: Mapped[int] = mapped_column(
+        ForeignKey("students.id", ondelete="CASCADE"), nullable=False
+    )
+    week_start: Mapped[date] = mapped_column(Date, nullable=False)
+    week_end: Mapped[date] = mapped_column(Date, nullable=False)
+
+    # WeeklyReport в виде JSON
+    report: Mapped[dict] = mapped_column(JSONB, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"WeeklyReportSnapshot(student_id={self.student_id}, week_start={self.week_start})"
+
+
+class AttemptEvent(Base):
+    """
+    Событие телеметрии попытки: пульс, просмотр подсказки, смена ответа,
+    потеря фокуса. Таблица только дополняется; строки пишутся пачками
+    из буфера процесса (app.services.telemetry), поэтому внешнего ключа
+    на попытку нет — пачка не должна отклоняться целиком из-за удалённой
+    попытки.
+    """
+
+    __tablename__ = "attempt_events"
+    __table_args__ = (
+        Index("ix_attempt_events_attempt_occurred", "attempt_id", "occurred_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    attempt_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    event_type: Mapped[str] = mapped_column(String(30), nullable=False)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    # Подробности события: номер подсказки, выбранный вариант, длительность
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+
+    def __repr__(self) -> str:
+        return f"AttemptEvent(attempt_id={self.attempt_id}, event_type={self.event_type})"
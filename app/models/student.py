@@ -4,7 +4,7 @@
 from datetime import date
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Date, ForeignKey, Integer, String
+from sqlalchemy import Date, ForeignKey, Index, Integer, String
 from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -20,6 +20,10 @@ class Student(Base, TimestampMixin):
     """Ученик."""
 
     __tablename__ = "students"
+    __table_args__ = (
+        # Курсорная пагинация списков (app.core.pagination)
+        Index("ix_students_created_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
 
@@ -3,7 +3,7 @@
 """
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Boolean, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -15,6 +15,8 @@ if TYPE_CHECKING:
     from app.models.student import Student
     from app.models.user import User
 
+TASK_PAYLOAD = "payload"  # группа отложенных JSONB-полей задания
+
 
 class TaskTemplate(Base, TimestampMixin):
     """
@@ -72,6 +74,13 @@ class Task(Base, TimestampMixin):
     """
 
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Агрегаты прогресса по предметам и темам ученика
+        Index("ix_tasks_student_subject_topic", "student_id", "subject", "topic"),
+        # Курсорная пагинация списков (app.core.pagination)
+        Index("ix_tasks_created_id", "created_at", "id"),
+        Index("ix_tasks_student_created_id", "student_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -97,8 +106,11 @@ class Task(Base, TimestampMixin):
     # Сложность (адаптированная под ученика)
     difficulty: Mapped[DifficultyLevel] = mapped_column(Integer, nullable=False)
 
-    # Контент задания
-    content: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    # Контент задания. Тяжёлые JSONB-поля отложены (группа TASK_PAYLOAD):
+    # списки их не читают, полная загрузка — TaskService.get_by_id
+    content: Mapped[dict] = mapped_column(
+        JSONB, nullable=False, deferred=True, deferred_group=TASK_PAYLOAD
+    )
     """
     Структура content:
     {
@@ -113,7 +125,9 @@ class Task(Base, TimestampMixin):
     """
 
     # Адаптации, применённые к заданию
-    adaptations: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    adaptations: Mapped[dict] = mapped_column(
+        JSONB, nullable=False, default=dict, deferred=True, deferred_group=TASK_PAYLOAD
+    )
     """
     Структура adaptations:
     {
@@ -135,7 +149,9 @@ class Task(Base, TimestampMixin):
     is_ai_generated: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
 
     # Метаданные генерации (для XAI)
-    generation_metadata: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    generation_metadata: Mapped[dict] = mapped_column(
+        JSONB, nullable=False, default=dict, deferred=True, deferred_group=TASK_PAYLOAD
+    )
     """
     Структура generation_metadata:
     {
@@ -3,7 +3,7 @@
 """
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Boolean, ForeignKey, String
+from sqlalchemy import Boolean, ForeignKey, Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.constants import UserRole
@@ -17,6 +17,10 @@ class User(Base, TimestampMixin):
     """Пользователь системы."""
 
     __tablename__ = "users"
+    __table_args__ = (
+        # Курсорная пагинация списков (app.core.pagination)
+        Index("ix_users_created_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
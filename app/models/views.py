@@ -0,0 +1,199 @@
+"""
+Материализованные представления PostgreSQL для аналитики.
+
+Представления не входят в Base.metadata (create_all их не создаёт):
+они создаются `create_materialized_views` и обновляются фоновой задачей
+через REFRESH MATERIALIZED VIEW CONCURRENTLY. Каждое представление
+хранит момент обновления в колонке refreshed_at. Представление, колонки
+которого разошлись с описанием ниже (после изменения DDL), пересоздаётся.
+"""
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import Column, Date, DateTime, Float, Integer, MetaData, String, Table, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.config import get_settings
+
+views_metadata = MetaData()
+
+student_daily_stats_view = Table(
+    "mv_student_daily_stats",
+    views_metadata,
+    Column("student_id", Integer),
+    Column("day", Date),  # день в часовом поясе организации
+    Column("tasks_attempted", Integer),
+    Column("tasks_completed", Integer),
+    Column("correct_answers", Integer),
+    Column("time_spent", Integer),
+    Column("hints_used", Integer),
+    Column("refreshed_at", DateTime(timezone=True)),
+)
+
+student_topic_mastery_view = Table(
+    "mv_student_topic_mastery",
+    views_metadata,
+    Column("student_id", Integer),
+    Column("subject", String(50)),
+    Column("topic", String(255)),
+    Column("task_count", Integer),
+    Column("completed_count", Integer),
+    Column("attempts_count", Integer),
+    Column("correct_count", Integer),
+    Column("avg_score", Float),
+    Column("scored_count", Integer),
+    Column("last_activity_at", DateTime(timezone=True)),
+    # Навык и время из student_topic_stats на момент обновления
+    Column("time_sum", Integer),
+    Column("skill_rating", Float),
+    Column("skill_updates", Integer),
+    Column("refreshed_at", DateTime(timezone=True)),
+)
+
+goal_progress_view = Table(
+    "mv_goal_progress",
+    views_metadata,
+    Column("goal_id", Integer),
+    Column("iep_id", Integer),
+    Column("student_id", Integer),
+    Column("tasks_total", Integer),
+    Column("tasks_completed", Integer),
+    Column("average_score", Float),
+    Column("last_activity_at", DateTime(timezone=True)),
+    Column("refreshed_at", DateTime(timezone=True)),
+)
+
+MATERIALIZED_VIEWS = (
+    student_daily_stats_view.name,
+    student_topic_mastery_view.name,
+    goal_progress_view.name,
+)
+
+
+def _view_ddl(default_timezone: str) -> list[str]:
+    """DDL представлений и уникальных индексов (нужны для CONCURRENTLY)."""
+    # Имя пояса подставляется в DDL литералом, поэтому проверяем его заранее
+    ZoneInfo(default_timezone)
+    default_tz = default_timezone.replace("'", "''")
+
+    return [
+        f"""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_student_daily_stats AS
+        SELECT
+            a.student_id,
+            (a.started_at AT TIME ZONE CASE
+                WHEN o.settings->>'timezone' IN (SELECT name FROM pg_timezone_names)
+                THEN o.settings->>'timezone'
+                ELSE '{default_tz}'
+            END)::date AS day,
+            count(a.id) AS tasks_attempted,
+            count(a.id) FILTER (WHERE a.completed_at IS NOT NULL) AS tasks_completed,
+            count(a.id) FILTER (WHERE a.is_correct) AS correct_answers,
+            coalesce(sum(a.time_spent), 0) AS time_spent,
+            coalesce(sum(a.hints_used), 0) AS hints_used,
+            now() AS refreshed_at
+        FROM task_attempts a
+        JOIN students s ON s.id = a.student_id
+        LEFT JOIN classes c ON c.id = s.class_id
+        LEFT JOIN organizations o ON o.id = c.organization_id
+        GROUP BY a.student_id, 2
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_student_daily_stats
+        ON mv_student_daily_stats (student_id, day)
+        """,
+        """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_student_topic_mastery AS
+        WITH task_stats AS (
+            SELECT
+                student_id, subject, topic,
+                count(*) AS task_count,
+                count(*) FILTER (WHERE status = 'completed') AS completed_count
+            FROM tasks
+            GROUP BY student_id, subject, topic
+        ), attempt_stats AS (
+            SELECT
+                t.student_id, t.subject, t.topic,
+                count(a.id) AS attempts_count,
+                count(a.id) FILTER (WHERE a.is_correct) AS correct_count,
+                avg(a.score) AS avg_score,
+                count(a.score) AS scored_count,
+                max(a.completed_at) AS last_activity_at
+            FROM task_attempts a
+            JOIN tasks t ON t.id = a.task_id
+            WHERE a.completed_at IS NOT NULL
+            GROUP BY t.student_id, t.subject, t.topic
+        )
+        SELECT
+            ts.student_id, ts.subject, ts.topic,
+            ts.task_count, ts.completed_count,
+            coalesce(ats.attempts_count, 0) AS attempts_count,
+            coalesce(ats.correct_count, 0) AS correct_count,
+            ats.avg_score,
+            coalesce(ats.scored_count, 0) AS scored_count,
+            ats.last_activity_at,
+            coalesce(st.time_sum, 0) AS time_sum,
+            coalesce(st.skill_rating, 0) AS skill_rating,
+            coalesce(st.skill_updates, 0) AS skill_updates,
+            now() AS refreshed_at
+        FROM task_stats ts
+        LEFT JOIN attempt_stats ats USING (student_id, subject, topic)
+        LEFT JOIN student_topic_stats st
+            ON st.student_id = ts.student_id
+            AND st.subject = ts.subject
+            AND st.topic = ts.topic
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_student_topic_mastery
+        ON mv_student_topic_mastery (student_id, subject, topic)
+        """,
+        """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_goal_progress AS
+        SELECT
+            g.id AS goal_id,
+            g.iep_id,
+            i.student_id,
+            count(DISTINCT t.id) AS tasks_total,
+            count(DISTINCT t.id) FILTER (WHERE t.status = 'completed') AS tasks_completed,
+            avg(a.score) AS average_score,
+            max(a.completed_at) AS last_activity_at,
+            now() AS refreshed_at
+        FROM iep_goals g
+        JOIN ieps i ON i.id = g.iep_id
+        LEFT JOIN tasks t ON t.iep_goal_id = g.id
+        LEFT JOIN task_attempts a ON a.task_id = t.id AND a.completed_at IS NOT NULL
+        GROUP BY g.id, g.iep_id, i.student_id
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_goal_progress
+        ON mv_goal_progress (goal_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS ix_mv_goal_progress_iep
+        ON mv_goal_progress (iep_id)
+        """,
+    ]
+
+
+async def _drop_outdated_views(conn: AsyncConnection) -> None:
+    """Удалить представления, колонки которых не совпадают с описанием."""
+    for view in views_metadata.tables.values():
+        result = await conn.execute(
+            text(
+                "SELECT attname FROM pg_attribute "
+                "WHERE attrelid = to_regclass(:name) AND attnum > 0 AND NOT attisdropped"
+            ),
+            {"name": view.name},
+        )
+        columns = set(result.scalars())
+        if columns and columns != set(view.columns.keys()):
+            await conn.execute(text(f"DROP MATERIALIZED VIEW {view.name}"))
+
+
+async def create_materialized_views(conn: AsyncConnection) -> None:
+    """Создать материализованные представления, если их ещё нет (только PostgreSQL)."""
+    if conn.dialect.name != "postgresql":
+        return
+
+    await _drop_outdated_views(conn)
+    for statement in _view_ddl(get_settings().DEFAULT_TIMEZONE):
+        await conn.execute(text(statement))
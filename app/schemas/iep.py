@@ -5,7 +5,7 @@ from datetime import date
 
 from pydantic import BaseModel, Field
 
-from app.core.constants import GoalStatus, IEPStatus, Subject
+from app.core.constants import GoalStatus, GoalUnit, IEPStatus, Subject
 
 
 class IEPGoalBase(BaseModel):
@@ -16,6 +16,7 @@ class IEPGoalBase(BaseModel):
     description: str | None = None
     target_metric: str = Field(..., min_length=1, max_length=100)
     target_value: float = Field(..., gt=0)
+    target_unit: GoalUnit | None = None  # None — распознаётся по target_metric
 
 
 class IEPGoalCreate(IEPGoalBase):
@@ -31,6 +32,7 @@ class IEPGoalUpdate(BaseModel):
     description: str | None = None
     target_metric: str | None = None
     target_value: float | None = None
+    target_unit: GoalUnit | None = None
     current_value: float | None = None
     status: GoalStatus | None = None
     order: int | None = None
@@ -0,0 +1,15 @@
+"""
+Схемы страниц списков.
+"""
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    """Страница списка с курсором следующей."""
+
+    items: list[T]
+    next_cursor: str | None = None  # передайте в cursor для следующей страницы
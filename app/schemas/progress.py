@@ -5,7 +5,7 @@ from datetime import datetime
 
 from pydantic import BaseModel, Field
 
-from app.core.constants import DifficultyLevel, GoalStatus, Subject
+from app.core.constants import CohortMetric, DifficultyLevel, GoalStatus, StatsBucket, Subject
 
 
 class ProgressSummary(BaseModel):
@@ -32,6 +32,7 @@ class SubjectProgress(BaseModel):
     topics_covered: list[str] = []
     weak_topics: list[str] = []
     strong_topics: list[str] = []
+    data_as_of: datetime | None = None  # момент обновления снимка (None — актуальные данные)
 
 
 class IEPProgress(BaseModel):
@@ -57,6 +58,7 @@ class GoalProgress(BaseModel):
     tasks_completed: int = 0
     average_score: float = 0.0
     last_activity: datetime | None = None
+    data_as_of: datetime | None = None
 
 
 class DailyStats(BaseModel):
@@ -70,6 +72,18 @@ class DailyStats(BaseModel):
     hints_used: int = 0
 
 
+class RangeStats(BaseModel):
+    """Статистика за период с группировкой по интервалам."""
+
+    student_id: int
+    date_from: str  # YYYY-MM-DD
+    date_to: str
+    bucket: StatsBucket = StatsBucket.DAY
+    timezone: str
+    stats: list[DailyStats] = []  # date — начало интервала
+    data_as_of: datetime | None = None
+
+
 class WeeklyReport(BaseModel):
     """Недельный отчёт."""
 
@@ -81,17 +95,30 @@ class WeeklyReport(BaseModel):
     average_daily_tasks: float = 0.0
     improvement_trend: str = "stable"  # improving, declining, stable
     recommendations: list[str] = []
+    data_as_of: datetime | None = None
 
 
 class SkillLevel(BaseModel):
     """Уровень навыка."""
 
     skill_name: str
+    subject: Subject | None = None
     level: int = Field(..., ge=1, le=5)
     progress_to_next: float = 0.0  # процент до следующего уровня
     total_practice_time: int = 0  # минуты
 
 
+class CohortPosition(BaseModel):
+    """Положение ученика в когорте по метрике."""
+
+    cohort: str  # grade:3, class:12, disability:adhd
+    metric: CohortMetric
+    value: float  # среднее ученика
+    percentile: float  # доля учеников когорты со средним не выше, %
+    cohort_median: float | None = None  # медиана средних учеников когорты
+    cohort_students: int = 0
+
+
 class StudentAnalytics(BaseModel):
     """Полная аналитика ученика."""
 
@@ -100,10 +127,12 @@ class StudentAnalytics(BaseModel):
     subjects_progress: list[SubjectProgress] = []
     iep_progress: IEPProgress | None = None
     skill_levels: list[SkillLevel] = []
+    cohort_positions: list[CohortPosition] = []
     strengths: list[str] = []
     areas_for_improvement: list[str] = []
     recommended_topics: list[str] = []
     scaffolding_recommendation: int = 3
+    data_as_of: datetime | None = None
 
 
 class RecommendationRequest(BaseModel):
@@ -123,3 +152,63 @@ class TaskRecommendation(BaseModel):
     reason: str
     priority: int = Field(..., ge=1, le=10)
     estimated_time: int = 10  # минуты
+
+
+class DueReview(BaseModel):
+    """Тема, которую пора повторить."""
+
+    student_id: int
+    subject: Subject
+    topic: str
+    due_at: datetime
+    last_reviewed_at: datetime | None = None
+    interval_days: int
+    repetitions: int
+
+
+class ScoreDistribution(BaseModel):
+    """Распределение средних баллов учеников группы."""
+
+    bins: list[str] = []  # "0-20", "20-40", ...
+    counts: list[int] = []
+    mean: float = 0.0
+    median: float = 0.0
+    p25: float = 0.0
+    p75: float = 0.0
+
+
+class GroupTopicStats(BaseModel):
+    """Тема, вызывающая трудности у группы."""
+
+    subject: Subject
+    topic: str
+    average_score: float
+    students_attempted: int
+    students_struggling: int  # средний балл ученика по теме ниже порога
+
+
+class AtRiskStudent(BaseModel):
+    """Ученик группы риска."""
+
+    student_id: int
+    full_name: str
+    average_score: float | None = None
+    accuracy: float | None = None  # доля правильных ответов, процент
+    attempts: int = 0
+    last_activity: datetime | None = None
+    reasons: list[str] = []
+
+
+class GroupAnalytics(BaseModel):
+    """Аналитика класса или организации."""
+
+    group_type: str  # class, organization
+    group_id: int
+    total_students: int = 0
+    active_students: int = 0  # есть завершённые попытки
+    total_attempts: int = 0
+    average_score: float = 0.0  # по всем оценённым попыткам
+    accuracy: float = 0.0  # процент правильных ответов
+    score_distribution: ScoreDistribution = ScoreDistribution()
+    weak_topics: list[GroupTopicStats] = []
+    at_risk_students: list[AtRiskStudent] = []
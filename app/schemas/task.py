@@ -5,7 +5,7 @@ from datetime import datetime
 
 from pydantic import BaseModel, Field
 
-from app.core.constants import DifficultyLevel, Subject, TaskStatus
+from app.core.constants import AttemptEventType, DifficultyLevel, Subject, TaskStatus
 
 # === TaskTemplate Schemas ===
 
@@ -107,6 +107,12 @@ class TaskCreate(TaskBase):
     generation_metadata: dict = {}
 
 
+class TaskBulkCreate(BaseModel):
+    """Схема массового создания заданий."""
+
+    tasks: list[TaskCreate] = Field(..., min_length=1, max_length=5000)
+
+
 class TaskUpdate(BaseModel):
     """Схема обновления задания."""
 
@@ -201,3 +207,25 @@ class TaskAttemptResponse(BaseModel):
     scaffolding_level_used: int | None = None
 
     model_config = {"from_attributes": True}
+
+
+# === AttemptEvent Schemas ===
+
+class AttemptEventCreate(BaseModel):
+    """Событие телеметрии попытки."""
+
+    type: AttemptEventType
+    occurred_at: datetime | None = None  # по умолчанию — время приёма
+    payload: dict = {}
+
+
+class AttemptEventBatch(BaseModel):
+    """Пачка событий телеметрии от клиента."""
+
+    events: list[AttemptEventCreate] = Field(..., min_length=1, max_length=500)
+
+
+class AttemptEventsAccepted(BaseModel):
+    """Ответ на приём событий: сколько поставлено в буфер."""
+
+    accepted: int
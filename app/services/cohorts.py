@@ -0,0 +1,217 @@
+"""
+Сравнение ученика с когортами: параллель, класс, группы ОВЗ.
+
+Для каждой когорты и метрики (балл, время, подсказки) хранится квантильный
+скетч средних значений учеников (app.core.sketch). Перцентиль ученика —
+доля учеников когорты, у которых среднее не выше его среднего, так что
+сравниваются величины одного рода.
+
+Скетчи пересобираются целиком по накопительной статистике тем
+(student_topic_stats) — в фоне (run_rebuild_loop) или командой
+app.cli.rebuild_cohort_sketches. Отправка попытки их не трогает: сравнение
+с когортой отстаёт не больше чем на интервал пересборки. Чтение — один
+запрос к нескольким строкам скетчей, без обхода учеников когорты.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+
+from sqlalchemy import Row, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.constants import CohortMetric
+from app.core.sketch import QuantileSketch
+from app.database import async_session_maker
+from app.models.progress import CohortSketch, StudentTopicStats
+from app.models.student import Student, StudentProfile
+from app.schemas.progress import CohortPosition
+
+logger = logging.getLogger(__name__)
+
+REBUILD_CHUNK_SIZE = 10000
+# Ключ advisory-блокировки: при нескольких воркерах пересобирает только один
+REBUILD_LOCK_KEY = 0x434F4852  # "COHR"
+
+
+def student_cohorts(
+    grade: int,
+    class_id: int | None,
+    disability_types: list[str] | None,
+) -> list[str]:
+    """Когорты ученика."""
+    cohorts = [f"grade:{grade}"]
+    if class_id is not None:
+        cohorts.append(f"class:{class_id}")
+    cohorts.extend(f"disability:{kind}" for kind in sorted(set(disability_types or [])))
+    return cohorts
+
+
+def _totals_columns():
+    """Суммы статистики тем ученика, из которых считаются средние."""
+    return (
+        func.coalesce(func.sum(StudentTopicStats.attempts_count), 0).label("attempts"),
+        func.coalesce(func.sum(StudentTopicStats.scored_count), 0).label("scored"),
+        func.coalesce(func.sum(StudentTopicStats.score_sum), 0).label("score"),
+        func.coalesce(func.sum(StudentTopicStats.timed_count), 0).label("timed"),
+        func.coalesce(func.sum(StudentTopicStats.time_sum), 0).label("time"),
+        func.coalesce(func.sum(StudentTopicStats.hints_sum), 0).label("hints"),
+    )
+
+
+def student_averages(totals: Row) -> dict[CohortMetric, float]:
+    """Средние ученика по метрикам (метрики без данных пропускаются)."""
+    averages = {}
+    if totals.scored:
+        averages[CohortMetric.SCORE] = float(totals.score) / totals.scored
+    if totals.timed:
+        averages[CohortMetric.TIME] = float(totals.time) / totals.timed
+    if totals.attempts:
+        averages[CohortMetric.HINTS] = float(totals.hints) / totals.attempts
+    return averages
+
+
+class CohortSketchService:
+    """Сервис скетчей когорт."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_cohorts(self, student_id: int) -> list[str]:
+        """Когорты ученика по параллели, классу и профилю (пусто — ученика нет)."""
+        result = await self.db.execute(
+            select(Student.grade, Student.class_id, StudentProfile.disability_types)
+            .outerjoin(StudentProfile, StudentProfile.student_id == Student.id)
+            .where(Student.id == student_id)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return []
+        return student_cohorts(row.grade, row.class_id, row.disability_types)
+
+    async def get_positions(self, student_id: int) -> list[CohortPosition]:
+        """Положение ученика во всех его когортах по всем метрикам."""
+        cohorts = await self.get_cohorts(student_id)
+        if not cohorts:
+            return []
+
+        totals_result = await self.db.execute(
+            select(*_totals_columns()).where(StudentTopicStats.student_id == student_id)
+        )
+        averages = student_averages(totals_result.one())
+        if not averages:
+            return []
+
+        sketches_result = await self.db.execute(
+            select(CohortSketch.cohort, CohortSketch.metric, CohortSketch.sketch).where(
+                CohortSketch.cohort.in_(cohorts),
+                CohortSketch.metric.in_(list(averages)),
+            )
+        )
+        sketches = {
+            (row.cohort, row.metric): QuantileSketch.from_dict(row.sketch)
+            for row in sketches_result.all()
+        }
+
+        positions = []
+        for cohort in cohorts:
+            for metric, value in averages.items():
+                sketch = sketches.get((cohort, metric))
+                if sketch is None or not sketch.count:
+                    continue
+                positions.append(CohortPosition(
+                    cohort=cohort,
+                    metric=metric,
+                    value=round(value, 2),
+                    percentile=round(sketch.rank(value) * 100, 1),
+                    cohort_median=sketch.quantile(0.5),
+                    cohort_students=sketch.count,
+                ))
+        return positions
+
+    async def rebuild(self) -> int | None:
+        """
+        Пересобрать все скетчи по средним учеников.
+
+        Суммы статистики тем группируются по ученику в БД и читаются
+        серверным курсором. Среднее ученика попадает в частичный скетч
+        своей пары (параллель, класс) и в скетчи групп ОВЗ; скетчи параллелей
+        и классов сливаются из частичных (QuantileSketch.merge). Результат
+        заменяет таблицу одной транзакцией под advisory-блокировкой.
+        Возвращает число учтённых учеников, None — пересборку уже
+        выполняет другой процесс.
+        """
+        if self.db.get_bind().dialect.name == "postgresql":
+            result = await self.db.execute(
+                select(func.pg_try_advisory_xact_lock(REBUILD_LOCK_KEY))
+            )
+            if not result.scalar():
+                await self.db.rollback()
+                return None
+
+        # Частичные скетчи по (параллель, класс) и готовые скетчи групп ОВЗ
+        units: dict[tuple[int, int | None, str], QuantileSketch] = defaultdict(QuantileSketch)
+        sketches: dict[tuple[str, str], QuantileSketch] = defaultdict(QuantileSketch)
+        processed = 0
+
+        totals = (
+            select(StudentTopicStats.student_id, *_totals_columns())
+            .group_by(StudentTopicStats.student_id)
+            .subquery()
+        )
+        result = await self.db.stream(
+            select(
+                totals,
+                Student.grade,
+                Student.class_id,
+                StudentProfile.disability_types,
+            )
+            .join(Student, Student.id == totals.c.student_id)
+            .outerjoin(StudentProfile, StudentProfile.student_id == Student.id)
+            .execution_options(yield_per=REBUILD_CHUNK_SIZE)
+        )
+        async for row in result:
+            averages = student_averages(row)
+            if not averages:
+                continue
+            disabilities = student_cohorts(row.grade, None, row.disability_types)[1:]
+            for metric, value in averages.items():
+                units[(row.grade, row.class_id, metric)].update(value)
+                for cohort in disabilities:
+                    sketches[(cohort, metric)].update(value)
+            processed += 1
+
+        for (grade, class_id, metric), unit in units.items():
+            sketches[(f"grade:{grade}", metric)].merge(unit)
+            if class_id is not None:
+                sketches[(f"class:{class_id}", metric)].merge(unit)
+
+        await self.db.execute(delete(CohortSketch))
+        if sketches:
+            await self.db.execute(
+                insert(CohortSketch),
+                [
+                    {"cohort": cohort, "metric": metric, "sketch": sketch.to_dict()}
+                    for (cohort, metric), sketch in sketches.items()
+                ],
+            )
+        await self.db.commit()
+        return processed
+
+
+async def run_rebuild_loop(interval: int) -> None:
+    """
+    Фоновая задача: пересобирать скетчи когорт каждые `interval` секунд.
+
+    Первая пересборка — через интервал после запуска, а не при каждом
+    деплое; первичное заполнение — app.cli.rebuild_cohort_sketches.
+    Из нескольких воркеров пересобирает тот, кто взял блокировку.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with async_session_maker() as session:
+                processed = await CohortSketchService(session).rebuild()
+            if processed is not None:
+                logger.debug("Скетчи когорт пересобраны: %s учеников", processed)
+        except Exception:
+            logger.exception("Ошибка пересборки скетчей когорт")
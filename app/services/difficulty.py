@@ -0,0 +1,120 @@
+"""
+Контроллер сложности: лестница (staircase) по предмету.
+
+После каждой оценённой попытки: SUCCESSES_TO_STEP_UP успехов подряд
+поднимают сложность на уровень, неудача опускает её на уровень
+(правило «2 вверх — 1 вниз» удерживает долю успехов около 70%).
+Упираясь в границу шкалы, лестница меняет скэффолдинг: на максимальной
+сложности снимает поддержку, на минимальной — добавляет.
+"""
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.constants import DifficultyLevel, ScaffoldingLevel, Subject
+from app.core.upsert import get_or_create_for_update
+from app.models.progress import StudentSubjectLevel, TaskAttempt
+from app.models.student import StudentProfile
+from app.services.stats import AttemptTask, load_attempt_task
+
+PASS_OUTCOME = 0.7  # результат попытки (0..1), засчитываемый как успех
+SUCCESSES_TO_STEP_UP = 2
+
+
+def step_staircase(level: StudentSubjectLevel, outcome: float) -> None:
+    """Сдвинуть уровень по результату попытки."""
+    if outcome >= PASS_OUTCOME:
+        level.success_streak += 1
+        if level.success_streak < SUCCESSES_TO_STEP_UP:
+            return
+        level.success_streak = 0
+        if level.difficulty < DifficultyLevel.VERY_HARD:
+            level.difficulty = DifficultyLevel(level.difficulty + 1)
+        elif level.scaffolding_level < ScaffoldingLevel.INDEPENDENT:
+            level.scaffolding_level = ScaffoldingLevel(level.scaffolding_level + 1)
+    else:
+        level.success_streak = 0
+        if level.difficulty > DifficultyLevel.VERY_EASY:
+            level.difficulty = DifficultyLevel(level.difficulty - 1)
+        elif level.scaffolding_level > ScaffoldingLevel.FULL_SUPPORT:
+            level.scaffolding_level = ScaffoldingLevel(level.scaffolding_level - 1)
+
+
+class DifficultyController:
+    """Сервис адаптации сложности по предметам."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_levels(self, student_id: int) -> dict[Subject, StudentSubjectLevel]:
+        """Получить уровни ученика по предметам."""
+        result = await self.db.execute(
+            select(StudentSubjectLevel).where(StudentSubjectLevel.student_id == student_id)
+        )
+        return {level.subject: level for level in result.scalars().all()}
+
+    async def get_level(self, student_id: int, subject: Subject) -> StudentSubjectLevel | None:
+        """Получить уровень ученика по предмету."""
+        result = await self.db.execute(
+            select(StudentSubjectLevel).where(
+                StudentSubjectLevel.student_id == student_id,
+                StudentSubjectLevel.subject == subject,
+            )
+        )
+        return result.scalar_one_or_none()
+
+    async def get_for_update(
+        self,
+        student_id: int,
+        subject: Subject,
+        profile: StudentProfile | None = None,
+    ) -> StudentSubjectLevel:
+        """
+        Получить уровень под блокировкой, создав его при необходимости.
+
+        Новый уровень начинается со сложности и скэффолдинга из профиля.
+        """
+        return await get_or_create_for_update(
+            self.db,
+            StudentSubjectLevel,
+            {"student_id": student_id, "subject": subject},
+            {
+                "difficulty": profile.current_difficulty if profile else DifficultyLevel.EASY,
+                "scaffolding_level": (
+                    profile.scaffolding_level if profile else ScaffoldingLevel.MEDIUM_SUPPORT
+                ),
+            },
+        )
+
+    async def apply(
+        self,
+        attempt: TaskAttempt,
+        outcome: float | None,
+        previous: float | None = None,
+        task: AttemptTask | None = None,
+    ) -> StudentSubjectLevel | None:
+        """
+        Сдвинуть уровень по первой оценке попытки.
+
+        Переоценка уже оценённой попытки лестницу не двигает. Профиль
+        ученика получает уровень последнего предмета, с которым он работал.
+        Не коммитит — вызывается в транзакции изменения попытки.
+        """
+        if outcome is None or previous is not None:
+            return None
+
+        task = task or await load_attempt_task(self.db, attempt.task_id)
+        subject = task.subject
+
+        profile_result = await self.db.execute(
+            select(StudentProfile).where(StudentProfile.student_id == attempt.student_id)
+        )
+        profile = profile_result.scalar_one_or_none()
+
+        level = await self.get_for_update(attempt.student_id, subject, profile)
+        step_staircase(level, outcome)
+
+        if profile:
+            profile.current_difficulty = level.difficulty
+            profile.scaffolding_level = level.scaffolding_level
+
+        return level
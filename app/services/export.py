@@ -0,0 +1,272 @@
+"""
+Потоковая выгрузка попыток и заданий для аналитиков.
+
+Строки читаются серверным курсором пачками по EXPORT_CHUNK_SIZE
+и сразу кодируются в CSV, NDJSON или Parquet, поэтому память не зависит
+от объёма выгрузки. Parquet требует pyarrow (необязательная зависимость,
+extra `export`).
+"""
+import csv
+import io
+import json
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, time, timedelta
+from enum import Enum
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.constants import ExportFormat
+from app.core.exceptions import BadRequestException
+from app.models.organization import Class
+from app.models.progress import TaskAttempt
+from app.models.student import Student
+from app.models.task import Task
+
+EXPORT_CHUNK_SIZE = 5000
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+}
+
+# Скалярные колонки выгрузки; JSON-поля (ответы, содержание) не выгружаются
+ATTEMPT_COLUMNS = (
+    TaskAttempt.id,
+    TaskAttempt.task_id,
+    TaskAttempt.student_id,
+    Task.subject,
+    Task.topic,
+    Task.difficulty,
+    TaskAttempt.started_at,
+    TaskAttempt.completed_at,
+    TaskAttempt.score,
+    TaskAttempt.is_correct,
+    TaskAttempt.hints_used,
+    TaskAttempt.time_spent,
+)
+TASK_COLUMNS = (
+    Task.id,
+    Task.student_id,
+    Task.title,
+    Task.subject,
+    Task.topic,
+    Task.difficulty,
+    Task.status,
+    Task.iep_goal_id,
+    Task.created_at,
+)
+
+
+@dataclass(frozen=True)
+class ExportFilters:
+    """Фильтры выгрузки; даты — дни UTC, включительно."""
+
+    student_id: int | None = None
+    class_id: int | None = None
+    organization_id: int | None = None
+    date_from: date | None = None
+    date_to: date | None = None
+
+
+def _plain(value):
+    """Значение для CSV/JSON: перечисления — их значения, даты — ISO."""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class CsvEncoder:
+    """CSV с заголовком."""
+
+    def __init__(self, columns: Sequence):
+        self.names = [column.name for column in columns]
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def start(self) -> bytes:
+        self._writer.writerow(self.names)
+        return self._drain()
+
+    def encode(self, rows: Sequence[tuple]) -> bytes:
+        self._writer.writerows([[_plain(value) for value in row] for row in rows])
+        return self._drain()
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class NdjsonEncoder:
+    """JSON-объект на строку."""
+
+    def __init__(self, columns: Sequence):
+        self.names = [column.name for column in columns]
+
+    def start(self) -> bytes:
+        return b""
+
+    def encode(self, rows: Sequence[tuple]) -> bytes:
+        return "".join(
+            json.dumps(
+                {name: _plain(value) for name, value in zip(self.names, row, strict=True)},
+                ensure_ascii=False,
+            )
+            + "\n"
+            for row in rows
+        ).encode()
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class _ChunkSink(io.RawIOBase):
+    """Файл для ParquetWriter, из которого записанное забирается кусками."""
+
+    def __init__(self):
+        super().__init__()
+        self._parts: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+class ParquetEncoder:
+    """Parquet: каждая пачка строк — отдельная группа строк файла."""
+
+    def __init__(self, columns: Sequence):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise BadRequestException("Выгрузка в Parquet недоступна: установите pyarrow") from e
+
+        self._pa = pa
+        self._pq = pq
+        self._schema = pa.schema([(column.name, self._arrow_type(column)) for column in columns])
+        self._sink = _ChunkSink()
+        self._writer = None
+
+    def _arrow_type(self, column):
+        pa = self._pa
+        if isinstance(column.type, Boolean):
+            return pa.bool_()
+        if isinstance(column.type, Integer):
+            return pa.int64()
+        if isinstance(column.type, Float):
+            return pa.float64()
+        if isinstance(column.type, DateTime):
+            return pa.timestamp("us", tz="UTC")
+        return pa.string()
+
+    def start(self) -> bytes:
+        self._writer = self._pq.ParquetWriter(self._sink, self._schema)
+        return self._sink.drain()
+
+    def encode(self, rows: Sequence[tuple]) -> bytes:
+        arrays = [
+            [value.value if isinstance(value, Enum) else value for value in column]
+            for column in zip(*rows, strict=True)
+        ]
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+ENCODERS = {
+    ExportFormat.CSV: CsvEncoder,
+    ExportFormat.NDJSON: NdjsonEncoder,
+    ExportFormat.PARQUET: ParquetEncoder,
+}
+
+
+def make_encoder(export_format: ExportFormat, query: Select):
+    """
+    Кодировщик выгрузки для колонок запроса.
+
+    Создаётся до начала ответа, чтобы отсутствие pyarrow дало ошибку 400,
+    а не оборванный поток.
+    """
+    return ENCODERS[export_format](list(query.selected_columns))
+
+
+class ExportService:
+    """Сервис выгрузки данных."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @staticmethod
+    def _filter(query: Select, filters: ExportFilters, student_column, date_column) -> Select:
+        """Применить фильтры выгрузки."""
+        if filters.student_id is not None:
+            query = query.where(student_column == filters.student_id)
+        if filters.class_id is not None or filters.organization_id is not None:
+            query = query.join(Student, Student.id == student_column)
+            if filters.class_id is not None:
+                query = query.where(Student.class_id == filters.class_id)
+            if filters.organization_id is not None:
+                query = query.join(Class, Class.id == Student.class_id).where(
+                    Class.organization_id == filters.organization_id
+                )
+        if filters.date_from is not None:
+            query = query.where(date_column >= datetime.combine(filters.date_from, time(), UTC))
+        if filters.date_to is not None:
+            query = query.where(
+                date_column < datetime.combine(filters.date_to + timedelta(days=1), time(), UTC)
+            )
+        return query
+
+    @classmethod
+    def attempts_query(cls, filters: ExportFilters) -> Select:
+        """Попытки в порядке id."""
+        query = select(*ATTEMPT_COLUMNS).join(Task, Task.id == TaskAttempt.task_id)
+        query = cls._filter(query, filters, TaskAttempt.student_id, TaskAttempt.started_at)
+        return query.order_by(TaskAttempt.id)
+
+    @classmethod
+    def tasks_query(cls, filters: ExportFilters) -> Select:
+        """Задания в порядке id."""
+        query = cls._filter(select(*TASK_COLUMNS), filters, Task.student_id, Task.created_at)
+        return query.order_by(Task.id)
+
+    async def stream(
+        self,
+        query: Select,
+        encoder,
+        chunk_size: int = EXPORT_CHUNK_SIZE,
+    ) -> AsyncIterator[bytes]:
+        """Выгрузить результат запроса кусками: по куску на пачку строк."""
+        yield encoder.start()
+
+        result = await self.db.stream(query.execution_options(yield_per=chunk_size))
+        async for partition in result.partitions():
+            yield encoder.encode([tuple(row) for row in partition])
+
+        yield encoder.finish()
@@ -16,6 +16,7 @@ from app.schemas.generation import (
     TaskAdaptations,
     TaskContent,
 )
+from app.services.difficulty import DifficultyController
 from app.services.generation.adapters import compute_adaptations
 from app.services.generation.llm_client import get_llm_client
 from app.services.generation.prompts import (
@@ -80,9 +81,19 @@ class TaskGenerator:
         """
         student, profile = await self._get_student_with_profile(student_id)
 
+        # Уровень по предмету ведёт контроллер сложности; до первой
+        # оценённой попытки по предмету действуют значения профиля
+        subject_level = await DifficultyController(self.db).get_level(student_id, subject)
+        current_difficulty = (
+            subject_level.difficulty if subject_level else profile.current_difficulty
+        )
+        scaffolding_level = (
+            subject_level.scaffolding_level if subject_level else profile.scaffolding_level
+        )
+
         # Определяем сложность автоматически, если не указана
         if difficulty is None:
-            difficulty = profile.current_difficulty
+            difficulty = DifficultyLevel(current_difficulty)
 
         # Собираем параметры для промпта
         disabilities = profile.disability_types or []
@@ -95,10 +106,10 @@ class TaskGenerator:
                 profile.learning_style, profile.learning_style
             ),
             current_difficulty=DIFFICULTY_NAMES.get(
-                profile.current_difficulty.value if profile.current_difficulty else 3, "Средний"
+                int(current_difficulty) if current_difficulty else 3, "Средний"
             ),
             scaffolding_level=SCAFFOLDING_NAMES.get(
-                profile.scaffolding_level.value if profile.scaffolding_level else 3, "Средняя поддержка"
+                int(scaffolding_level) if scaffolding_level else 3, "Средняя поддержка"
             ),
             subject=SUBJECT_NAMES.get(subject, subject),
             topic=topic,
@@ -119,7 +130,7 @@ class TaskGenerator:
         adaptations_result = compute_adaptations(
             disability_types=disabilities,
             learning_style=LearningStyle(profile.learning_style) if profile.learning_style else None,
-            scaffolding_level=ScaffoldingLevel(profile.scaffolding_level) if profile.scaffolding_level else None,
+            scaffolding_level=ScaffoldingLevel(scaffolding_level) if scaffolding_level else None,
             profile_settings={
                 "font_size": profile.font_size,
                 "line_height": profile.line_height,
@@ -162,7 +173,7 @@ class TaskGenerator:
                     "grade": student.grade,
                     "disabilities": disabilities,
                     "learning_style": profile.learning_style,
-                    "scaffolding_level": profile.scaffolding_level.value if profile.scaffolding_level else 3,
+                    "scaffolding_level": int(scaffolding_level) if scaffolding_level else 3,
                 },
                 "adaptations_applied": adaptations_result.to_dict(),
             },
@@ -0,0 +1,223 @@
+"""
+Автоматический расчёт прогресса целей ИОП.
+
+Метрика цели задаётся свободным текстом (`target_metric`, например
+«правильных ответов %») и распознаётся по ключевым словам. По попыткам
+связанных заданий (tasks.iep_goal_id) в строке цели копятся суммы,
+из которых current_value и статус пересчитываются за O(1). Цели
+с нераспознанной метрикой ведутся вручную (IEPService.update_goal_progress).
+
+Единица целей по времени хранится в target_unit: её передаёт педагог,
+иначе она один раз распознаётся по словам описания (parse_goal_unit).
+"""
+import re
+from collections.abc import Sequence
+
+from sqlalchemy import Float, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.constants import GoalMetric, GoalStatus, GoalUnit, TaskStatus
+from app.models.iep import IEPGoal
+from app.models.progress import TaskAttempt
+from app.models.task import Task
+from app.services.stats import AttemptContribution, AttemptTask, load_attempt_task
+
+# Ключевые слова метрик; проверяются по порядку
+_METRIC_KEYWORDS = [
+    (GoalMetric.PERCENT_CORRECT, ("правильн", "верн", "точност", "correct", "accuracy")),
+    (GoalMetric.AVERAGE_SCORE, ("балл", "оценк", "score")),
+    (GoalMetric.AVERAGE_TIME, ("врем", "секунд", "time")),
+    (GoalMetric.TASKS_COMPLETED, ("задани", "выполнен", "task", "completed")),
+]
+
+# Слова-единицы времени; сравниваются целыми словами
+_UNIT_WORDS = {
+    GoalUnit.MINUTES: {
+        "мин", "минута", "минуты", "минут", "минуту", "минутах", "min", "minute", "minutes",
+    },
+    GoalUnit.SECONDS: {
+        "сек", "секунда", "секунды", "секунд", "секунду", "секундах", "sec", "second", "seconds",
+    },
+}
+_WORD = re.compile(r"\w+")
+
+
+def parse_goal_metric(target_metric: str) -> GoalMetric | None:
+    """Распознать метрику цели по описанию."""
+    text = target_metric.lower()
+    for metric, keywords in _METRIC_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return metric
+    return None
+
+
+def parse_goal_unit(target_metric: str) -> GoalUnit | None:
+    """Распознать единицу времени по словам описания метрики."""
+    words = set(_WORD.findall(target_metric.lower()))
+    for unit, unit_words in _UNIT_WORDS.items():
+        if words & unit_words:
+            return unit
+    return None
+
+
+def goal_metric_value(goal: IEPGoal, metric: GoalMetric) -> float | None:
+    """Текущее значение метрики по суммам цели (None — данных ещё нет)."""
+    if metric == GoalMetric.TASKS_COMPLETED:
+        return float(goal.tasks_completed)
+    if metric == GoalMetric.PERCENT_CORRECT:
+        if not goal.attempts_count:
+            return None
+        return goal.correct_count / goal.attempts_count * 100
+    if metric == GoalMetric.AVERAGE_SCORE:
+        if not goal.scored_count:
+            return None
+        return goal.score_sum / goal.scored_count
+    if not goal.timed_count:
+        return None
+    seconds = goal.time_sum / goal.timed_count
+    return seconds / 60 if goal.target_unit == GoalUnit.MINUTES else seconds
+
+
+def refresh_goal_value(goal: IEPGoal) -> None:
+    """
+    Пересчитать current_value и статус цели по её суммам.
+
+    Для времени цель достигнута, когда среднее не выше целевого.
+    Статус «не достигнута» выставляет педагог при закрытии ИОП,
+    он не меняется.
+    """
+    metric = parse_goal_metric(goal.target_metric)
+    if metric is None:
+        return
+
+    value = goal_metric_value(goal, metric)
+    if value is not None:
+        goal.current_value = round(value, 2)
+    if goal.status == GoalStatus.NOT_ACHIEVED:
+        return
+
+    if metric == GoalMetric.AVERAGE_TIME:
+        achieved = value is not None and value <= goal.target_value
+    else:
+        achieved = value is not None and value >= goal.target_value
+
+    if achieved:
+        goal.status = GoalStatus.ACHIEVED
+    elif goal.attempts_count or goal.tasks_completed:
+        goal.status = GoalStatus.IN_PROGRESS
+    else:
+        goal.status = GoalStatus.NOT_STARTED
+
+
+class GoalMetricService:
+    """Сервис автоматического прогресса целей."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def apply(
+        self,
+        attempt: TaskAttempt,
+        previous: AttemptContribution | None = None,
+        task: AttemptTask | None = None,
+    ) -> IEPGoal | None:
+        """
+        Учесть изменение попытки в цели её задания.
+
+        Добавляет разницу вкладов, как TopicStatsService.apply. Не коммитит —
+        вызывается в транзакции изменения попытки.
+        """
+        current = AttemptContribution.of(attempt)
+        previous = previous or AttemptContribution()
+        if current == previous:
+            return None
+
+        task = task or await load_attempt_task(self.db, attempt.task_id)
+        goal_id = task.iep_goal_id
+        if goal_id is None:
+            return None
+
+        result = await self.db.execute(
+            select(IEPGoal)
+            .where(IEPGoal.id == goal_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        goal = result.scalar_one()
+
+        goal.attempts_count += current.attempts - previous.attempts
+        goal.correct_count += current.correct - previous.correct
+        goal.scored_count += current.scored - previous.scored
+        goal.score_sum += current.score - previous.score
+        goal.timed_count += current.timed - previous.timed
+        goal.time_sum += current.time - previous.time
+        if attempt.completed_at and (
+            goal.last_activity_at is None or attempt.completed_at > goal.last_activity_at
+        ):
+            goal.last_activity_at = attempt.completed_at
+
+        refresh_goal_value(goal)
+        return goal
+
+    async def recompute(self, goal_ids: Sequence[int | None] | None = None) -> int:
+        """
+        Пересчитать суммы целей по всем связанным заданиям и попыткам.
+
+        Вызывается при изменении самих заданий (статус, привязка к цели,
+        удаление) — это редкие действия педагога — и для первичного
+        заполнения (без `goal_ids` — все цели). Не коммитит. Возвращает
+        число пересчитанных целей.
+        """
+        goals_query = select(IEPGoal)
+        attempts_query = (
+            select(
+                Task.iep_goal_id,
+                func.count(TaskAttempt.id).label("attempts"),
+                func.count(TaskAttempt.id).filter(TaskAttempt.is_correct.is_(True)).label(
+                    "correct"
+                ),
+                func.count(TaskAttempt.score).label("scored"),
+                func.coalesce(cast(func.sum(TaskAttempt.score), Float), 0).label("score"),
+                func.count(TaskAttempt.time_spent).label("timed"),
+                func.coalesce(func.sum(TaskAttempt.time_spent), 0).label("time"),
+                func.max(TaskAttempt.completed_at).label("last_activity_at"),
+            )
+            .join(Task, Task.id == TaskAttempt.task_id)
+            .where(TaskAttempt.completed_at.isnot(None), Task.iep_goal_id.isnot(None))
+            .group_by(Task.iep_goal_id)
+        )
+        tasks_query = (
+            select(Task.iep_goal_id, func.count(Task.id).label("completed"))
+            .where(Task.status == TaskStatus.COMPLETED, Task.iep_goal_id.isnot(None))
+            .group_by(Task.iep_goal_id)
+        )
+
+        if goal_ids is not None:
+            goal_ids = {goal_id for goal_id in goal_ids if goal_id is not None}
+            if not goal_ids:
+                return 0
+            goals_query = goals_query.where(IEPGoal.id.in_(goal_ids))
+            attempts_query = attempts_query.where(Task.iep_goal_id.in_(goal_ids))
+            tasks_query = tasks_query.where(Task.iep_goal_id.in_(goal_ids))
+
+        # Изменения заданий в этой же транзакции
+        await self.db.flush()
+        attempts = {row.iep_goal_id: row for row in (await self.db.execute(attempts_query)).all()}
+        completed = {
+            row.iep_goal_id: row.completed for row in (await self.db.execute(tasks_query)).all()
+        }
+        goals = (await self.db.execute(goals_query)).scalars().all()
+
+        for goal in goals:
+            row = attempts.get(goal.id)
+            goal.attempts_count = row.attempts if row else 0
+            goal.correct_count = row.correct if row else 0
+            goal.scored_count = row.scored if row else 0
+            goal.score_sum = row.score if row else 0.0
+            goal.timed_count = row.timed if row else 0
+            goal.time_sum = row.time if row else 0
+            goal.last_activity_at = row.last_activity_at if row else None
+            goal.tasks_completed = completed.get(goal.id, 0)
+            refresh_goal_value(goal)
+
+        return len(goals)
@@ -0,0 +1,177 @@
+"""
+Автопроверка ответов на задания.
+
+Ответ ученика — значение ключа `answer` в answers попытки (если ключ
+один, берётся его значение). Балл 0..100 считается по content.correct_answer:
+
+- multiple_choice — совпадение выбора (текст варианта, буква или номер
+  варианта); при нескольких правильных — совпадение множества;
+- fill_blank — совпадение после нормализации (регистр, пробелы, ё, десятичная
+  запятая) с допуском опечаток в длинных словах; несколько пропусков
+  оцениваются по отдельности;
+- matching — доля верных пар;
+- ordering — доля элементов наибольшей подпоследовательности в верном порядке.
+
+Проверка — чистые функции без обращений к БД. Развёрнутые ответы
+и задания без правильного ответа не оцениваются (None): их оценивает педагог.
+"""
+import re
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from app.core.constants import TaskType
+
+_SPACES = re.compile(r"\s+")
+_NUMBER = re.compile(r"-?\d+(?:[.,]\d+)?")
+
+
+@dataclass(frozen=True)
+class Grade:
+    """Результат автопроверки."""
+
+    score: float  # 0..100
+    is_correct: bool
+
+
+def normalize_answer(value: Any) -> str:
+    """Привести ответ к сравнимому виду."""
+    text = _SPACES.sub(" ", str(value).strip().lower()).replace("ё", "е")
+    text = text.strip(" .!?;:")
+    if _NUMBER.fullmatch(text):
+        text = text.replace(",", ".")
+    return text
+
+
+def typo_tolerance(answer: str) -> int:
+    """Допустимое число опечаток: числа и короткие слова — без допуска."""
+    if _NUMBER.fullmatch(answer) or len(answer) < 5:
+        return 0
+    return 1 if len(answer) < 10 else 2
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Расстояние Левенштейна (больше `limit` — досрочно limit + 1)."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def blank_matches(answer: Any, expected: Any) -> bool:
+    """Совпадает ли ответ на пропуск с одним из допустимых."""
+    given = normalize_answer(answer)
+    options = expected if isinstance(expected, list) else [expected]
+    for option in options:
+        target = normalize_answer(option)
+        tolerance = typo_tolerance(target)
+        if edit_distance(given, target, tolerance) <= tolerance:
+            return True
+    return False
+
+
+def _choice(value: Any, options: Sequence) -> str:
+    """Выбранный вариант: буква (A, Б) или номер с 1 заменяются текстом варианта."""
+    text = normalize_answer(value)
+    normalized = [normalize_answer(option) for option in options]
+    if text in normalized or not options:
+        return text
+    if isinstance(value, int) and 1 <= value <= len(options):
+        return normalized[value - 1]
+    if len(text) == 1 and text.isalpha():
+        for alphabet in ("abcdefghijklmnopqrstuvwxyz", "абвгдежзиклмнопрстуфхцчшщэюя"):
+            index = alphabet.find(text)
+            if 0 <= index < len(options):
+                return normalized[index]
+    return text
+
+
+def _subsequence_length(given: list[str], expected: list[str]) -> int:
+    """Длина наибольшей общей подпоследовательности."""
+    lengths = [0] * (len(expected) + 1)
+    for item in given:
+        diagonal = 0
+        for j, target in enumerate(expected, 1):
+            above = lengths[j]
+            lengths[j] = diagonal + 1 if item == target else max(lengths[j], lengths[j - 1])
+            diagonal = above
+    return lengths[-1]
+
+
+def _share(matched: float, total: int) -> float:
+    return matched / total * 100 if total else 0.0
+
+
+def score_answer(content: dict, answer: Any) -> float | None:
+    """Балл 0..100 за ответ (None — задание не проверяется автоматически)."""
+    expected = content.get("correct_answer")
+    try:
+        task_type = TaskType(content.get("type"))
+    except ValueError:
+        return None
+    if expected in (None, "", [], {}) or task_type == TaskType.OPEN_ENDED:
+        return None
+    if answer is None:
+        return 0.0
+
+    if task_type == TaskType.MULTIPLE_CHOICE:
+        options = content.get("options") or []
+        given = answer if isinstance(answer, list) else [answer]
+        correct = expected if isinstance(expected, list) else [expected]
+        chosen = {_choice(value, options) for value in given}
+        return 100.0 if chosen == {_choice(value, options) for value in correct} else 0.0
+
+    if task_type == TaskType.FILL_BLANK:
+        if isinstance(answer, list) and isinstance(expected, list):
+            matched = sum(
+                blank_matches(given, target)
+                for given, target in zip(answer, expected, strict=False)
+            )
+            return _share(matched, len(expected))
+        return 100.0 if blank_matches(answer, expected) else 0.0
+
+    if task_type == TaskType.MATCHING:
+        if not isinstance(expected, dict) or not isinstance(answer, dict):
+            return 0.0
+        given = {normalize_answer(key): normalize_answer(value) for key, value in answer.items()}
+        matched = sum(
+            given.get(normalize_answer(key)) == normalize_answer(value)
+            for key, value in expected.items()
+        )
+        return _share(matched, len(expected))
+
+    # ORDERING
+    if not isinstance(expected, list) or not isinstance(answer, list):
+        return 0.0
+    matched = _subsequence_length(
+        [normalize_answer(item) for item in answer],
+        [normalize_answer(item) for item in expected],
+    )
+    return _share(matched, len(expected))
+
+
+def grade_attempt(content: dict, answers: dict) -> Grade | None:
+    """Оценить ответы попытки по содержанию задания."""
+    if "answer" in answers:
+        answer = answers["answer"]
+    elif len(answers) == 1:
+        [answer] = answers.values()
+    else:
+        answer = None
+
+    score = score_answer(content, answer)
+    if score is None:
+        return None
+    score = round(score, 2)
+    return Grade(score=score, is_correct=score == 100.0)
@@ -0,0 +1,248 @@
+"""
+Сервис аналитики по классам и организациям.
+"""
+from collections.abc import Sequence
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+from sqlalchemy import Row, Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import NotFoundException
+from app.models.organization import Class, Organization
+from app.models.progress import StudentTopicStats
+from app.models.student import Student
+from app.schemas.progress import (
+    AtRiskStudent,
+    GroupAnalytics,
+    GroupTopicStats,
+    ScoreDistribution,
+)
+
+WEAK_TOPIC_SCORE = 60  # средний балл темы, ниже которого тема считается трудной
+AT_RISK_SCORE = 50  # средний балл ученика, ниже которого он в группе риска
+AT_RISK_ACCURACY = 50  # процент правильных ответов
+INACTIVE_DAYS = 14  # дней без завершённых попыток
+SCORE_BINS = np.linspace(0, 100, 6)  # 0-20, 20-40, ..., 80-100
+
+
+def _full_name(student: Row) -> str:
+    parts = [student.last_name, student.first_name]
+    if student.middle_name:
+        parts.append(student.middle_name)
+    return " ".join(parts)
+
+
+def compute_group_analytics(
+    group_type: str,
+    group_id: int,
+    students: Sequence[Row],
+    topic_rows: Sequence[Row],
+    now: datetime,
+    weak_topics_limit: int = 10,
+    at_risk_limit: int = 50,
+) -> GroupAnalytics:
+    """
+    Посчитать аналитику группы по строкам student_topic_stats.
+
+    Все агрегаты по ученикам и темам считаются векторно: строки статистики
+    раскладываются в массивы и суммируются через np.bincount по индексам
+    ученика и темы.
+    """
+    n_students = len(students)
+    student_index = {student.id: i for i, student in enumerate(students)}
+
+    topic_index: dict[tuple[str, str], int] = {}
+    student_idx = np.fromiter(
+        (student_index[row.student_id] for row in topic_rows), dtype=np.int64, count=len(topic_rows)
+    )
+    topic_idx = np.fromiter(
+        (topic_index.setdefault((row.subject, row.topic), len(topic_index)) for row in topic_rows),
+        dtype=np.int64,
+        count=len(topic_rows),
+    )
+    values = np.array(
+        [
+            (row.attempts_count, row.correct_count, row.scored_count, row.score_sum)
+            for row in topic_rows
+        ],
+        dtype=np.float64,
+    ).reshape(-1, 4)
+    attempts, correct, scored, score_sum = values.T
+    last_activity = np.array(
+        [row.last_activity_at.timestamp() if row.last_activity_at else -np.inf for row in topic_rows],
+        dtype=np.float64,
+    )
+
+    # Агрегаты по ученикам
+    student_attempts = np.bincount(student_idx, weights=attempts, minlength=n_students)
+    student_correct = np.bincount(student_idx, weights=correct, minlength=n_students)
+    student_scored = np.bincount(student_idx, weights=scored, minlength=n_students)
+    student_score_sum = np.bincount(student_idx, weights=score_sum, minlength=n_students)
+    student_last = np.full(n_students, -np.inf)
+    np.maximum.at(student_last, student_idx, last_activity)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        student_avg = np.where(student_scored > 0, student_score_sum / student_scored, np.nan)
+        student_accuracy = np.where(
+            student_attempts > 0, student_correct / student_attempts * 100, np.nan
+        )
+        row_avg = np.where(scored > 0, score_sum / scored, np.nan)
+
+    # Распределение средних баллов
+    scored_students = student_avg[~np.isnan(student_avg)]
+    distribution = ScoreDistribution(
+        bins=[f"{int(lo)}-{int(hi)}" for lo, hi in zip(SCORE_BINS[:-1], SCORE_BINS[1:], strict=True)],
+        counts=np.histogram(scored_students, bins=SCORE_BINS)[0].tolist(),
+    )
+    if scored_students.size:
+        p25, median, p75 = np.percentile(scored_students, [25, 50, 75])
+        distribution.mean = round(float(scored_students.mean()), 2)
+        distribution.median = round(float(median), 2)
+        distribution.p25 = round(float(p25), 2)
+        distribution.p75 = round(float(p75), 2)
+
+    # Трудные темы
+    n_topics = len(topic_index)
+    topic_scored = np.bincount(topic_idx, weights=scored, minlength=n_topics)
+    topic_score_sum = np.bincount(topic_idx, weights=score_sum, minlength=n_topics)
+    topic_students = np.bincount(topic_idx, weights=attempts > 0, minlength=n_topics)
+    topic_struggling = np.bincount(
+        topic_idx, weights=np.nan_to_num(row_avg, nan=100) < WEAK_TOPIC_SCORE, minlength=n_topics
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        topic_avg = np.where(topic_scored > 0, topic_score_sum / topic_scored, np.nan)
+
+    topic_keys = list(topic_index)
+    weak = np.flatnonzero(np.nan_to_num(topic_avg, nan=100) < WEAK_TOPIC_SCORE)
+    weak = weak[np.argsort(topic_avg[weak], kind="stable")][:weak_topics_limit]
+    weak_topics = [
+        GroupTopicStats(
+            subject=topic_keys[i][0],
+            topic=topic_keys[i][1],
+            average_score=round(float(topic_avg[i]), 2),
+            students_attempted=int(topic_students[i]),
+            students_struggling=int(topic_struggling[i]),
+        )
+        for i in weak
+    ]
+
+    # Группа риска
+    inactive_since = (now - timedelta(days=INACTIVE_DAYS)).timestamp()
+    low_score = np.nan_to_num(student_avg, nan=100) < AT_RISK_SCORE
+    low_accuracy = np.nan_to_num(student_accuracy, nan=100) < AT_RISK_ACCURACY
+    inactive = student_last < inactive_since
+    at_risk = np.flatnonzero(low_score | low_accuracy | inactive)
+    at_risk = at_risk[np.argsort(np.nan_to_num(student_avg[at_risk], nan=np.inf), kind="stable")]
+
+    at_risk_students = []
+    for i in at_risk[:at_risk_limit]:
+        reasons = []
+        if low_score[i]:
+            reasons.append(f"Средний балл ниже {AT_RISK_SCORE}")
+        if low_accuracy[i]:
+            reasons.append(f"Правильных ответов меньше {AT_RISK_ACCURACY}%")
+        if inactive[i]:
+            reasons.append(
+                "Нет завершённых попыток"
+                if np.isneginf(student_last[i])
+                else f"Нет активности более {INACTIVE_DAYS} дней"
+            )
+        at_risk_students.append(AtRiskStudent(
+            student_id=students[i].id,
+            full_name=_full_name(students[i]),
+            average_score=None if np.isnan(student_avg[i]) else round(float(student_avg[i]), 2),
+            accuracy=None if np.isnan(student_accuracy[i]) else round(float(student_accuracy[i]), 2),
+            attempts=int(student_attempts[i]),
+            last_activity=(
+                None if np.isneginf(student_last[i])
+                else datetime.fromtimestamp(student_last[i], UTC)
+            ),
+            reasons=reasons,
+        ))
+
+    total_attempts = float(attempts.sum())
+    total_scored = float(scored.sum())
+
+    return GroupAnalytics(
+        group_type=group_type,
+        group_id=group_id,
+        total_students=n_students,
+        active_students=int(np.count_nonzero(student_attempts)),
+        total_attempts=int(total_attempts),
+        average_score=round(float(score_sum.sum()) / total_scored, 2) if total_scored else 0.0,
+        accuracy=round(float(correct.sum()) / total_attempts * 100, 2) if total_attempts else 0.0,
+        score_distribution=distribution,
+        weak_topics=weak_topics,
+        at_risk_students=at_risk_students,
+    )
+
+
+class GroupAnalyticsService:
+    """Сервис аналитики групп учеников."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_class_analytics(self, class_id: int) -> GroupAnalytics:
+        """Получить аналитику класса."""
+        if await self.db.get(Class, class_id) is None:
+            raise NotFoundException("Класс не найден")
+
+        students_query = self._students_query().where(Student.class_id == class_id)
+        return await self._analyze("class", class_id, students_query)
+
+    async def get_organization_analytics(self, organization_id: int) -> GroupAnalytics:
+        """Получить аналитику организации."""
+        if await self.db.get(Organization, organization_id) is None:
+            raise NotFoundException("Организация не найдена")
+
+        students_query = (
+            self._students_query()
+            .join(Class, Student.class_id == Class.id)
+            .where(Class.organization_id == organization_id)
+        )
+        return await self._analyze("organization", organization_id, students_query)
+
+    @staticmethod
+    def _students_query() -> Select:
+        return select(
+            Student.id,
+            Student.first_name,
+            Student.last_name,
+            Student.middle_name,
+        ).order_by(Student.id)
+
+    async def _analyze(
+        self,
+        group_type: str,
+        group_id: int,
+        students_query: Select,
+    ) -> GroupAnalytics:
+        """Загрузить учеников и их статистику по темам двумя запросами."""
+        students_result = await self.db.execute(students_query)
+        students = list(students_result.all())
+
+        stats_query = select(
+            StudentTopicStats.student_id,
+            StudentTopicStats.subject,
+            StudentTopicStats.topic,
+            StudentTopicStats.attempts_count,
+            StudentTopicStats.correct_count,
+            StudentTopicStats.scored_count,
+            StudentTopicStats.score_sum,
+            StudentTopicStats.last_activity_at,
+        ).where(
+            StudentTopicStats.student_id.in_(
+                students_query.with_only_columns(Student.id).order_by(None)
+            )
+        )
+        stats_result = await self.db.execute(stats_query)
+
+        return compute_group_analytics(
+            group_type,
+            group_id,
+            students,
+            list(stats_result.all()),
+            now=datetime.now(UTC),
+        )
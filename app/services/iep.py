@@ -5,9 +5,12 @@ from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.core.cache import get_progress_cache
 from app.core.exceptions import NotFoundException
+from app.core.pagination import page_items, paginate
 from app.models.iep import IEP, IEPGoal
 from app.schemas.iep import IEPCreate, IEPGoalCreate, IEPGoalUpdate, IEPUpdate
+from app.services.goals import parse_goal_unit, refresh_goal_value
 
 
 class IEPService:
@@ -30,24 +33,30 @@ class IEPService:
 
     async def get_all(
         self,
-        skip: int = 0,
+        cursor: str | None = None,
         limit: int = 100,
         student_id: int | None = None,
-    ) -> list[IEP]:
-        """Получить список ИОП."""
+    ) -> tuple[list[IEP], str | None]:
+        """Получить страницу ИОП (новые первыми) и курсор следующей."""
         query = select(IEP).options(selectinload(IEP.goals))
 
         if student_id:
             query = query.where(IEP.student_id == student_id)
 
-        query = query.offset(skip).limit(limit)
+        query = paginate(query, IEP.created_at, IEP.id, cursor, limit)
         result = await self.db.execute(query)
 
-        return list(result.scalars().all())
+        return page_items(result.scalars().all(), limit)
 
     async def get_by_student(self, student_id: int) -> list[IEP]:
         """Получить все ИОП ученика."""
-        return await self.get_all(student_id=student_id)
+        result = await self.db.execute(
+            select(IEP)
+            .options(selectinload(IEP.goals))
+            .where(IEP.student_id == student_id)
+            .order_by(IEP.created_at.desc(), IEP.id.desc())
+        )
+        return list(result.scalars().all())
 
     async def create(self, data: IEPCreate, created_by_id: int) -> IEP:
         """Создать ИОП с целями."""
@@ -73,11 +82,13 @@ class IEPService:
                 description=goal_data.description,
                 target_metric=goal_data.target_metric,
                 target_value=goal_data.target_value,
+                target_unit=goal_data.target_unit or parse_goal_unit(goal_data.target_metric),
                 order=goal_data.order,
             )
             self.db.add(goal)
 
         await self.db.commit()
+        get_progress_cache().invalidate(data.student_id)
 
         return await self.get_by_id(iep.id)
 
@@ -90,6 +101,7 @@ class IEPService:
             setattr(iep, field, value)
 
         await self.db.commit()
+        get_progress_cache().invalidate(iep.student_id)
         await self.db.refresh(iep)
 
         return iep
@@ -97,15 +109,17 @@ class IEPService:
     async def delete(self, iep_id: int) -> None:
         """Удалить ИОП."""
         iep = await self.get_by_id(iep_id)
+        student_id = iep.student_id
         await self.db.delete(iep)
         await self.db.commit()
+        get_progress_cache().invalidate(student_id)
 
     # Работа с целями
 
     async def add_goal(self, iep_id: int, data: IEPGoalCreate) -> IEPGoal:
         """Добавить цель в ИОП."""
         # Проверяем существование ИОП
-        await self.get_by_id(iep_id)
+        iep = await self.get_by_id(iep_id)
 
         goal = IEPGoal(
             iep_id=iep_id,
@@ -114,11 +128,13 @@ class IEPService:
             description=data.description,
             target_metric=data.target_metric,
             target_value=data.target_value,
+            target_unit=data.target_unit or parse_goal_unit(data.target_metric),
             order=data.order,
         )
 
         self.db.add(goal)
         await self.db.commit()
+        get_progress_cache().invalidate(iep.student_id)
         await self.db.refresh(goal)
 
         return goal
@@ -134,14 +150,24 @@ class IEPService:
         return goal
 
     async def update_goal(self, goal_id: int, data: IEPGoalUpdate) -> IEPGoal:
-        """Обновить цель."""
+        """
+        Обновить цель.
+
+        При смене метрики, целевого значения или единицы значение и статус
+        пересчитываются по накопленным суммам цели.
+        """
         goal = await self.get_goal(goal_id)
 
         update_data = data.model_dump(exclude_unset=True)
+        if "target_metric" in update_data and "target_unit" not in update_data:
+            update_data["target_unit"] = parse_goal_unit(update_data["target_metric"])
         for field, value in update_data.items():
             setattr(goal, field, value)
 
+        if update_data.keys() & {"target_metric", "target_value", "target_unit"}:
+            refresh_goal_value(goal)
         await self.db.commit()
+        await self._invalidate_goal_student(goal.iep_id)
         await self.db.refresh(goal)
 
         return goal
@@ -149,8 +175,10 @@ class IEPService:
     async def delete_goal(self, goal_id: int) -> None:
         """Удалить цель."""
         goal = await self.get_goal(goal_id)
+        iep_id = goal.iep_id
         await self.db.delete(goal)
         await self.db.commit()
+        await self._invalidate_goal_student(iep_id)
 
     async def update_goal_progress(
         self,
@@ -170,6 +198,12 @@ class IEPService:
             goal.status = GoalStatus.IN_PROGRESS
 
         await self.db.commit()
+        await self._invalidate_goal_student(goal.iep_id)
         await self.db.refresh(goal)
 
         return goal
+
+    async def _invalidate_goal_student(self, iep_id: int) -> None:
+        """Сбросить кэш прогресса ученика, которому принадлежит ИОП."""
+        result = await self.db.execute(select(IEP.student_id).where(IEP.id == iep_id))
+        get_progress_cache().invalidate(result.scalar_one_or_none())
@@ -0,0 +1,53 @@
+"""
+Обновление материализованных представлений аналитики.
+"""
+import asyncio
+import logging
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session_maker, engine
+from app.models.views import MATERIALIZED_VIEWS, create_materialized_views
+
+logger = logging.getLogger(__name__)
+
+# Ключ advisory-блокировки: при нескольких воркерах обновляет только один
+REFRESH_LOCK_KEY = 0x4D565246  # "MVRF"
+
+
+async def refresh_materialized_views(db: AsyncSession) -> bool:
+    """
+    Обновить все представления без блокировки чтения (CONCURRENTLY).
+
+    Возвращает False, если обновление уже выполняет другой процесс.
+    """
+    result = await db.execute(select(func.pg_try_advisory_xact_lock(REFRESH_LOCK_KEY)))
+    if not result.scalar():
+        await db.rollback()
+        return False
+
+    for view in MATERIALIZED_VIEWS:
+        await db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+
+    await db.commit()
+    return True
+
+
+async def run_refresh_loop(interval: int) -> None:
+    """Фоновая задача: создать представления и обновлять их каждые `interval` секунд."""
+    try:
+        async with engine.begin() as conn:
+            await create_materialized_views(conn)
+    except Exception:
+        logger.exception("Не удалось создать материализованные представления")
+        return
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with async_session_maker() as session:
+                if await refresh_materialized_views(session):
+                    logger.debug("Материализованные представления обновлены")
+        except Exception:
+            logger.exception("Ошибка обновления материализованных представлений")
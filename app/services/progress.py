@@ -2,67 +2,291 @@
 Сервис отслеживания прогресса и аналитики.
 """
 from collections import defaultdict
-from datetime import UTC, datetime, timedelta
+from collections.abc import Sequence
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
 
-from sqlalchemy import func, select
+from sqlalchemy import Float, Row, and_, cast, func, null, select, true
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.constants import DifficultyLevel, GoalStatus, Subject, TaskStatus
-from app.core.exceptions import NotFoundException
+from app.core.cache import cached_by_student
+from app.core.constants import (
+    DifficultyLevel,
+    GoalStatus,
+    ReadMode,
+    RecommendationStrategy,
+    StatsBucket,
+    Subject,
+    TaskStatus,
+)
+from app.core.exceptions import BadRequestException, NotFoundException
+from app.core.timezone import org_timezone
 from app.models.iep import IEP, IEPGoal
-from app.models.progress import TaskAttempt
+from app.models.organization import Class, Organization
+from app.models.progress import StudentTopicStats, TaskAttempt
+from app.models.student import Student
 from app.models.task import Task
+from app.models.views import (
+    goal_progress_view,
+    student_daily_stats_view,
+    student_topic_mastery_view,
+)
 from app.schemas.progress import (
     DailyStats,
     GoalProgress,
     IEPProgress,
     ProgressSummary,
+    RangeStats,
+    SkillLevel,
     StudentAnalytics,
     SubjectProgress,
     TaskRecommendation,
     WeeklyReport,
 )
+from app.services.cohorts import CohortSketchService
+from app.services.difficulty import DifficultyController
+from app.services.recommendations import RecommendationService
+from app.services.reports import WeeklyReportService
+from app.services.skills import difficulty_for_score, skill_level
+
+# Наибольшая длина периода в днях для каждого интервала (~370 интервалов)
+MAX_RANGE_DAYS = {
+    StatsBucket.DAY: 366,
+    StatsBucket.WEEK: 7 * 366,
+    StatsBucket.MONTH: 31 * 366,
+}
+
+
+def truncate_date(day: date, bucket: StatsBucket) -> date:
+    """Начало интервала, содержащего день (как date_trunc в PostgreSQL)."""
+    if bucket == StatsBucket.WEEK:
+        return day - timedelta(days=day.weekday())
+    if bucket == StatsBucket.MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def check_range(date_from: date, date_to: date, bucket: StatsBucket) -> None:
+    """Проверить период статистики: конец не раньше начала, длина не больше предела."""
+    if date_to < date_from:
+        raise BadRequestException("Дата окончания раньше даты начала")
+    days = (date_to - date_from).days + 1
+    if days > MAX_RANGE_DAYS[bucket]:
+        raise BadRequestException(
+            f"Период {days} дн. длиннее допустимого для интервала {bucket.value}: "
+            f"не более {MAX_RANGE_DAYS[bucket]} дн."
+        )
+
+
+def bucket_starts(date_from: date, date_to: date, bucket: StatsBucket) -> list[date]:
+    """Начала всех интервалов, пересекающих период [date_from, date_to]."""
+    check_range(date_from, date_to, bucket)
+    starts = []
+    current = truncate_date(date_from, bucket)
+    while current <= date_to:
+        starts.append(current)
+        if bucket == StatsBucket.WEEK:
+            current += timedelta(days=7)
+        elif bucket == StatsBucket.MONTH:
+            current = (current + timedelta(days=32)).replace(day=1)
+        else:
+            current += timedelta(days=1)
+    return starts
+
+
+def build_goal_progress(row: Row) -> GoalProgress:
+    """Прогресс цели из строки запроса прогресса целей."""
+    return GoalProgress(
+        goal_id=row.goal_id,
+        goal_description=row.description or row.title,
+        status=GoalStatus(row.status),
+        current_progress=row.current_value or 0,
+        target_value=row.target_value or 100,
+        tasks_completed=row.tasks_completed,
+        average_score=round(float(row.average_score or 0), 2),
+        last_activity=row.last_activity_at,
+        data_as_of=row.data_as_of,
+    )
+
+
+def build_weekly_report(
+    student_id: int,
+    start_date: date,
+    daily_stats: list[DailyStats],
+    data_as_of: datetime | None = None,
+) -> WeeklyReport:
+    """Собрать недельный отчёт по статистике семи дней."""
+    total_tasks = sum(s.tasks_completed for s in daily_stats)
+
+    avg_daily = total_tasks / 7
+
+    # Определяем тренд (сравниваем первую и вторую половину недели)
+    first_half = sum(s.tasks_completed for s in daily_stats[:4])
+    second_half = sum(s.tasks_completed for s in daily_stats[4:])
+
+    if second_half > first_half * 1.2:
+        trend = "improving"
+    elif second_half < first_half * 0.8:
+        trend = "declining"
+    else:
+        trend = "stable"
+
+    # Простые рекомендации
+    recommendations = []
+    if avg_daily < 2:
+        recommendations.append("Попробуй выполнять хотя бы 2-3 задания в день")
+    if trend == "declining":
+        recommendations.append("Не сдавайся! Попробуй начать с более простых заданий")
+    if trend == "improving":
+        recommendations.append("Отличный прогресс! Продолжай в том же духе!")
+
+    return WeeklyReport(
+        student_id=student_id,
+        week_start=start_date.isoformat(),
+        week_end=(start_date + timedelta(days=6)).isoformat(),
+        daily_stats=daily_stats,
+        total_tasks=total_tasks,
+        average_daily_tasks=round(avg_daily, 2),
+        improvement_trend=trend,
+        recommendations=recommendations,
+        data_as_of=data_as_of,
+    )
+
+
+def subject_skill_rating(topic_rows: Sequence[Row]) -> float | None:
+    """Навык по предмету — средний рейтинг тем, взвешенный числом обновлений."""
+    updates = sum(row.skill_updates for row in topic_rows)
+    if not updates:
+        return None
+    return sum(row.skill_rating * row.skill_updates for row in topic_rows) / updates
+
+
+def build_skill_levels(topic_rows: Sequence[Row]) -> list[SkillLevel]:
+    """Уровни навыков по темам с оценёнными попытками, от сильных к слабым."""
+    levels = []
+    for row in sorted(topic_rows, key=lambda r: r.skill_rating, reverse=True):
+        if not row.skill_updates:
+            continue
+        level, progress = skill_level(row.skill_rating)
+        levels.append(SkillLevel(
+            skill_name=row.topic,
+            subject=row.subject,
+            level=level,
+            progress_to_next=round(progress * 100, 2),
+            total_practice_time=row.time_sum // 60,
+        ))
+    return levels
+
+
+def build_subject_progress(
+    subject: Subject,
+    topic_rows: Sequence[Row],
+    current_difficulty: DifficultyLevel | None = None,
+) -> SubjectProgress:
+    """
+    Собрать прогресс по предмету из строк get_topic_stats.
+
+    Средний балл темы — среднее по оценённым попыткам, общий средний балл
+    взвешен количеством оценённых попыток темы. Сложность — уровень
+    контроллера сложности, если он уже есть, иначе оценка по навыку.
+    """
+    weak_topics = []
+    strong_topics = []
+    score_total = 0.0
+    scored_tasks = 0
+
+    for row in topic_rows:
+        if not row.scored_count:
+            continue
+        avg = float(row.avg_score)
+        if avg < 60:
+            weak_topics.append(row.topic)
+        elif avg >= 80:
+            strong_topics.append(row.topic)
+        score_total += avg * row.scored_count
+        scored_tasks += row.scored_count
+
+    overall_avg = score_total / scored_tasks if scored_tasks else 0
+
+    if current_difficulty is None:
+        rating = subject_skill_rating(topic_rows)
+        if rating is None:
+            current_difficulty = difficulty_for_score(overall_avg)
+        else:
+            current_difficulty, _ = skill_level(rating)
+
+    return SubjectProgress(
+        subject=subject,
+        total_tasks=sum(row.task_count for row in topic_rows),
+        completed_tasks=sum(row.completed_count for row in topic_rows),
+        average_score=round(overall_avg, 2),
+        current_difficulty=current_difficulty,
+        topics_covered=[row.topic for row in topic_rows],
+        weak_topics=weak_topics,
+        strong_topics=strong_topics,
+        data_as_of=min((row.refreshed_at for row in topic_rows if row.refreshed_at), default=None),
+    )
 
 
 class ProgressService:
-    """Сервис отслеживания прогресса."""
+    """
+    Сервис отслеживания прогресса.
 
-    def __init__(self, db: AsyncSession):
+    В режиме ReadMode.SNAPSHOT статистика по темам, по дням и по целям
+    читается из материализованных представлений, а ответ содержит
+    data_as_of — момент их последнего обновления.
+    """
+
+    def __init__(self, db: AsyncSession, read_mode: ReadMode = ReadMode.LIVE):
         self.db = db
+        self.read_mode = read_mode
 
+    @cached_by_student("summary")
     async def get_student_summary(self, student_id: int) -> ProgressSummary:
-        """Получить сводку прогресса ученика."""
-        # Общее количество заданий
-        total_query = select(func.count(Task.id)).where(Task.student_id == student_id)
-        total_result = await self.db.execute(total_query)
-        total_tasks = total_result.scalar() or 0
-
-        # Завершённые задания
-        completed_query = select(func.count(Task.id)).where(
-            Task.student_id == student_id,
-            Task.status == TaskStatus.COMPLETED,
+        """
+        Получить сводку прогресса ученика.
+
+        Все показатели считаются одним запросом: две CTE с агрегатами
+        по заданиям и по накопительной статистике тем, соединённые в одну строку.
+        """
+        task_stats = (
+            select(
+                func.count(Task.id).label("total_tasks"),
+                func.count(Task.id)
+                .filter(Task.status == TaskStatus.COMPLETED)
+                .label("completed_tasks"),
+            )
+            .where(Task.student_id == student_id)
+            .cte("task_stats")
         )
-        completed_result = await self.db.execute(completed_query)
-        completed_tasks = completed_result.scalar() or 0
-
-        # Статистика по попыткам
-        attempts_query = select(
-            func.count(TaskAttempt.id),
-            func.sum(func.cast(TaskAttempt.is_correct, int)),
-            func.avg(TaskAttempt.score),
-            func.avg(TaskAttempt.time_spent),
-            func.sum(TaskAttempt.hints_used),
-        ).where(
-            TaskAttempt.student_id == student_id,
-            TaskAttempt.completed_at.isnot(None),
+
+        attempt_stats = (
+            select(
+                func.sum(StudentTopicStats.correct_count).label("correct_answers"),
+                (
+                    func.sum(StudentTopicStats.score_sum)
+                    / func.nullif(func.sum(StudentTopicStats.scored_count), 0)
+                ).label("average_score"),
+                (
+                    cast(func.sum(StudentTopicStats.time_sum), Float)
+                    / func.nullif(func.sum(StudentTopicStats.timed_count), 0)
+                ).label("average_time"),
+                func.sum(StudentTopicStats.hints_sum).label("total_hints"),
+            )
+            .where(StudentTopicStats.student_id == student_id)
+            .cte("attempt_stats")
+        )
+
+        query = select(task_stats, attempt_stats).select_from(
+            task_stats.join(attempt_stats, true())
         )
-        attempts_result = await self.db.execute(attempts_query)
-        row = attempts_result.one()
+        result = await self.db.execute(query)
+        row = result.one()
 
-        correct_answers = row[1] or 0
-        average_score = float(row[2] or 0)
-        average_time = float(row[3] or 0)
-        total_hints = row[4] or 0
+        total_tasks = row.total_tasks or 0
+        completed_tasks = row.completed_tasks or 0
+        average_score = float(row.average_score or 0)
+        average_time = float(row.average_time or 0)
 
         completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
 
@@ -70,91 +294,116 @@ class ProgressService:
             student_id=student_id,
             total_tasks=total_tasks,
             completed_tasks=completed_tasks,
-            correct_answers=correct_answers,
+            correct_answers=row.correct_answers or 0,
             average_score=round(average_score, 2),
             average_time_spent=round(average_time, 2),
-            total_hints_used=total_hints,
+            total_hints_used=row.total_hints or 0,
             completion_rate=round(completion_rate, 2),
         )
 
+    async def get_topic_stats(
+        self,
+        student_id: int,
+        subject: Subject | None = None,
+    ) -> list[Row]:
+        """
+        Статистика по темам одним запросом.
+
+        Строка на (subject, topic): task_count и completed_count по заданиям,
+        avg_score, scored_count (оценённых попыток), time_sum, skill_rating
+        и skill_updates из student_topic_stats, refreshed_at — момент обновления снимка (None для актуальных данных).
+        Загружаются только нужные колонки, без JSONB-контента заданий.
+        """
+        if self.read_mode == ReadMode.SNAPSHOT:
+            return await self._get_topic_stats_snapshot(student_id, subject)
+
+        task_counts = (
+            select(
+                Task.subject,
+                Task.topic,
+                func.count(Task.id).label("task_count"),
+                func.count(Task.id)
+                .filter(Task.status == TaskStatus.COMPLETED)
+                .label("completed_count"),
+            )
+            .where(Task.student_id == student_id)
+            .group_by(Task.subject, Task.topic)
+        )
+        if subject:
+            task_counts = task_counts.where(Task.subject == subject)
+        task_counts = task_counts.subquery("task_counts")
+
+        query = (
+            select(
+                task_counts.c.subject,
+                task_counts.c.topic,
+                task_counts.c.task_count,
+                task_counts.c.completed_count,
+                (
+                    StudentTopicStats.score_sum
+                    / func.nullif(StudentTopicStats.scored_count, 0)
+                ).label("avg_score"),
+                func.coalesce(StudentTopicStats.scored_count, 0).label("scored_count"),
+                func.coalesce(StudentTopicStats.time_sum, 0).label("time_sum"),
+                func.coalesce(StudentTopicStats.skill_rating, 0.0).label("skill_rating"),
+                func.coalesce(StudentTopicStats.skill_updates, 0).label("skill_updates"),
+                null().label("refreshed_at"),
+            )
+            .outerjoin(
+                StudentTopicStats,
+                and_(
+                    StudentTopicStats.student_id == student_id,
+                    StudentTopicStats.subject == task_counts.c.subject,
+                    StudentTopicStats.topic == task_counts.c.topic,
+                ),
+            )
+            .order_by(task_counts.c.subject, task_counts.c.topic)
+        )
+
+        result = await self.db.execute(query)
+        return list(result.all())
+
+    async def _get_topic_stats_snapshot(
+        self,
+        student_id: int,
+        subject: Subject | None = None,
+    ) -> list[Row]:
+        """Статистика по темам из представления mv_student_topic_mastery."""
+        view = student_topic_mastery_view
+        query = (
+            select(
+                view.c.subject,
+                view.c.topic,
+                view.c.task_count,
+                view.c.completed_count,
+                view.c.avg_score,
+                view.c.scored_count,
+                view.c.time_sum,
+                view.c.skill_rating,
+                view.c.skill_updates,
+                view.c.refreshed_at,
+            )
+            .where(view.c.student_id == student_id)
+            .order_by(view.c.subject, view.c.topic)
+        )
+        if subject:
+            query = query.where(view.c.subject == subject)
+
+        result = await self.db.execute(query)
+        return list(result.all())
+
+    @cached_by_student("subject")
     async def get_subject_progress(
         self,
         student_id: int,
         subject: Subject,
     ) -> SubjectProgress:
         """Получить прогресс по предмету."""
-        # Задания по предмету
-        tasks_query = select(Task).where(
-            Task.student_id == student_id,
-            Task.subject == subject,
-        )
-        tasks_result = await self.db.execute(tasks_query)
-        tasks = list(tasks_result.scalars().all())
-
-        total = len(tasks)
-        completed = sum(1 for t in tasks if t.status == TaskStatus.COMPLETED)
-
-        # Темы
-        topics = list({t.topic for t in tasks})
-
-        # Статистика по попыткам
-        task_ids = [t.id for t in tasks]
-        if task_ids:
-            attempts_query = select(
-                TaskAttempt.task_id,
-                func.avg(TaskAttempt.score),
-            ).where(
-                TaskAttempt.task_id.in_(task_ids),
-                TaskAttempt.completed_at.isnot(None),
-            ).group_by(TaskAttempt.task_id)
-            attempts_result = await self.db.execute(attempts_query)
-            scores_by_task = dict(attempts_result.all())
-
-            # Определяем сильные и слабые темы
-            topic_scores: dict[str, list[float]] = defaultdict(list)
-            for task in tasks:
-                if task.id in scores_by_task and scores_by_task[task.id]:
-                    topic_scores[task.topic].append(float(scores_by_task[task.id]))
-
-            weak_topics = []
-            strong_topics = []
-            for topic, scores in topic_scores.items():
-                avg = sum(scores) / len(scores)
-                if avg < 60:
-                    weak_topics.append(topic)
-                elif avg >= 80:
-                    strong_topics.append(topic)
-
-            overall_avg = sum(
-                s for scores in topic_scores.values() for s in scores
-            ) / max(1, sum(len(s) for s in topic_scores.values()))
-        else:
-            weak_topics = []
-            strong_topics = []
-            overall_avg = 0
-
-        # Определяем текущую сложность
-        current_difficulty = DifficultyLevel.MEDIUM
-        if overall_avg >= 85:
-            current_difficulty = DifficultyLevel.HARD
-        elif overall_avg >= 70:
-            current_difficulty = DifficultyLevel.MEDIUM
-        elif overall_avg >= 50:
-            current_difficulty = DifficultyLevel.EASY
-        else:
-            current_difficulty = DifficultyLevel.VERY_EASY
-
-        return SubjectProgress(
-            subject=subject,
-            total_tasks=total,
-            completed_tasks=completed,
-            average_score=round(overall_avg, 2),
-            current_difficulty=current_difficulty,
-            topics_covered=topics,
-            weak_topics=weak_topics,
-            strong_topics=strong_topics,
-        )
+        topic_rows = await self.get_topic_stats(student_id, subject)
+        level = await DifficultyController(self.db).get_level(student_id, subject)
+        return build_subject_progress(subject, topic_rows, level.difficulty if level else None)
 
+    @cached_by_student("iep")
     async def get_iep_progress(self, student_id: int) -> IEPProgress | None:
         """Получить прогресс по ИОП."""
         # Находим активную ИОП
@@ -190,164 +439,365 @@ class ProgressService:
             overall_progress=round(overall, 2),
         )
 
+    def _goal_progress_query(self):
+        """
+        Запрос прогресса целей одной строкой на цель.
+
+        Живой режим читает суммы из iep_goals (их ведёт GoalMetricService),
+        снимок присоединяет материализованное представление.
+        """
+        columns = [
+            IEPGoal.id.label("goal_id"),
+            IEPGoal.title,
+            IEPGoal.description,
+            IEPGoal.status,
+            IEPGoal.current_value,
+            IEPGoal.target_value,
+        ]
+
+        if self.read_mode == ReadMode.SNAPSHOT:
+            view = goal_progress_view
+            return select(
+                *columns,
+                func.coalesce(view.c.tasks_completed, 0).label("tasks_completed"),
+                view.c.average_score,
+                view.c.last_activity_at,
+                view.c.refreshed_at.label("data_as_of"),
+            ).outerjoin(view, view.c.goal_id == IEPGoal.id)
+
+        return select(
+            *columns,
+            IEPGoal.tasks_completed,
+            (IEPGoal.score_sum / func.nullif(IEPGoal.scored_count, 0)).label("average_score"),
+            IEPGoal.last_activity_at,
+            null().label("data_as_of"),
+        )
+
     async def get_goal_progress(self, goal_id: int) -> GoalProgress:
         """Получить прогресс по цели ИОП."""
-        goal_query = select(IEPGoal).where(IEPGoal.id == goal_id)
-        goal_result = await self.db.execute(goal_query)
-        goal = goal_result.scalar_one_or_none()
+        result = await self.db.execute(
+            self._goal_progress_query().where(IEPGoal.id == goal_id)
+        )
+        row = result.one_or_none()
 
-        if not goal:
+        if not row:
             raise NotFoundException("Цель не найдена")
 
-        # Задания, связанные с целью
-        tasks_query = select(Task).where(Task.iep_goal_id == goal_id)
-        tasks_result = await self.db.execute(tasks_query)
-        tasks = list(tasks_result.scalars().all())
-
-        completed = sum(1 for t in tasks if t.status == TaskStatus.COMPLETED)
-
-        # Средний балл по попыткам
-        task_ids = [t.id for t in tasks]
-        avg_score = 0.0
-        last_activity = None
-
-        if task_ids:
-            attempts_query = select(
-                func.avg(TaskAttempt.score),
-                func.max(TaskAttempt.completed_at),
-            ).where(
-                TaskAttempt.task_id.in_(task_ids),
-                TaskAttempt.completed_at.isnot(None),
+        return build_goal_progress(row)
+
+    async def get_iep_goals_progress(self, iep_id: int) -> list[GoalProgress]:
+        """Получить прогресс по всем целям ИОП одним запросом."""
+        result = await self.db.execute(
+            self._goal_progress_query()
+            .where(IEPGoal.iep_id == iep_id)
+            .order_by(IEPGoal.order, IEPGoal.id)
+        )
+        rows = result.all()
+
+        # Пустой список — либо ИОП без целей, либо ИОП нет
+        if not rows and await self.db.get(IEP, iep_id) is None:
+            raise NotFoundException("ИОП не найдена")
+
+        return [build_goal_progress(row) for row in rows]
+
+    async def get_timezone(self, student_id: int) -> str:
+        """Часовой пояс организации ученика (settings.timezone) или пояс по умолчанию."""
+        query = (
+            select(Organization.settings)
+            .select_from(Student)
+            .join(Class, Student.class_id == Class.id)
+            .join(Organization, Class.organization_id == Organization.id)
+            .where(Student.id == student_id)
+        )
+        result = await self.db.execute(query)
+        return org_timezone(result.scalar_one_or_none())
+
+    @cached_by_student("range")
+    async def get_range_stats(
+        self,
+        student_id: int,
+        date_from: date,
+        date_to: date,
+        bucket: StatsBucket = StatsBucket.DAY,
+    ) -> RangeStats:
+        """Получить статистику за период (через кэш процесса, см. compute_range_stats)."""
+        return await self.compute_range_stats(student_id, date_from, date_to, bucket)
+
+    async def compute_range_stats(
+        self,
+        student_id: int,
+        date_from: date,
+        date_to: date,
+        bucket: StatsBucket = StatsBucket.DAY,
+    ) -> RangeStats:
+        """
+        Посчитать статистику за период, сгруппированную по интервалам, без кэша.
+
+        Попытки группируются одним запросом через date_trunc в часовом поясе
+        организации (в режиме снимка — суммируются дни из mv_student_daily_stats),
+        пустые интервалы дозаполняются нулями. Длина периода ограничена
+        MAX_RANGE_DAYS для выбранного интервала.
+        """
+        check_range(date_from, date_to, bucket)
+        tz_name = await self.get_timezone(student_id)
+
+        if self.read_mode == ReadMode.SNAPSHOT:
+            totals, data_as_of = await self._get_range_totals_snapshot(
+                student_id, date_from, date_to, bucket
+            )
+        else:
+            totals = await self._get_range_totals(student_id, date_from, date_to, bucket, tz_name)
+            data_as_of = None
+
+        stats = [
+            totals.get(start) or DailyStats(date=start.isoformat())
+            for start in bucket_starts(date_from, date_to, bucket)
+        ]
+
+        return RangeStats(
+            student_id=student_id,
+            date_from=date_from.isoformat(),
+            date_to=date_to.isoformat(),
+            bucket=bucket,
+            timezone=tz_name,
+            stats=stats,
+            data_as_of=data_as_of,
+        )
+
+    async def _get_range_totals(
+        self,
+        student_id: int,
+        date_from: date,
+        date_to: date,
+        bucket: StatsBucket,
+        tz_name: str,
+    ) -> dict[date, DailyStats]:
+        """Статистика по непустым интервалам из task_attempts."""
+        tz = ZoneInfo(tz_name)
+
+        # Границы периода — полночь по местному времени
+        period_start = datetime.combine(date_from, time.min, tzinfo=tz)
+        period_end = datetime.combine(date_to + timedelta(days=1), time.min, tzinfo=tz)
+
+        # Интервал вычисляется один раз в подзапросе, чтобы GROUP BY
+        # ссылался на колонку, а не повторял выражение с параметрами
+        attempts = (
+            select(
+                func.date_trunc(
+                    bucket.value, func.timezone(tz_name, TaskAttempt.started_at)
+                ).label("bucket_start"),
+                TaskAttempt.id,
+                TaskAttempt.completed_at,
+                TaskAttempt.is_correct,
+                TaskAttempt.time_spent,
+                TaskAttempt.hints_used,
+            )
+            .where(
+                TaskAttempt.student_id == student_id,
+                TaskAttempt.started_at >= period_start,
+                TaskAttempt.started_at < period_end,
             )
-            attempts_result = await self.db.execute(attempts_query)
-            row = attempts_result.one()
-            avg_score = float(row[0] or 0)
-            last_activity = row[1]
-
-        return GoalProgress(
-            goal_id=goal.id,
-            goal_description=goal.description,
-            status=GoalStatus(goal.status),
-            current_progress=goal.current_progress or 0,
-            target_value=goal.target_value or 100,
-            tasks_completed=completed,
-            average_score=round(avg_score, 2),
-            last_activity=last_activity,
+            .subquery("attempts")
         )
 
+        query = (
+            select(
+                attempts.c.bucket_start,
+                func.count(attempts.c.id).label("attempted"),
+                func.count(attempts.c.id)
+                .filter(attempts.c.completed_at.isnot(None))
+                .label("completed"),
+                func.count(attempts.c.id)
+                .filter(attempts.c.is_correct.is_(True))
+                .label("correct"),
+                func.sum(attempts.c.time_spent).label("time_spent"),
+                func.sum(attempts.c.hints_used).label("hints_used"),
+            )
+            .group_by(attempts.c.bucket_start)
+        )
+        result = await self.db.execute(query)
+
+        totals = {}
+        for row in result.all():
+            start = row.bucket_start.date()
+            totals[start] = DailyStats(
+                date=start.isoformat(),
+                tasks_attempted=row.attempted,
+                tasks_completed=row.completed,
+                correct_answers=row.correct,
+                time_spent=row.time_spent or 0,
+                hints_used=row.hints_used or 0,
+            )
+        return totals
+
+    async def _get_range_totals_snapshot(
+        self,
+        student_id: int,
+        date_from: date,
+        date_to: date,
+        bucket: StatsBucket,
+    ) -> tuple[dict[date, DailyStats], datetime | None]:
+        """Статистика по непустым интервалам из mv_student_daily_stats."""
+        view = student_daily_stats_view
+        result = await self.db.execute(
+            select(view).where(
+                view.c.student_id == student_id,
+                view.c.day >= date_from,
+                view.c.day <= date_to,
+            )
+        )
+
+        totals: dict[date, DailyStats] = {}
+        data_as_of = None
+        for row in result.all():
+            start = truncate_date(row.day, bucket)
+            stats = totals.setdefault(start, DailyStats(date=start.isoformat()))
+            stats.tasks_attempted += row.tasks_attempted
+            stats.tasks_completed += row.tasks_completed
+            stats.correct_answers += row.correct_answers
+            stats.time_spent += row.time_spent
+            stats.hints_used += row.hints_used
+            data_as_of = row.refreshed_at
+
+        return totals, data_as_of
+
     async def get_daily_stats(
         self,
         student_id: int,
         date: str,  # YYYY-MM-DD
     ) -> DailyStats:
         """Получить статистику за день."""
-        from datetime import date as date_type
-
-        target_date = date_type.fromisoformat(date)
-        next_date = target_date + timedelta(days=1)
-
-        # Попытки за день
-        attempts_query = select(
-            func.count(TaskAttempt.id),
-            func.sum(func.cast(TaskAttempt.completed_at.isnot(None), int)),
-            func.sum(func.cast(TaskAttempt.is_correct, int)),
-            func.sum(TaskAttempt.time_spent),
-            func.sum(TaskAttempt.hints_used),
-        ).where(
-            TaskAttempt.student_id == student_id,
-            TaskAttempt.started_at >= datetime.combine(target_date, datetime.min.time()),
-            TaskAttempt.started_at < datetime.combine(next_date, datetime.min.time()),
-        )
-        result = await self.db.execute(attempts_query)
-        row = result.one()
-
-        return DailyStats(
-            date=date,
-            tasks_attempted=row[0] or 0,
-            tasks_completed=row[1] or 0,
-            correct_answers=row[2] or 0,
-            time_spent=row[3] or 0,
-            hints_used=row[4] or 0,
-        )
+        target_date = datetime.fromisoformat(date).date()
+        range_stats = await self.get_range_stats(student_id, target_date, target_date)
+        return range_stats.stats[0]
 
+    @cached_by_student("weekly")
     async def get_weekly_report(
         self,
         student_id: int,
         week_start: str | None = None,
     ) -> WeeklyReport:
-        """Получить недельный отчёт."""
+        """
+        Получить недельный отчёт.
+
+        Отчёт за завершившуюся неделю сохраняется в weekly_reports
+        и дальше читается оттуда без обращения к task_attempts.
+        """
+        today = await self._get_local_today(student_id)
         if week_start:
-            from datetime import date as date_type
-            start_date = date_type.fromisoformat(week_start)
+            start_date = date.fromisoformat(week_start)
         else:
             # Текущая неделя
-            today = datetime.now(UTC).date()
             start_date = today - timedelta(days=today.weekday())
 
         end_date = start_date + timedelta(days=6)
+        closed = end_date < today and self.read_mode == ReadMode.LIVE
+
+        reports = WeeklyReportService(self.db)
+        if closed:
+            stored = await reports.get_many(student_id, [start_date])
+            if start_date in stored:
+                return stored[start_date]
+
+        # Статистика по дням — один сгруппированный запрос. Сохраняемый отчёт
+        # считается мимо кэша: сброс в другом воркере этот кэш не видит
+        if closed:
+            range_stats = await self.compute_range_stats(student_id, start_date, end_date)
+        else:
+            range_stats = await self.get_range_stats(student_id, start_date, end_date)
+        report = build_weekly_report(
+            student_id, start_date, range_stats.stats, range_stats.data_as_of
+        )
 
-        # Собираем статистику по дням
-        daily_stats = []
-        total_tasks = 0
-
-        for i in range(7):
-            day = start_date + timedelta(days=i)
-            stats = await self.get_daily_stats(student_id, day.isoformat())
-            daily_stats.append(stats)
-            total_tasks += stats.tasks_completed
-
-        avg_daily = total_tasks / 7
+        if closed:
+            await reports.save_many([report])
 
-        # Определяем тренд (сравниваем первую и вторую половину недели)
-        first_half = sum(s.tasks_completed for s in daily_stats[:4])
-        second_half = sum(s.tasks_completed for s in daily_stats[4:])
+        return report
 
-        if second_half > first_half * 1.2:
-            trend = "improving"
-        elif second_half < first_half * 0.8:
-            trend = "declining"
-        else:
-            trend = "stable"
-
-        # Простые рекомендации
-        recommendations = []
-        if avg_daily < 2:
-            recommendations.append("Попробуй выполнять хотя бы 2-3 задания в день")
-        if trend == "declining":
-            recommendations.append("Не сдавайся! Попробуй начать с более простых заданий")
-        if trend == "improving":
-            recommendations.append("Отличный прогресс! Продолжай в том же духе!")
-
-        return WeeklyReport(
-            student_id=student_id,
-            week_start=start_date.isoformat(),
-            week_end=end_date.isoformat(),
-            daily_stats=daily_stats,
-            total_tasks=total_tasks,
-            average_daily_tasks=round(avg_daily, 2),
-            improvement_trend=trend,
-            recommendations=recommendations,
-        )
+    async def get_weekly_history(
+        self,
+        student_id: int,
+        before: date | None = None,
+        limit: int = 12,
+    ) -> list[WeeklyReport]:
+        """
+        Получить отчёты за завершившиеся недели, от новых к старым.
+
+        Страница — `limit` недель, начинающихся раньше недели с датой
+        `before` (по умолчанию — раньше текущей недели). Сохранённые отчёты
+        читаются одним запросом, недостающие считаются одним запросом
+        статистики за весь их период и сохраняются.
+        """
+        today = await self._get_local_today(student_id)
+        current_week = today - timedelta(days=today.weekday())
+        if before is not None:
+            current_week = min(current_week, before - timedelta(days=before.weekday()))
+
+        week_starts = [current_week - timedelta(weeks=i + 1) for i in range(limit)]
+
+        reports = WeeklyReportService(self.db)
+        stored = await reports.get_many(student_id, week_starts)
+        missing = [start for start in week_starts if start not in stored]
+
+        if missing:
+            # Отчёты сохраняются навсегда — статистика читается из БД, мимо кэша
+            range_stats = await self.compute_range_stats(
+                student_id, min(missing), max(missing) + timedelta(days=6)
+            )
+            days = {stats.date: stats for stats in range_stats.stats}
+            computed = [
+                build_weekly_report(
+                    student_id,
+                    start,
+                    [
+                        days[(start + timedelta(days=i)).isoformat()]
+                        for i in range(7)
+                    ],
+                )
+                for start in missing
+            ]
+            await reports.save_many(computed)
+            stored.update((date.fromisoformat(r.week_start), r) for r in computed)
+
+        return [stored[start] for start in week_starts]
+
+    async def _get_local_today(self, student_id: int) -> date:
+        """Сегодняшняя дата в часовом поясе организации ученика."""
+        tz_name = await self.get_timezone(student_id)
+        return datetime.now(ZoneInfo(tz_name)).date()
 
 
 class AnalyticsService:
     """Сервис аналитики."""
 
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, read_mode: ReadMode = ReadMode.LIVE):
         self.db = db
-        self.progress_service = ProgressService(db)
+        self.read_mode = read_mode
+        self.progress_service = ProgressService(db, read_mode)
 
+    @cached_by_student("analytics")
     async def get_full_analytics(self, student_id: int) -> StudentAnalytics:
         """Получить полную аналитику ученика."""
         # Базовая сводка
         summary = await self.progress_service.get_student_summary(student_id)
 
-        # Прогресс по предметам
-        subjects_progress = []
-        for subject in Subject:
-            progress = await self.progress_service.get_subject_progress(student_id, subject)
-            if progress.total_tasks > 0:
-                subjects_progress.append(progress)
+        # Прогресс по предметам — один сгруппированный запрос по всем темам
+        topic_rows = await self.progress_service.get_topic_stats(student_id)
+        rows_by_subject: dict[str, list[Row]] = defaultdict(list)
+        for row in topic_rows:
+            rows_by_subject[row.subject].append(row)
+
+        levels = await DifficultyController(self.db).get_levels(student_id)
+
+        subjects_progress = [
+            build_subject_progress(
+                subject,
+                rows_by_subject[subject],
+                levels[subject].difficulty if subject in levels else None,
+            )
+            for subject in Subject
+            if rows_by_subject.get(subject)
+        ]
 
         # Прогресс по ИОП
         iep_progress = await self.progress_service.get_iep_progress(student_id)
@@ -382,11 +832,15 @@ class AnalyticsService:
             progress_summary=summary,
             subjects_progress=subjects_progress,
             iep_progress=iep_progress,
-            skill_levels=[],  # TODO: реализовать систему навыков
+            skill_levels=build_skill_levels(topic_rows),
+            cohort_positions=await CohortSketchService(self.db).get_positions(student_id),
             strengths=strengths[:5],
             areas_for_improvement=areas_for_improvement[:5],
             recommended_topics=recommended_topics[:5],
             scaffolding_recommendation=scaffolding_rec,
+            data_as_of=min(
+                (sp.data_as_of for sp in subjects_progress if sp.data_as_of), default=None
+            ),
         )
 
 
@@ -395,49 +849,32 @@ class RecommendationEngine:
 
     def __init__(self, db: AsyncSession):
         self.db = db
-        self.progress_service = ProgressService(db)
 
     async def get_recommendations(
         self,
         student_id: int,
         subject: Subject | None = None,
         limit: int = 5,
+        strategy: RecommendationStrategy = RecommendationStrategy.RULES,
+    ) -> list[TaskRecommendation]:
+        """
+        Получить рекомендации по заданиям.
+
+        Правила читают заранее посчитанный список кандидатов ученика одним
+        запросом, фильтр по предмету и limit применяются в памяти.
+        Бандит сэмплирует темы заново при каждом запросе, поэтому
+        не кэшируется.
+        """
+        if strategy == RecommendationStrategy.BANDIT:
+            return await RecommendationService(self.db).sample(student_id, subject, limit)
+        return await self._get_rule_recommendations(student_id, subject, limit)
+
+    @cached_by_student("recommendations")
+    async def _get_rule_recommendations(
+        self,
+        student_id: int,
+        subject: Subject | None,
+        limit: int,
     ) -> list[TaskRecommendation]:
-        """Получить рекомендации по заданиям."""
-        recommendations = []
-
-        # Определяем предметы для рекомендаций
-        subjects = [subject] if subject else list(Subject)
-
-        for subj in subjects:
-            progress = await self.progress_service.get_subject_progress(student_id, subj)
-
-            # Приоритет слабым темам
-            for i, topic in enumerate(progress.weak_topics[:2]):
-                recommendations.append(TaskRecommendation(
-                    topic=topic,
-                    subject=subj,
-                    difficulty=DifficultyLevel.EASY,  # Начинаем с простого
-                    reason=f"Требуется дополнительная практика по теме '{topic}'",
-                    priority=10 - i,
-                    estimated_time=10,
-                ))
-
-            # Если есть завершённые задания - предлагаем следующий уровень
-            if progress.completed_tasks > 0 and progress.average_score >= 70:
-                for topic in progress.strong_topics[:1]:
-                    next_diff = DifficultyLevel(min(
-                        progress.current_difficulty.value + 1, 5
-                    ))
-                    recommendations.append(TaskRecommendation(
-                        topic=topic,
-                        subject=subj,
-                        difficulty=next_diff,
-                        reason=f"Готов к более сложным заданиям по теме '{topic}'",
-                        priority=5,
-                        estimated_time=15,
-                    ))
-
-        # Сортируем по приоритету и ограничиваем
-        recommendations.sort(key=lambda x: x.priority, reverse=True)
-        return recommendations[:limit]
+        """Рекомендации по правилам из таблицы кандидатов."""
+        return await RecommendationService(self.db).get(student_id, subject, limit)
@@ -0,0 +1,248 @@
+"""
+Сервис заранее посчитанных рекомендаций.
+"""
+from collections import defaultdict
+from collections.abc import Sequence
+
+import numpy as np
+from sqlalchemy import Row, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.constants import DifficultyLevel, Subject
+from app.models.progress import RecommendationCandidate, StudentTopicStats
+from app.schemas.progress import TaskRecommendation
+from app.services.skills import (
+    TARGET_SUCCESS,
+    difficulty_for_score,
+    expected_success,
+    skill_level,
+)
+
+
+def build_recommendations(topic_rows: Sequence[Row]) -> list[TaskRecommendation]:
+    """
+    Кандидаты в рекомендации по статистике тем.
+
+    Слабые темы (на среднем уровне ученик решает меньше половины заданий)
+    идут первыми, начиная с самой слабой; сложность — уровень, на котором
+    ожидается TARGET_SUCCESS правильных. Лучшая освоенная тема предмета
+    предлагается на этом же уровне как следующая ступень. Темы без
+    модели навыка оцениваются по среднему баллу.
+    """
+    rows_by_subject: dict[str, list[Row]] = defaultdict(list)
+    for row in topic_rows:
+        if row.skill_updates or row.scored_count:
+            rows_by_subject[row.subject].append(row)
+
+    recommendations = []
+    for subject, rows in rows_by_subject.items():
+        weak = []
+        strong = []
+        for row in rows:
+            if row.skill_updates:
+                success = expected_success(row.skill_rating, DifficultyLevel.MEDIUM)
+                difficulty, _ = skill_level(row.skill_rating)
+                strength = row.skill_rating
+            else:
+                success = float(row.avg_score) / 100
+                difficulty = difficulty_for_score(float(row.avg_score))
+                strength = success - 0.5
+            if success < 0.5:
+                weak.append((strength, row.topic, difficulty))
+            elif success >= TARGET_SUCCESS:
+                strong.append((strength, row.topic, difficulty))
+
+        # Приоритет слабым темам
+        for i, (_, topic, difficulty) in enumerate(sorted(weak)[:2]):
+            recommendations.append(TaskRecommendation(
+                topic=topic,
+                subject=subject,
+                difficulty=difficulty,
+                reason=f"Требуется дополнительная практика по теме '{topic}'",
+                priority=10 - i,
+                estimated_time=10,
+            ))
+
+        # Освоенная тема — следующий уровень
+        for _, topic, difficulty in sorted(strong, reverse=True)[:1]:
+            recommendations.append(TaskRecommendation(
+                topic=topic,
+                subject=subject,
+                difficulty=difficulty,
+                reason=f"Готов к более сложным заданиям по теме '{topic}'",
+                priority=5,
+                estimated_time=15,
+            ))
+
+    return recommendations
+
+
+def sample_recommendations(
+    topic_rows: Sequence[Row],
+    rng: np.random.Generator,
+    limit: int,
+) -> list[TaskRecommendation]:
+    """
+    Выбрать темы сэмплированием Томпсона.
+
+    Тема — рука бандита, награда — прирост навыка попытки (learning_gain).
+    Для каждой темы берётся выборка из Beta(1 + успехи, 1 + неудачи),
+    темы ранжируются по выборке: мало практикованные темы с широким
+    распределением периодически поднимаются наверх, а темы, в которых
+    ученик растёт, предлагаются чаще. Сложность — как у правил.
+    """
+    if not topic_rows:
+        return []
+
+    samples = rng.beta(
+        1 + np.array([row.gain_successes for row in topic_rows], dtype=np.float64),
+        1 + np.array([row.gain_failures for row in topic_rows], dtype=np.float64),
+    )
+
+    recommendations = []
+    for index in np.argsort(-samples, kind="stable")[:limit]:
+        row = topic_rows[index]
+        if row.skill_updates:
+            difficulty, _ = skill_level(row.skill_rating)
+        elif row.scored_count:
+            difficulty = difficulty_for_score(float(row.avg_score))
+        else:
+            difficulty = DifficultyLevel.EASY
+
+        recommendations.append(TaskRecommendation(
+            topic=row.topic,
+            subject=row.subject,
+            difficulty=difficulty,
+            reason=f"Ожидается прирост навыка по теме '{row.topic}'",
+            priority=min(max(round(float(samples[index]) * 10), 1), 10),
+            estimated_time=10,
+        ))
+
+    return recommendations
+
+
+class RecommendationService:
+    """Сервис списка рекомендаций ученика."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get(
+        self,
+        student_id: int,
+        subject: Subject | None = None,
+        limit: int = 5,
+    ) -> list[TaskRecommendation]:
+        """Получить рекомендации по убыванию приоритета."""
+        result = await self.db.execute(
+            select(
+                RecommendationCandidate.subject,
+                RecommendationCandidate.topic,
+                RecommendationCandidate.difficulty,
+                RecommendationCandidate.reason,
+                RecommendationCandidate.priority,
+                RecommendationCandidate.estimated_time,
+            )
+            .where(RecommendationCandidate.student_id == student_id)
+            .order_by(RecommendationCandidate.priority.desc(), RecommendationCandidate.rank)
+        )
+
+        recommendations = [
+            TaskRecommendation.model_validate(row._asdict())
+            for row in result.all()
+            if subject is None or row.subject == subject
+        ]
+        return recommendations[:limit]
+
+    async def sample(
+        self,
+        student_id: int,
+        subject: Subject | None = None,
+        limit: int = 5,
+        rng: np.random.Generator | None = None,
+    ) -> list[TaskRecommendation]:
+        """
+        Получить рекомендации стратегией бандита.
+
+        Читает только строки статистики тем ученика (O(тем)), историю
+        попыток не трогает. Каждый вызов сэмплирует заново.
+        """
+        query = select(
+            StudentTopicStats.subject,
+            StudentTopicStats.topic,
+            (StudentTopicStats.score_sum / func.nullif(StudentTopicStats.scored_count, 0)).label(
+                "avg_score"
+            ),
+            StudentTopicStats.scored_count,
+            StudentTopicStats.skill_rating,
+            StudentTopicStats.skill_updates,
+            StudentTopicStats.gain_successes,
+            StudentTopicStats.gain_failures,
+        ).where(StudentTopicStats.student_id == student_id)
+
+        if subject:
+            query = query.where(StudentTopicStats.subject == subject)
+
+        result = await self.db.execute(
+            query.order_by(StudentTopicStats.subject, StudentTopicStats.topic)
+        )
+        return sample_recommendations(result.all(), rng or np.random.default_rng(), limit)
+
+    async def refresh(self, student_id: int, subject: Subject | None = None) -> None:
+        """
+        Пересчитать кандидатов ученика по статистике тем.
+
+        С `subject` пересчитывается только этот предмет (так делает оценка
+        попытки). Не коммитит — вызывается в транзакции изменения попытки.
+        """
+        stats_query = select(
+            StudentTopicStats.subject,
+            StudentTopicStats.topic,
+            (StudentTopicStats.score_sum / func.nullif(StudentTopicStats.scored_count, 0)).label(
+                "avg_score"
+            ),
+            StudentTopicStats.scored_count,
+            StudentTopicStats.skill_rating,
+            StudentTopicStats.skill_updates,
+        ).where(StudentTopicStats.student_id == student_id)
+        delete_query = delete(RecommendationCandidate).where(
+            RecommendationCandidate.student_id == student_id
+        )
+
+        if subject:
+            stats_query = stats_query.where(StudentTopicStats.subject == subject)
+            delete_query = delete_query.where(RecommendationCandidate.subject == subject)
+
+        # Статистика темы могла измениться в этой же транзакции
+        await self.db.flush()
+        stats_result = await self.db.execute(
+            stats_query.order_by(StudentTopicStats.subject, StudentTopicStats.topic)
+        )
+        candidates = build_recommendations(stats_result.all())
+
+        await self.db.execute(delete_query)
+        if candidates:
+            await self.db.execute(
+                insert(RecommendationCandidate),
+                [
+                    {"student_id": student_id, "rank": rank, **candidate.model_dump()}
+                    for rank, candidate in enumerate(candidates)
+                ],
+            )
+
+    async def rebuild(self, student_ids: Sequence[int] | None = None) -> int:
+        """
+        Пересчитать кандидатов всех учеников со статистикой (или указанных).
+
+        Пакетный пересчёт после изменения правил рекомендаций или бэкфилла
+        навыков. Коммитит после каждого ученика. Возвращает число учеников.
+        """
+        if student_ids is None:
+            result = await self.db.execute(select(StudentTopicStats.student_id).distinct())
+            student_ids = list(result.scalars().all())
+
+        for student_id in student_ids:
+            await self.refresh(student_id)
+            await self.db.commit()
+
+        return len(student_ids)
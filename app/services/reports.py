@@ -0,0 +1,94 @@
+"""
+Сервис сохранённых недельных отчётов.
+"""
+from collections.abc import Sequence
+from datetime import UTC, date, datetime, timedelta
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.progress import WeeklyReportSnapshot
+from app.schemas.progress import WeeklyReport
+
+
+class WeeklyReportService:
+    """Сервис отчётов за завершившиеся недели."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_many(
+        self,
+        student_id: int,
+        week_starts: Sequence[date],
+    ) -> dict[date, WeeklyReport]:
+        """Получить сохранённые отчёты по началам недель."""
+        if not week_starts:
+            return {}
+
+        result = await self.db.execute(
+            select(WeeklyReportSnapshot.week_start, WeeklyReportSnapshot.report).where(
+                WeeklyReportSnapshot.student_id == student_id,
+                WeeklyReportSnapshot.week_start.in_(week_starts),
+            )
+        )
+        return {
+            row.week_start: WeeklyReport.model_validate(row.report) for row in result.all()
+        }
+
+    async def save_many(self, reports: Sequence[WeeklyReport]) -> None:
+        """
+        Сохранить отчёты.
+
+        Уже сохранённые отчёты не перезаписываются: при одновременном
+        расчёте одной недели побеждает первый. Не коммитит — транзакцией
+        владеет вызывающий код (эндпоинт отчётов).
+        """
+        if not reports:
+            return
+
+        await self.db.execute(
+            pg_insert(WeeklyReportSnapshot)
+            .values([
+                {
+                    "student_id": report.student_id,
+                    "week_start": date.fromisoformat(report.week_start),
+                    "week_end": date.fromisoformat(report.week_end),
+                    "report": report.model_dump(mode="json"),
+                }
+                for report in reports
+            ])
+            .on_conflict_do_nothing(index_elements=["student_id", "week_start"])
+        )
+
+    async def invalidate(
+        self,
+        student_id: int,
+        moment: datetime | None = None,
+    ) -> None:
+        """
+        Удалить отчёты, которые могли измениться.
+
+        С `moment` — только недели, содержащие этот момент (с запасом
+        в день на часовой пояс организации), без него — все недели ученика.
+        Сохраняются только завершившиеся недели, поэтому момент текущей
+        недели запроса к БД не требует. Не коммитит — вызывается
+        в транзакции изменения попыток.
+        """
+        query = delete(WeeklyReportSnapshot).where(WeeklyReportSnapshot.student_id == student_id)
+
+        if moment is not None:
+            day = moment.date()
+            earliest = day - timedelta(days=1)
+            week_end = earliest + timedelta(days=6 - earliest.weekday())
+            # Неделя закрыта, когда её конец раньше местного «сегодня»,
+            # а оно не позже завтрашнего дня по UTC ни в одном поясе
+            if week_end >= datetime.now(UTC).date() + timedelta(days=1):
+                return
+            query = query.where(
+                WeeklyReportSnapshot.week_start <= day + timedelta(days=1),
+                WeeklyReportSnapshot.week_end >= day - timedelta(days=1),
+            )
+
+        await self.db.execute(query)
@@ -0,0 +1,134 @@
+"""
+Интервальное повторение тем (SM-2).
+
+Каждая оценённая попытка по теме — повторение с качеством 0..5
+(результат попытки × 5). Успешное повторение (качество ≥ 3) удлиняет
+интервал: 1 день, 6 дней, затем интервал × лёгкость темы; неудача
+сбрасывает серию к интервалу в 1 день. Лёгкость снижается при трудных
+повторениях. Попытки раньше срока интервал не удлиняют — ученик просто
+занимается темой, — но неудача сбрасывает серию и в этом случае.
+"""
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import NotFoundException
+from app.core.timezone import org_timezone
+from app.core.upsert import get_or_create_for_update
+from app.models.organization import Class, Organization
+from app.models.progress import ReviewSchedule, StudentTopicStats
+from app.models.student import Student
+from app.schemas.progress import DueReview
+
+INITIAL_EASINESS = 2.5
+MIN_EASINESS = 1.3
+PASS_QUALITY = 3  # минимальное качество успешного повторения
+
+
+def review_quality(outcome: float) -> int:
+    """Качество повторения по SM-2 (0..5) из результата попытки (0..1)."""
+    return round(min(max(outcome, 0.0), 1.0) * 5)
+
+
+def schedule_review(item: ReviewSchedule, quality: int, reviewed_at: datetime) -> None:
+    """Учесть повторение и сдвинуть срок следующего."""
+    early = item.last_reviewed_at is not None and reviewed_at < item.due_at
+    item.last_reviewed_at = reviewed_at
+
+    if quality < PASS_QUALITY:
+        item.repetitions = 0
+        item.interval_days = 1
+    elif early:
+        return
+    else:
+        item.repetitions += 1
+        if item.repetitions == 1:
+            item.interval_days = 1
+        elif item.repetitions == 2:
+            item.interval_days = 6
+        else:
+            item.interval_days = round(item.interval_days * item.easiness)
+
+    miss = 5 - quality
+    item.easiness = max(item.easiness + 0.1 - miss * (0.08 + miss * 0.02), MIN_EASINESS)
+    item.due_at = reviewed_at + timedelta(days=item.interval_days)
+
+
+class ReviewScheduler:
+    """Сервис расписания повторений."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_for_update(self, stats: StudentTopicStats, now: datetime) -> ReviewSchedule:
+        """Получить расписание темы под блокировкой, создав его при необходимости."""
+        return await get_or_create_for_update(
+            self.db,
+            ReviewSchedule,
+            {"student_id": stats.student_id, "subject": stats.subject, "topic": stats.topic},
+            {"easiness": INITIAL_EASINESS, "due_at": now},
+        )
+
+    async def apply(
+        self,
+        stats: StudentTopicStats,
+        outcome: float | None,
+        previous: float | None,
+        reviewed_at: datetime | None,
+    ) -> ReviewSchedule | None:
+        """
+        Учесть первую оценку попытки по теме.
+
+        Переоценка расписание не сдвигает. Не коммитит — вызывается
+        в транзакции изменения попытки.
+        """
+        if outcome is None or previous is not None or reviewed_at is None:
+            return None
+
+        item = await self.get_for_update(stats, reviewed_at)
+        schedule_review(item, review_quality(outcome), reviewed_at)
+        return item
+
+    async def get_due(
+        self,
+        student_id: int,
+        until: datetime,
+        limit: int = 20,
+    ) -> list[DueReview]:
+        """Темы ученика со сроком до `until`, начиная с самой просроченной."""
+        result = await self.db.execute(
+            select(ReviewSchedule)
+            .where(ReviewSchedule.student_id == student_id, ReviewSchedule.due_at <= until)
+            .order_by(ReviewSchedule.due_at)
+            .limit(limit)
+        )
+        return [DueReview.model_validate(item, from_attributes=True) for item in result.scalars()]
+
+    async def get_class_due_today(self, class_id: int, now: datetime) -> list[DueReview]:
+        """
+        Темы учеников класса со сроком до конца сегодняшнего дня.
+
+        День считается в часовом поясе организации класса. Порядок —
+        по ученику, внутри ученика — по сроку.
+        """
+        result = await self.db.execute(
+            select(Class.id, Organization.settings)
+            .join(Organization, Class.organization_id == Organization.id)
+            .where(Class.id == class_id)
+        )
+        row = result.one_or_none()
+        if row is None:
+            raise NotFoundException("Класс не найден")
+
+        tz = ZoneInfo(org_timezone(row.settings))
+        day_end = datetime.combine(now.astimezone(tz).date() + timedelta(days=1), time(), tz)
+
+        items = await self.db.execute(
+            select(ReviewSchedule)
+            .join(Student, Student.id == ReviewSchedule.student_id)
+            .where(Student.class_id == class_id, ReviewSchedule.due_at < day_end)
+            .order_by(ReviewSchedule.student_id, ReviewSchedule.due_at)
+        )
+        return [DueReview.model_validate(item, from_attributes=True) for item in items.scalars()]
@@ -0,0 +1,135 @@
+"""
+Модель навыка ученика по теме (рейтинг Эло).
+
+Навык — число на логит-шкале: вероятность успеха на задании уровня
+`level` равна σ(rating − difficulty_logit(level)). После каждой
+оценённой попытки рейтинг сдвигается на K · (результат − ожидание),
+где K уменьшается с числом обновлений: первые попытки двигают оценку
+сильно, дальше она стабилизируется. Обновление O(1), в строке
+student_topic_stats хранятся только рейтинг и число обновлений.
+"""
+import math
+
+import numpy as np
+
+from app.core.constants import DifficultyLevel
+from app.models.progress import TaskAttempt
+
+DIFFICULTY_STEP = 0.8  # разница сложности соседних уровней, логиты
+TARGET_SUCCESS = 0.7  # вероятность успеха на рекомендуемом уровне
+SKILL_K_BASE = 0.4  # шаг обновления для первой попытки
+SKILL_K_DECAY = 0.05  # затухание шага с каждым обновлением
+
+_TARGET_MARGIN = math.log(TARGET_SUCCESS / (1 - TARGET_SUCCESS))
+
+
+def difficulty_logit(level: DifficultyLevel | int) -> float:
+    """Сложность уровня на шкале рейтинга (средний уровень — 0)."""
+    return (int(level) - DifficultyLevel.MEDIUM) * DIFFICULTY_STEP
+
+
+def expected_success(rating: float, level: DifficultyLevel | int) -> float:
+    """Ожидаемая вероятность успеха на задании уровня `level`."""
+    return 1 / (1 + math.exp(difficulty_logit(level) - rating))
+
+
+def skill_k(updates: int) -> float:
+    """Шаг обновления после `updates` учтённых попыток."""
+    return SKILL_K_BASE / (1 + SKILL_K_DECAY * max(updates, 0))
+
+
+def update_rating(
+    rating: float,
+    updates: int,
+    level: DifficultyLevel | int,
+    outcome: float,
+) -> float:
+    """Новый рейтинг после попытки с результатом `outcome` (0..1)."""
+    return rating + skill_k(updates) * (outcome - expected_success(rating, level))
+
+
+def learning_gain(outcome: float, expected: float) -> float:
+    """
+    Прирост навыка от попытки как доля успеха (0..1).
+
+    Результат выше ожидаемого поднимает рейтинг, ниже — опускает;
+    0.5 означает попытку без сдвига. Это награда бандита рекомендаций.
+    """
+    return (outcome - expected + 1) / 2
+
+
+def attempt_outcome(attempt: TaskAttempt) -> float | None:
+    """Результат попытки для модели: балл 0..1, иначе правильность, иначе None."""
+    if attempt.completed_at is None:
+        return None
+    if attempt.score is not None:
+        return min(max(attempt.score / 100, 0.0), 1.0)
+    if attempt.is_correct is not None:
+        return 1.0 if attempt.is_correct else 0.0
+    return None
+
+
+def skill_level(rating: float) -> tuple[DifficultyLevel, float]:
+    """
+    Уровень, на котором ученик решает задания с вероятностью TARGET_SUCCESS.
+
+    Возвращает уровень и долю пути до следующего (0..1).
+    """
+    position = (rating - _TARGET_MARGIN) / DIFFICULTY_STEP + DifficultyLevel.MEDIUM
+    position = min(max(position, DifficultyLevel.VERY_EASY), DifficultyLevel.VERY_HARD)
+    level = int(position)
+    if level == DifficultyLevel.VERY_HARD:
+        return DifficultyLevel.VERY_HARD, 0.0
+    return DifficultyLevel(level), position - level
+
+
+def difficulty_for_score(average_score: float) -> DifficultyLevel:
+    """Рекомендуемый уровень сложности по среднему баллу."""
+    if average_score >= 85:
+        return DifficultyLevel.HARD
+    if average_score >= 70:
+        return DifficultyLevel.MEDIUM
+    if average_score >= 50:
+        return DifficultyLevel.EASY
+    return DifficultyLevel.VERY_EASY
+
+
+def replay_ratings(
+    group_starts: np.ndarray,
+    levels: np.ndarray,
+    outcomes: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Пересчитать рейтинги по истории попыток, векторно по группам.
+
+    Попытки отсортированы по группе (ученик, тема) и времени; группа g
+    занимает строки group_starts[g]..group_starts[g + 1]. Шаг t обновляет
+    разом все группы, у которых есть t-я попытка, поэтому число итераций
+    Python равно длине самой длинной группы, а не числу попыток.
+    Результат совпадает с последовательным update_rating.
+
+    Возвращает рейтинги, число обновлений и сумму learning_gain по группам
+    (счётчик неудач бандита — число обновлений минус эта сумма).
+    """
+    n_groups = len(group_starts)
+    lengths = np.diff(np.append(group_starts, len(outcomes)))
+    difficulty = (levels.astype(np.float64) - DifficultyLevel.MEDIUM) * DIFFICULTY_STEP
+
+    ratings = np.zeros(n_groups)
+    updates = np.zeros(n_groups, dtype=np.int64)
+    gains = np.zeros(n_groups)
+
+    # Группы по убыванию длины: на шаге t активен их префикс
+    by_length = np.argsort(-lengths, kind="stable")
+    negated_lengths = -lengths[by_length]
+
+    for t in range(int(lengths.max(initial=0))):
+        active = by_length[: np.searchsorted(negated_lengths, -t)]
+        rows = group_starts[active] + t
+        k = SKILL_K_BASE / (1 + SKILL_K_DECAY * updates[active])
+        expected = 1 / (1 + np.exp(difficulty[rows] - ratings[active]))
+        gains[active] += (outcomes[rows] - expected + 1) / 2
+        ratings[active] += k * (outcomes[rows] - expected)
+        updates[active] += 1
+
+    return ratings, updates, gains
@@ -0,0 +1,324 @@
+"""
+Сервис накопительной статистики ученика по темам.
+"""
+from dataclasses import dataclass
+
+from sqlalchemy import Float, bindparam, cast, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import get_progress_cache
+from app.core.constants import Subject
+from app.core.upsert import get_or_create_for_update
+from app.models.progress import StudentTopicStats, TaskAttempt
+from app.models.task import Task
+from app.services.skills import (
+    attempt_outcome,
+    expected_success,
+    learning_gain,
+    skill_k,
+    update_rating,
+)
+
+
+@dataclass(frozen=True)
+class AttemptContribution:
+    """Вклад попытки в статистику темы (нулевой, пока попытка не завершена)."""
+
+    attempts: int = 0
+    correct: int = 0
+    scored: int = 0
+    score: float = 0.0
+    timed: int = 0
+    time: int = 0
+    hints: int = 0
+    outcome: float | None = None  # результат для модели навыка
+
+    @classmethod
+    def of(cls, attempt: TaskAttempt) -> "AttemptContribution":
+        """Вклад попытки в её текущем состоянии."""
+        if attempt.completed_at is None:
+            return cls()
+        return cls(
+            attempts=1,
+            correct=1 if attempt.is_correct else 0,
+            scored=0 if attempt.score is None else 1,
+            score=attempt.score or 0.0,
+            timed=0 if attempt.time_spent is None else 1,
+            time=attempt.time_spent or 0,
+            hints=attempt.hints_used or 0,
+            outcome=attempt_outcome(attempt),
+        )
+
+
+@dataclass(frozen=True)
+class AttemptTask:
+    """Поля задания попытки, нужные обработчикам её изменения."""
+
+    subject: Subject
+    topic: str
+    difficulty: int
+    iep_goal_id: int | None = None
+
+
+# Колонки AttemptTask: читаются вместе с другими полями задания одним запросом
+ATTEMPT_TASK_COLUMNS = (Task.subject, Task.topic, Task.difficulty, Task.iep_goal_id)
+
+
+async def load_attempt_task(db: AsyncSession, task_id: int) -> AttemptTask:
+    """Прочитать поля задания попытки."""
+    result = await db.execute(select(*ATTEMPT_TASK_COLUMNS).where(Task.id == task_id))
+    return AttemptTask(*result.one())
+
+
+def update_skill(
+    stats: StudentTopicStats,
+    difficulty: int,
+    outcome: float | None,
+    previous: float | None,
+) -> None:
+    """
+    Обновить навык темы по результату попытки.
+
+    Первая оценка попытки — обычный шаг Эло. Переоценка сдвигает рейтинг
+    на разницу результатов с тем же шагом, не считая попытку второй раз;
+    снятие оценки откатывает шаг приближённо, по текущему ожиданию.
+    Так же ведутся счётчики прироста навыка для бандита рекомендаций.
+    """
+    if outcome == previous:
+        return
+
+    if previous is None:
+        gain = learning_gain(outcome, expected_success(stats.skill_rating, difficulty))
+        stats.gain_successes += gain
+        stats.gain_failures += 1 - gain
+        stats.skill_rating = update_rating(
+            stats.skill_rating, stats.skill_updates, difficulty, outcome
+        )
+        stats.skill_updates += 1
+    elif outcome is None:
+        stats.skill_updates -= 1
+        stats.skill_rating -= skill_k(stats.skill_updates) * (
+            previous - expected_success(stats.skill_rating, difficulty)
+        )
+        gain = learning_gain(previous, expected_success(stats.skill_rating, difficulty))
+        stats.gain_successes = max(stats.gain_successes - gain, 0.0)
+        stats.gain_failures = max(stats.gain_failures - (1 - gain), 0.0)
+    else:
+        stats.skill_rating += skill_k(stats.skill_updates - 1) * (outcome - previous)
+        shift = (outcome - previous) / 2
+        stats.gain_successes = max(stats.gain_successes + shift, 0.0)
+        stats.gain_failures = max(stats.gain_failures - shift, 0.0)
+
+
+class TopicStatsService:
+    """Сервис статистики по темам."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_by_student(
+        self,
+        student_id: int,
+        subject: Subject | None = None,
+    ) -> list[StudentTopicStats]:
+        """Получить статистику ученика по темам."""
+        query = select(StudentTopicStats).where(StudentTopicStats.student_id == student_id)
+
+        if subject:
+            query = query.where(StudentTopicStats.subject == subject)
+
+        query = query.order_by(StudentTopicStats.subject, StudentTopicStats.topic)
+        result = await self.db.execute(query)
+
+        return list(result.scalars().all())
+
+    async def get_for_update(
+        self,
+        student_id: int,
+        subject: Subject,
+        topic: str,
+    ) -> StudentTopicStats:
+        """Получить строку статистики под блокировкой, создав её при необходимости."""
+        return await get_or_create_for_update(
+            self.db,
+            StudentTopicStats,
+            {"student_id": student_id, "subject": subject, "topic": topic},
+        )
+
+    async def apply(
+        self,
+        attempt: TaskAttempt,
+        previous: AttemptContribution | None = None,
+        task: AttemptTask | None = None,
+    ) -> StudentTopicStats | None:
+        """
+        Учесть изменение попытки в статистике темы.
+
+        Добавляет разницу между текущим вкладом попытки и `previous`
+        (вкладом до изменения). Поля задания берутся из `task`, если
+        вызывающий код их уже прочитал. Не коммитит — вызывается
+        в транзакции изменения попытки.
+        """
+        current = AttemptContribution.of(attempt)
+        previous = previous or AttemptContribution()
+        if current == previous:
+            return None
+
+        task = task or await load_attempt_task(self.db, attempt.task_id)
+        stats = await self.get_for_update(attempt.student_id, task.subject, task.topic)
+        self._add(stats, task.difficulty, attempt, current, previous)
+        return stats
+
+    @staticmethod
+    def _add(
+        stats: StudentTopicStats,
+        difficulty: int,
+        attempt: TaskAttempt,
+        current: AttemptContribution,
+        previous: AttemptContribution,
+    ) -> None:
+        """Добавить в строку темы разницу вкладов попытки."""
+        stats.attempts_count += current.attempts - previous.attempts
+        stats.correct_count += current.correct - previous.correct
+        stats.scored_count += current.scored - previous.scored
+        stats.score_sum += current.score - previous.score
+        stats.timed_count += current.timed - previous.timed
+        stats.time_sum += current.time - previous.time
+        stats.hints_sum += current.hints - previous.hints
+
+        if attempt.completed_at and (
+            stats.last_activity_at is None or attempt.completed_at > stats.last_activity_at
+        ):
+            stats.last_activity_at = attempt.completed_at
+
+        update_skill(stats, difficulty, current.outcome, previous.outcome)
+
+    async def move_task(
+        self,
+        task_id: int,
+        source: tuple[Subject, str, int],
+        target: tuple[Subject, str, int] | None,
+    ) -> set[Subject]:
+        """
+        Перенести вклад попыток задания из темы `source` в `target`.
+
+        Темы — (предмет, тема, сложность задания). Без `target` вклад
+        только вычитается (задание удаляется вместе с попытками). Навык
+        старой темы откатывается так же, как при снятии оценки, в новой —
+        растёт как при первой оценке. Строка старой темы без попыток
+        удаляется. Вызывается до изменения или удаления задания (оно
+        читает попытки); не коммитит. Возвращает затронутые предметы.
+        """
+        result = await self.db.execute(
+            select(TaskAttempt)
+            .where(TaskAttempt.task_id == task_id, TaskAttempt.completed_at.isnot(None))
+            .order_by(TaskAttempt.completed_at, TaskAttempt.id)
+        )
+        attempts = list(result.scalars().all())
+        if not attempts:
+            return set()
+
+        empty = AttemptContribution()
+        subject, topic, difficulty = source
+        student_id = attempts[0].student_id
+        old_stats = await self.get_for_update(student_id, subject, topic)
+        for attempt in reversed(attempts):
+            self._add(old_stats, difficulty, attempt, empty, AttemptContribution.of(attempt))
+        if old_stats.attempts_count <= 0:
+            await self.db.delete(old_stats)
+        subjects = {subject}
+
+        if target is not None:
+            subject, topic, difficulty = target
+            new_stats = await self.get_for_update(student_id, subject, topic)
+            for attempt in attempts:
+                self._add(new_stats, difficulty, attempt, AttemptContribution.of(attempt), empty)
+            subjects.add(subject)
+
+        return subjects
+
+    async def rebuild(self, student_id: int | None = None) -> None:
+        """
+        Пересчитать статистику из всех попыток.
+
+        Нужен для первичного заполнения и после ручных правок task_attempts.
+        """
+        delete_query = delete(StudentTopicStats)
+        aggregate = (
+            select(
+                TaskAttempt.student_id,
+                Task.subject,
+                Task.topic,
+                func.count(TaskAttempt.id),
+                func.count(TaskAttempt.id).filter(TaskAttempt.is_correct.is_(True)),
+                func.count(TaskAttempt.score),
+                func.coalesce(cast(func.sum(TaskAttempt.score), Float), 0),
+                func.count(TaskAttempt.time_spent),
+                func.coalesce(func.sum(TaskAttempt.time_spent), 0),
+                func.coalesce(func.sum(TaskAttempt.hints_used), 0),
+                func.max(TaskAttempt.completed_at),
+            )
+            .join(Task, Task.id == TaskAttempt.task_id)
+            .where(TaskAttempt.completed_at.isnot(None))
+            .group_by(TaskAttempt.student_id, Task.subject, Task.topic)
+        )
+
+        skills_query = select(
+            StudentTopicStats.student_id.label("b_student_id"),
+            StudentTopicStats.subject.label("b_subject"),
+            StudentTopicStats.topic.label("b_topic"),
+            StudentTopicStats.skill_rating.label("b_skill_rating"),
+            StudentTopicStats.skill_updates.label("b_skill_updates"),
+            StudentTopicStats.gain_successes.label("b_gain_successes"),
+            StudentTopicStats.gain_failures.label("b_gain_failures"),
+        ).where(StudentTopicStats.skill_updates > 0)
+
+        if student_id is not None:
+            delete_query = delete_query.where(StudentTopicStats.student_id == student_id)
+            aggregate = aggregate.where(TaskAttempt.student_id == student_id)
+            skills_query = skills_query.where(StudentTopicStats.student_id == student_id)
+
+        # Навык не выводится из сумм — переносим его в пересчитанные строки
+        skills = [row._asdict() for row in (await self.db.execute(skills_query)).all()]
+
+        await self.db.execute(delete_query)
+        await self.db.execute(
+            insert(StudentTopicStats).from_select(
+                [
+                    "student_id",
+                    "subject",
+                    "topic",
+                    "attempts_count",
+                    "correct_count",
+                    "scored_count",
+                    "score_sum",
+                    "timed_count",
+                    "time_sum",
+                    "hints_sum",
+                    "last_activity_at",
+                ],
+                aggregate,
+            )
+        )
+        if skills:
+            await self.db.execute(
+                update(StudentTopicStats.__table__)
+                .where(
+                    StudentTopicStats.student_id == bindparam("b_student_id"),
+                    StudentTopicStats.subject == bindparam("b_subject"),
+                    StudentTopicStats.topic == bindparam("b_topic"),
+                )
+                .values(
+                    skill_rating=bindparam("b_skill_rating"),
+                    skill_updates=bindparam("b_skill_updates"),
+                    gain_successes=bindparam("b_gain_successes"),
+                    gain_failures=bindparam("b_gain_failures"),
+                ),
+                skills,
+            )
+        await self.db.commit()
+
+        if student_id is None:
+            get_progress_cache().clear()
+        else:
+            get_progress_cache().invalidate(student_id)
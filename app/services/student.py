@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.core.exceptions import NotFoundException
+from app.core.pagination import page_items, paginate
 from app.models.student import Student, StudentProfile
 from app.schemas.student import StudentCreate, StudentProfileUpdate, StudentUpdate
 
@@ -32,12 +33,12 @@ class StudentService:
 
     async def get_all(
         self,
-        skip: int = 0,
+        cursor: str | None = None,
         limit: int = 100,
         class_id: int | None = None,
         grade: int | None = None,
-    ) -> list[Student]:
-        """Получить список учеников."""
+    ) -> tuple[list[Student], str | None]:
+        """Получить страницу учеников (новые первыми) и курсор следующей."""
         query = select(Student).options(selectinload(Student.profile))
 
         if class_id:
@@ -45,10 +46,10 @@ class StudentService:
         if grade:
             query = query.where(Student.grade == grade)
 
-        query = query.offset(skip).limit(limit)
+        query = paginate(query, Student.created_at, Student.id, cursor, limit)
         result = await self.db.execute(query)
 
-        return list(result.scalars().all())
+        return page_items(result.scalars().all(), limit)
 
     async def get_by_parent(self, parent_id: int) -> list[Student]:
         """Получить учеников родителя."""
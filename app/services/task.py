@@ -2,24 +2,44 @@
 Сервис работы с заданиями и шаблонами.
 """
 from datetime import UTC, datetime
+from typing import NoReturn
 
-from sqlalchemy import select
+from sqlalchemy import ColumnElement, delete, insert, literal, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, undefer_group
 
-from app.core.constants import Subject, TaskStatus
-from app.core.exceptions import ForbiddenException, NotFoundException
+from app.core.cache import get_progress_cache
+from app.core.constants import Subject, TaskStatus, UserRole
+from app.core.exceptions import BadRequestException, ForbiddenException, NotFoundException
+from app.core.pagination import page_items, paginate
+from app.models.iep import IEPGoal
 from app.models.progress import TaskAttempt
-from app.models.task import Task, TaskTemplate
+from app.models.student import Student
+from app.models.task import TASK_PAYLOAD, Task, TaskTemplate
 from app.schemas.task import (
     TaskAttemptCreate,
     TaskAttemptSubmit,
     TaskAttemptUpdate,
+    TaskBulkCreate,
     TaskCreate,
+    TaskListResponse,
     TaskTemplateCreate,
     TaskTemplateUpdate,
     TaskUpdate,
 )
+from app.services.difficulty import DifficultyController
+from app.services.goals import GoalMetricService
+from app.services.grading import grade_attempt
+from app.services.recommendations import RecommendationService
+from app.services.reports import WeeklyReportService
+from app.services.review import ReviewScheduler
+from app.services.stats import (
+    ATTEMPT_TASK_COLUMNS,
+    AttemptContribution,
+    AttemptTask,
+    TopicStatsService,
+    load_attempt_task,
+)
 
 
 class TaskTemplateService:
@@ -104,6 +124,11 @@ class TaskTemplateService:
         await self.db.commit()
 
 
+# Колонки списков заданий: строки сразу ложатся в TaskListResponse,
+# без загрузки JSONB-полей и без объектов ORM
+TASK_LIST_COLUMNS = tuple(getattr(Task, name) for name in TaskListResponse.model_fields)
+
+
 class TaskService:
     """Сервис заданий."""
 
@@ -111,10 +136,10 @@ class TaskService:
         self.db = db
 
     async def get_by_id(self, task_id: int) -> Task:
-        """Получить задание по ID."""
+        """Получить задание по ID со всеми полями."""
         result = await self.db.execute(
             select(Task)
-            .options(selectinload(Task.template))
+            .options(selectinload(Task.template), undefer_group(TASK_PAYLOAD))
             .where(Task.id == task_id)
         )
         task = result.scalar_one_or_none()
@@ -124,17 +149,26 @@ class TaskService:
 
         return task
 
+    async def _refresh(self, task: Task) -> None:
+        """Перечитать задание после коммита, включая отложенные поля."""
+        await self.db.execute(
+            select(Task)
+            .options(undefer_group(TASK_PAYLOAD))
+            .where(Task.id == task.id)
+            .execution_options(populate_existing=True)
+        )
+
     async def get_all(
         self,
-        skip: int = 0,
+        cursor: str | None = None,
         limit: int = 100,
         student_id: int | None = None,
         subject: Subject | None = None,
         status: TaskStatus | None = None,
         iep_goal_id: int | None = None,
-    ) -> list[Task]:
-        """Получить список заданий с фильтрацией."""
-        query = select(Task)
+    ) -> tuple[list[TaskListResponse], str | None]:
+        """Получить страницу заданий с фильтрацией (новые первыми) и курсор следующей."""
+        query = select(*TASK_LIST_COLUMNS)
 
         if student_id:
             query = query.where(Task.student_id == student_id)
@@ -145,66 +179,154 @@ class TaskService:
         if iep_goal_id:
             query = query.where(Task.iep_goal_id == iep_goal_id)
 
-        query = query.order_by(Task.created_at.desc()).offset(skip).limit(limit)
+        query = paginate(query, Task.created_at, Task.id, cursor, limit)
         result = await self.db.execute(query)
+        rows = [TaskListResponse.model_validate(row, from_attributes=True) for row in result]
 
-        return list(result.scalars().all())
+        return page_items(rows, limit)
 
-    async def get_by_student(self, student_id: int, status: TaskStatus | None = None) -> list[Task]:
+    async def get_by_student(
+        self,
+        student_id: int,
+        status: TaskStatus | None = None,
+    ) -> list[TaskListResponse]:
         """Получить задания ученика."""
-        query = select(Task).where(Task.student_id == student_id)
+        query = select(*TASK_LIST_COLUMNS).where(Task.student_id == student_id)
 
         if status:
             query = query.where(Task.status == status)
 
-        query = query.order_by(Task.created_at.desc())
+        query = query.order_by(Task.created_at.desc(), Task.id.desc())
         result = await self.db.execute(query)
 
-        return list(result.scalars().all())
+        return [TaskListResponse.model_validate(row, from_attributes=True) for row in result]
 
     async def create(self, data: TaskCreate) -> Task:
         """Создать задание."""
         task = Task(**data.model_dump())
 
         self.db.add(task)
+        await GoalMetricService(self.db).recompute([task.iep_goal_id])
         await self.db.commit()
-        await self.db.refresh(task)
+        get_progress_cache().invalidate(task.student_id)
+        await self._refresh(task)
 
         return task
 
+    async def _check_references(self, items: list[TaskCreate]) -> None:
+        """Проверить ссылки заданий: по запросу на таблицу для всей пачки."""
+        for model, field, message in (
+            (Student, "student_id", "Ученики не найдены"),
+            (TaskTemplate, "template_id", "Шаблоны не найдены"),
+            (IEPGoal, "iep_goal_id", "Цели ИОП не найдены"),
+        ):
+            ids = {getattr(item, field) for item in items} - {None}
+            if not ids:
+                continue
+            result = await self.db.execute(select(model.id).where(model.id.in_(ids)))
+            missing = ids - set(result.scalars())
+            if missing:
+                raise BadRequestException(f"{message}: {', '.join(map(str, sorted(missing)))}")
+
+    async def create_many(self, data: TaskBulkCreate) -> list[TaskListResponse]:
+        """
+        Создать пачку заданий одной транзакцией.
+
+        Ссылки проверяются заранее, строки пишутся многострочными
+        INSERT ... RETURNING (SQLAlchemy разбивает большие пачки
+        на несколько запросов), а не add/commit/refresh на задание.
+        Цели ИОП не пересчитываются: новые задания активны и без попыток.
+        """
+        await self._check_references(data.tasks)
+
+        result = await self.db.execute(
+            insert(Task).returning(*TASK_LIST_COLUMNS, sort_by_parameter_order=True),
+            [item.model_dump() for item in data.tasks],
+        )
+        tasks = [TaskListResponse.model_validate(row, from_attributes=True) for row in result]
+        await self.db.commit()
+
+        cache = get_progress_cache()
+        for student_id in {task.student_id for task in tasks}:
+            cache.invalidate(student_id)
+        return tasks
+
+    async def _refresh_recommendations(self, student_id: int, subjects: set[Subject]) -> None:
+        """Пересчитать рекомендации по предметам, статистика которых изменилась."""
+        recommendations = RecommendationService(self.db)
+        for subject in sorted(subjects):
+            await recommendations.refresh(student_id, subject)
+
     async def update(self, task_id: int, data: TaskUpdate) -> Task:
-        """Обновить задание."""
+        """
+        Обновить задание.
+
+        При смене предмета или темы вклад попыток задания переносится
+        в статистику новой темы в той же транзакции, рекомендации
+        и недельные отчёты пересчитываются.
+        """
         task = await self.get_by_id(task_id)
+        previous_goal_id = task.iep_goal_id
+        source = (task.subject, task.topic, task.difficulty)
 
         update_data = data.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(task, field, value)
 
+        if (task.subject, task.topic) != source[:2]:
+            subjects = await TopicStatsService(self.db).move_task(
+                task.id, source, (task.subject, task.topic, task.difficulty)
+            )
+            if subjects:
+                await self._refresh_recommendations(task.student_id, subjects)
+                await WeeklyReportService(self.db).invalidate(task.student_id)
+        await GoalMetricService(self.db).recompute([previous_goal_id, task.iep_goal_id])
         await self.db.commit()
-        await self.db.refresh(task)
+        get_progress_cache().invalidate(task.student_id)
+        await self._refresh(task)
 
         return task
 
     async def delete(self, task_id: int) -> None:
-        """Удалить задание."""
+        """
+        Удалить задание.
+
+        Попытки удаляются вместе с заданием, их вклад вычитается
+        из статистики темы, рекомендаций и недельных отчётов.
+        """
         task = await self.get_by_id(task_id)
+        student_id = task.student_id
+        goal_id = task.iep_goal_id
+        subjects = await TopicStatsService(self.db).move_task(
+            task.id, (task.subject, task.topic, task.difficulty), None
+        )
+        if subjects:
+            await self._refresh_recommendations(student_id, subjects)
+            await WeeklyReportService(self.db).invalidate(student_id)
+        await self.db.execute(delete(TaskAttempt).where(TaskAttempt.task_id == task.id))
         await self.db.delete(task)
+        await GoalMetricService(self.db).recompute([goal_id])
         await self.db.commit()
+        get_progress_cache().invalidate(student_id)
 
     async def complete(self, task_id: int) -> Task:
         """Завершить задание."""
         task = await self.get_by_id(task_id)
         task.status = TaskStatus.COMPLETED
+        await GoalMetricService(self.db).recompute([task.iep_goal_id])
         await self.db.commit()
-        await self.db.refresh(task)
+        get_progress_cache().invalidate(task.student_id)
+        await self._refresh(task)
         return task
 
     async def archive(self, task_id: int) -> Task:
         """Архивировать задание."""
         task = await self.get_by_id(task_id)
         task.status = TaskStatus.ARCHIVED
+        await GoalMetricService(self.db).recompute([task.iep_goal_id])
         await self.db.commit()
-        await self.db.refresh(task)
+        get_progress_cache().invalidate(task.student_id)
+        await self._refresh(task)
         return task
 
 
@@ -238,83 +360,243 @@ class TaskAttemptService:
     async def get_by_student(
         self,
         student_id: int,
+        cursor: str | None = None,
         limit: int = 100,
-    ) -> list[TaskAttempt]:
-        """Получить попытки ученика."""
+    ) -> tuple[list[TaskAttempt], str | None]:
+        """Получить страницу попыток ученика (новые первыми) и курсор следующей."""
         result = await self.db.execute(
-            select(TaskAttempt)
-            .where(TaskAttempt.student_id == student_id)
-            .order_by(TaskAttempt.started_at.desc())
-            .limit(limit)
+            paginate(
+                select(TaskAttempt).where(TaskAttempt.student_id == student_id),
+                TaskAttempt.started_at,
+                TaskAttempt.id,
+                cursor,
+                limit,
+            )
         )
-        return list(result.scalars().all())
-
-    async def start_attempt(self, data: TaskAttemptCreate) -> TaskAttempt:
-        """Начать новую попытку."""
-        attempt = TaskAttempt(
-            task_id=data.task_id,
-            student_id=data.student_id,
-            started_at=datetime.now(UTC),
-            answers=data.answers,
-            hints_used=data.hints_used,
-            feedback={},
+        return page_items(result.scalars().all(), limit, sort_attr="started_at")
+
+    @staticmethod
+    def owner_condition(role: UserRole, user_id: int) -> ColumnElement[bool] | None:
+        """
+        Условие на ученика попытки для пользователя: ученик — только свои,
+        родитель — попытки своих детей, педагоги и администратор — любые (None).
+        """
+        if role == UserRole.STUDENT:
+            return TaskAttempt.student_id.in_(select(Student.id).where(Student.user_id == user_id))
+        if role == UserRole.PARENT:
+            return TaskAttempt.student_id.in_(select(Student.id).where(Student.parent_id == user_id))
+        return None
+
+    def _open_attempt(
+        self,
+        attempt_id: int,
+        student_id: int | None,
+        owner: ColumnElement[bool] | None,
+    ) -> list[ColumnElement[bool]]:
+        """Условие «попытка не завершена и принадлежит ученику» для UPDATE."""
+        conditions = [TaskAttempt.id == attempt_id, TaskAttempt.completed_at.is_(None)]
+        if student_id is not None:
+            conditions.append(TaskAttempt.student_id == student_id)
+        if owner is not None:
+            conditions.append(owner)
+        return conditions
+
+    async def check_open(
+        self,
+        attempt_id: int,
+        owner: ColumnElement[bool] | None = None,
+    ) -> None:
+        """Проверить, что попытка существует, не завершена и доступна пользователю."""
+        result = await self.db.execute(
+            select(literal(1)).where(*self._open_attempt(attempt_id, None, owner))
         )
+        if result.scalar_one_or_none() is None:
+            raise NotFoundException("Открытая попытка не найдена")
+
+    async def _raise_not_open(
+        self,
+        attempt_id: int,
+        student_id: int | None,
+        owner: ColumnElement[bool] | None,
+    ) -> NoReturn:
+        """Объяснить, почему UPDATE не затронул попытку (редкий путь)."""
+        attempt = await self.get_by_id(attempt_id)
+        if student_id is not None and attempt.student_id != student_id:
+            raise ForbiddenException("Это не ваша попытка")
+        if owner is not None:
+            result = await self.db.execute(
+                select(TaskAttempt.id).where(TaskAttempt.id == attempt_id, owner)
+            )
+            if result.scalar_one_or_none() is None:
+                raise ForbiddenException("Это не ваша попытка")
+        raise ForbiddenException("Попытка уже завершена")
 
-        self.db.add(attempt)
+    async def _insert(self, query) -> TaskAttempt | None:
+        """Выполнить INSERT ... RETURNING попытки и закоммитить."""
+        result = await self.db.execute(query.returning(TaskAttempt))
+        attempt = result.scalar_one_or_none()
+        if attempt is None:
+            return None
         await self.db.commit()
-        await self.db.refresh(attempt)
+        get_progress_cache().invalidate(attempt.student_id)
+        return attempt
 
+    async def start_attempt(self, data: TaskAttemptCreate) -> TaskAttempt:
+        """Начать новую попытку (один INSERT ... RETURNING)."""
+        return await self._insert(
+            insert(TaskAttempt).values(
+                task_id=data.task_id,
+                student_id=data.student_id,
+                started_at=datetime.now(UTC),
+                answers=data.answers,
+                hints_used=data.hints_used,
+                feedback={},
+            )
+        )
+
+    async def start_task_attempt(self, task_id: int) -> TaskAttempt:
+        """
+        Начать попытку ученика, которому назначено задание.
+
+        Ученик берётся из задания в том же INSERT ... SELECT ... RETURNING,
+        без отдельного чтения задания.
+        """
+        attempt = await self._insert(
+            insert(TaskAttempt).from_select(
+                ["task_id", "student_id", "started_at", "answers", "hints_used", "feedback"],
+                select(
+                    Task.id,
+                    Task.student_id,
+                    literal(datetime.now(UTC), TaskAttempt.started_at.type),
+                    literal({}, TaskAttempt.answers.type),
+                    literal(0),
+                    literal({}, TaskAttempt.feedback.type),
+                ).where(Task.id == task_id),
+            )
+        )
+        if attempt is None:
+            raise NotFoundException("Задание не найдено")
         return attempt
 
     async def submit_attempt(
         self,
         attempt_id: int,
         data: TaskAttemptSubmit,
-        student_id: int,
+        student_id: int | None = None,
+        owner: ColumnElement[bool] | None = None,
     ) -> TaskAttempt:
-        """Отправить ответ на задание."""
-        attempt = await self.get_by_id(attempt_id)
-
-        if attempt.student_id != student_id:
-            raise ForbiddenException("Это не ваша попытка")
-
-        if attempt.completed_at:
-            raise ForbiddenException("Попытка уже завершена")
+        """
+        Отправить ответ на задание и проверить его, если тип задания это позволяет.
+
+        Ответ пишется одним UPDATE ... RETURNING с условием «не завершена
+        и своя» (`student_id` или `owner` из owner_condition), поэтому чужая
+        попытка не меняется, а двойная отправка не учитывается дважды.
+        Содержание задания для проверки и его поля для статистики, уровня
+        и цели читаются до него одним запросом.
+        """
+        result = await self.db.execute(
+            select(Task.content, *ATTEMPT_TASK_COLUMNS)
+            .join(TaskAttempt, TaskAttempt.task_id == Task.id)
+            .where(*self._open_attempt(attempt_id, student_id, owner))
+        )
+        row = result.one_or_none()
+        if row is None:
+            await self._raise_not_open(attempt_id, student_id, owner)
+        content = row.content
+        task = AttemptTask(row.subject, row.topic, row.difficulty, row.iep_goal_id)
+
+        values = {
+            "answers": data.answers,
+            "completed_at": datetime.now(UTC),
+            "time_spent": data.time_spent,
+        }
+        grade = grade_attempt(content, data.answers)
+        if grade:
+            values.update(score=grade.score, is_correct=grade.is_correct)
 
-        attempt.answers = data.answers
-        attempt.completed_at = datetime.now(UTC)
-        attempt.time_spent = data.time_spent
+        result = await self.db.execute(
+            update(TaskAttempt)
+            .where(*self._open_attempt(attempt_id, student_id, owner))
+            .values(**values)
+            .returning(TaskAttempt)
+            .execution_options(populate_existing=True)
+        )
+        attempt = result.scalar_one_or_none()
+        if attempt is None:
+            await self._raise_not_open(attempt_id, student_id, owner)
+        previous = AttemptContribution()
+
+        # Статистика по теме, рекомендации, повторения, уровень по предмету,
+        # цель ИОП и отчёт за неделю попытки обновляются в той же транзакции
+        outcome = AttemptContribution.of(attempt).outcome
+        stats = await TopicStatsService(self.db).apply(attempt, previous, task)
+        if stats:
+            await RecommendationService(self.db).refresh(attempt.student_id, stats.subject)
+            await ReviewScheduler(self.db).apply(
+                stats, outcome, previous.outcome, attempt.completed_at
+            )
+        await DifficultyController(self.db).apply(attempt, outcome, previous.outcome, task)
+        await GoalMetricService(self.db).apply(attempt, previous, task)
+        await WeeklyReportService(self.db).invalidate(attempt.student_id, attempt.started_at)
 
         await self.db.commit()
-        await self.db.refresh(attempt)
+        get_progress_cache().invalidate(attempt.student_id)
 
         return attempt
 
     async def update_attempt(self, attempt_id: int, data: TaskAttemptUpdate) -> TaskAttempt:
         """Обновить попытку (оценка, фидбэк)."""
         attempt = await self.get_by_id(attempt_id)
+        previous = AttemptContribution.of(attempt)
+        task = await load_attempt_task(self.db, attempt.task_id)
 
         update_data = data.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(attempt, field, value)
 
+        outcome = AttemptContribution.of(attempt).outcome
+        stats = await TopicStatsService(self.db).apply(attempt, previous, task)
+        if stats:
+            await RecommendationService(self.db).refresh(attempt.student_id, stats.subject)
+            await ReviewScheduler(self.db).apply(
+                stats, outcome, previous.outcome, attempt.completed_at
+            )
+        await DifficultyController(self.db).apply(attempt, outcome, previous.outcome, task)
+        await GoalMetricService(self.db).apply(attempt, previous, task)
+        await WeeklyReportService(self.db).invalidate(attempt.student_id, attempt.started_at)
+
         await self.db.commit()
+        get_progress_cache().invalidate(attempt.student_id)
         await self.db.refresh(attempt)
 
         return attempt
 
-    async def use_hint(self, attempt_id: int, student_id: int) -> TaskAttempt:
-        """Использовать подсказку."""
-        attempt = await self.get_by_id(attempt_id)
-
-        if attempt.student_id != student_id:
-            raise ForbiddenException("Это не ваша попытка")
+    async def use_hint(
+        self,
+        attempt_id: int,
+        student_id: int | None = None,
+        owner: ColumnElement[bool] | None = None,
+    ) -> TaskAttempt:
+        """
+        Использовать подсказку (владелец проверяется как в submit_attempt).
 
-        if attempt.completed_at:
-            raise ForbiddenException("Попытка уже завершена")
+        Счётчик увеличивается в самом UPDATE ... RETURNING, поэтому
+        одновременные нажатия не теряются.
+        """
+        result = await self.db.execute(
+            update(TaskAttempt)
+            .where(*self._open_attempt(attempt_id, student_id, owner))
+            .values(hints_used=TaskAttempt.hints_used + 1)
+            .returning(TaskAttempt)
+            .execution_options(populate_existing=True)
+        )
+        attempt = result.scalar_one_or_none()
+        if attempt is None:
+            await self._raise_not_open(attempt_id, student_id, owner)
 
-        attempt.hints_used += 1
+        # Отчёты не сбрасываются: открытая попытка относится к текущей неделе,
+        # а попытку, начатую на закрытой неделе, сбросит её отправка
         await self.db.commit()
-        await self.db.refresh(attempt)
+        get_progress_cache().invalidate(attempt.student_id)
 
         return attempt
@@ -0,0 +1,129 @@
+"""
+Буфер событий телеметрии попыток.
+
+События не пишутся в БД по одному: запрос проверяет попытку одной
+выборкой по ключу (TaskAttemptService.check_open) и кладёт события в память
+процесса, а фоновая задача записывает накопленное многострочными
+INSERT в attempt_events — раз в TELEMETRY_FLUSH_SECONDS или раньше,
+если набралось TELEMETRY_BATCH_SIZE событий. При остановке приложения
+буфер записывается целиком. Телеметрия допускает потери: при падении
+процесса теряется не больше одного интервала, при переполнении буфера
+(БД недоступна) отбрасываются самые старые события.
+"""
+import asyncio
+import contextlib
+import logging
+from collections import deque
+from collections.abc import Callable
+from datetime import UTC, datetime
+from functools import lru_cache
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import async_session_maker
+from app.models.progress import AttemptEvent
+from app.schemas.task import AttemptEventCreate
+
+logger = logging.getLogger(__name__)
+
+
+class AttemptEventBuffer:
+    """Буфер событий с записью пачками."""
+
+    def __init__(
+        self,
+        batch_size: int,
+        max_buffered: int,
+        session_factory: Callable[[], AsyncSession] = async_session_maker,
+    ):
+        self.batch_size = batch_size
+        self.session_factory = session_factory
+        self._rows: deque[dict] = deque(maxlen=max_buffered)
+        self._full = asyncio.Event()
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(self, attempt_id: int, events: list[AttemptEventCreate]) -> int:
+        """Поставить события попытки в буфер. Возвращает их число."""
+        now = datetime.now(UTC)
+        dropped = max(len(self._rows) + len(events) - self._rows.maxlen, 0)
+        if dropped:
+            logger.warning("Буфер телеметрии переполнен, отброшено событий: %d", dropped)
+        self._rows.extend(
+            {
+                "attempt_id": attempt_id,
+                "event_type": event.type,
+                "occurred_at": event.occurred_at or now,
+                "payload": event.payload,
+            }
+            for event in events
+        )
+        if len(self._rows) >= self.batch_size:
+            self._full.set()
+        return len(events)
+
+    async def flush(self, db: AsyncSession | None = None) -> int:
+        """
+        Записать накопленные события: по транзакции на пачку из batch_size.
+
+        Без `db` открывает свою сессию. При ошибке незаписанные пачки
+        возвращаются в начало буфера — сколько поместится рядом с событиями,
+        пришедшими во время записи; лишними считаются самые старые.
+        Возвращает число записанных событий.
+        """
+        async with self._lock:
+            self._full.clear()
+            rows = list(self._rows)
+            self._rows.clear()
+            if not rows:
+                return 0
+
+            written = 0
+            try:
+                async with contextlib.AsyncExitStack() as stack:
+                    if db is None:
+                        db = await stack.enter_async_context(self.session_factory())
+                    for start in range(0, len(rows), self.batch_size):
+                        batch = rows[start:start + self.batch_size]
+                        await db.execute(insert(AttemptEvent), batch)
+                        await db.commit()
+                        written += len(batch)
+            except BaseException:
+                # В том числе отмена фоновой задачи при остановке
+                self._requeue(rows[written:])
+                raise
+            return written
+
+    def _requeue(self, rows: list[dict]) -> None:
+        """Вернуть незаписанные события, отбросив самые старые сверх свободного места."""
+        dropped = max(len(rows) - (self._rows.maxlen - len(self._rows)), 0)
+        if dropped:
+            logger.warning("Буфер телеметрии переполнен, отброшено событий: %d", dropped)
+        # extendleft в полный deque вытеснил бы справа самые новые события
+        self._rows.extendleft(reversed(rows[dropped:]))
+
+    async def run(self, interval: float) -> None:
+        """Фоновая задача: записывать буфер по времени или по заполнению."""
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=interval)
+            except TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Ошибка записи телеметрии попыток")
+
+
+@lru_cache
+def get_event_buffer() -> AttemptEventBuffer:
+    """Получить буфер событий процесса."""
+    settings = get_settings()
+    return AttemptEventBuffer(
+        batch_size=settings.TELEMETRY_BATCH_SIZE,
+        max_buffered=settings.TELEMETRY_MAX_BUFFERED,
+    )
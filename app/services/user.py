@@ -5,6 +5,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.exceptions import NotFoundException
+from app.core.pagination import page_items, paginate
 from app.core.security import get_password_hash
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
@@ -33,20 +34,20 @@ class UserService:
 
     async def get_all(
         self,
-        skip: int = 0,
+        cursor: str | None = None,
         limit: int = 100,
         organization_id: int | None = None,
-    ) -> list[User]:
-        """Получить список пользователей."""
+    ) -> tuple[list[User], str | None]:
+        """Получить страницу пользователей (новые первыми) и курсор следующей."""
         query = select(User)
 
         if organization_id:
             query = query.where(User.organization_id == organization_id)
 
-        query = query.offset(skip).limit(limit)
+        query = paginate(query, User.created_at, User.id, cursor, limit)
         result = await self.db.execute(query)
 
-        return list(result.scalars().all())
+        return page_items(result.scalars().all(), limit)
 
     async def create(self, data: UserCreate) -> User:
         """Создать пользователя."""
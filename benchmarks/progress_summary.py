@@ -0,0 +1,169 @@
+"""
+Бенчмарк сводки прогресса ученика.
+
+Заполняет базу учеником с 10 000 заданий (и попытками по ним) и сравнивает
+однозапросную сводку `ProgressService.get_student_summary` с прежней
+реализацией из трёх последовательных запросов.
+
+Запуск (нужна PostgreSQL, данные остаются в базе):
+    python -m benchmarks.progress_summary --tasks 10000 --runs 200 --concurrency 10
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from datetime import UTC, datetime, timedelta
+
+if sys.platform == "win32":
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import get_settings
+from app.core.constants import DifficultyLevel, Subject, TaskStatus
+from app.models import Base
+from app.models.progress import TaskAttempt
+from app.models.student import Student
+from app.models.task import Task
+from app.services.progress import ProgressService
+
+BATCH_SIZE = 2000
+
+
+async def seed(session: AsyncSession, tasks_count: int) -> int:
+    """Создать ученика с заданиями и попытками. Возвращает ID ученика."""
+    student = Student(first_name="Бенчмарк", last_name="Сводки", grade=4)
+    session.add(student)
+    await session.flush()
+
+    subjects = list(Subject)
+    now = datetime.now(UTC)
+
+    for offset in range(0, tasks_count, BATCH_SIZE):
+        size = min(BATCH_SIZE, tasks_count - offset)
+        task_rows = [
+            {
+                "title": f"Задание {offset + i}",
+                "student_id": student.id,
+                "subject": subjects[i % len(subjects)],
+                "topic": f"Тема {i % 25}",
+                "difficulty": DifficultyLevel.MEDIUM,
+                "content": {"type": "multiple_choice", "question": "?"},
+                "adaptations": {},
+                "generation_metadata": {},
+                "status": TaskStatus.COMPLETED if i % 3 else TaskStatus.ACTIVE,
+                "is_ai_generated": False,
+            }
+            for i in range(size)
+        ]
+        result = await session.execute(insert(Task).returning(Task.id), task_rows)
+        task_ids = list(result.scalars())
+
+        attempt_rows = []
+        for task_id in task_ids:
+            for _ in range(random.randint(1, 3)):
+                started = now - timedelta(minutes=random.randint(1, 60 * 24 * 90))
+                score = random.uniform(0, 100)
+                attempt_rows.append({
+                    "task_id": task_id,
+                    "student_id": student.id,
+                    "started_at": started,
+                    "completed_at": started + timedelta(seconds=random.randint(20, 600)),
+                    "score": score,
+                    "is_correct": score >= 60,
+                    "hints_used": random.randint(0, 3),
+                    "time_spent": random.randint(20, 600),
+                    "answers": {},
+                    "feedback": {},
+                })
+        await session.execute(insert(TaskAttempt), attempt_rows)
+
+    await session.commit()
+    return student.id
+
+
+async def legacy_summary(session: AsyncSession, student_id: int) -> None:
+    """Прежняя сводка: три последовательных запроса."""
+    await session.execute(select(func.count(Task.id)).where(Task.student_id == student_id))
+    await session.execute(
+        select(func.count(Task.id)).where(
+            Task.student_id == student_id,
+            Task.status == TaskStatus.COMPLETED,
+        )
+    )
+    await session.execute(
+        select(
+            func.count(TaskAttempt.id),
+            func.count(TaskAttempt.id).filter(TaskAttempt.is_correct.is_(True)),
+            func.avg(TaskAttempt.score),
+            func.avg(TaskAttempt.time_spent),
+            func.sum(TaskAttempt.hints_used),
+        ).where(
+            TaskAttempt.student_id == student_id,
+            TaskAttempt.completed_at.isnot(None),
+        )
+    )
+
+
+async def current_summary(session: AsyncSession, student_id: int) -> None:
+    """Текущая сводка: один запрос."""
+    await ProgressService(session).get_student_summary(student_id)
+
+
+async def measure(session_maker, func_, student_id: int, runs: int, concurrency: int) -> list[float]:
+    """Замерить задержку вызова при заданной конкурентности (мс)."""
+    timings: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore, session_maker() as session:
+            started = time.perf_counter()
+            await func_(session, student_id)
+            timings.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(one() for _ in range(runs)))
+    return timings
+
+
+def report(name: str, timings: list[float]) -> None:
+    """Вывести перцентили задержки."""
+    ordered = sorted(timings)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(
+        f"{name:<10} p50={statistics.median(ordered):7.2f} мс  "
+        f"p95={p95:7.2f} мс  mean={statistics.fmean(ordered):7.2f} мс"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=10_000, help="Заданий на ученика")
+    parser.add_argument("--runs", type=int, default=200, help="Количество замеров")
+    parser.add_argument("--concurrency", type=int, default=10, help="Параллельных запросов")
+    parser.add_argument("--database-url", default=get_settings().DATABASE_URL)
+    args = parser.parse_args()
+
+    # Пул как в приложении, чтобы конкуренция за соединения была реалистичной
+    engine = create_async_engine(args.database_url, pool_size=5, max_overflow=10)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with session_maker() as session:
+        student_id = await seed(session, args.tasks)
+    print(f"Ученик {student_id}: {args.tasks} заданий")
+
+    for name, func_ in (("legacy", legacy_summary), ("single", current_summary)):
+        await measure(session_maker, func_, student_id, 10, 1)  # прогрев
+        timings = await measure(session_maker, func_, student_id, args.runs, args.concurrency)
+        report(name, timings)
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
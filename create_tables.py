@@ -7,6 +7,7 @@ if sys.platform == 'win32':
 
 from sqlalchemy.ext.asyncio import create_async_engine
 from app.models import Base
+from app.models.views import create_materialized_views
 from app.config import get_settings
 
 settings = get_settings()
@@ -18,6 +19,7 @@ async def create_tables():
     
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await create_materialized_views(conn)
     
     await engine.dispose()
     print("Таблицы созданы успешно!")
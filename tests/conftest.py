@@ -3,12 +3,14 @@
 """
 import asyncio
 from collections.abc import AsyncGenerator, Generator
+from datetime import UTC
 
 import pytest
 import pytest_asyncio
-from sqlalchemy import JSON
+from sqlalchemy import JSON, DateTime, TypeDecorator
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
+from app.core.cache import get_progress_cache
 from app.models import Base
 
 # Используем SQLite для тестов (in-memory)
@@ -23,6 +25,18 @@ def event_loop() -> Generator:
     loop.close()
 
 
+class UTCDateTime(TypeDecorator):
+    """DateTime, возвращающий aware-значения: SQLite теряет часовой пояс."""
+
+    impl = DateTime
+    cache_ok = True
+
+    def process_result_value(self, value, dialect):
+        if value is not None and value.tzinfo is None:
+            return value.replace(tzinfo=UTC)
+        return value
+
+
 def convert_postgres_types_to_sqlite():
     """Конвертировать PostgreSQL типы в SQLite-совместимые."""
     from sqlalchemy.dialects.postgresql import ARRAY, JSONB
@@ -35,6 +49,16 @@ def convert_postgres_types_to_sqlite():
             elif isinstance(column.type, ARRAY):
                 # SQLite не поддерживает ARRAY, используем JSON
                 column.type = JSON()
+            elif isinstance(column.type, DateTime) and column.type.timezone:
+                column.type = UTCDateTime()
+
+
+@pytest.fixture(autouse=True)
+def clear_progress_cache() -> Generator:
+    """Сбрасывать кэш прогресса: ID учеников повторяются между тестами."""
+    get_progress_cache().clear()
+    yield
+    get_progress_cache().clear()
 
 
 @pytest_asyncio.fixture(scope="function")
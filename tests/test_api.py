@@ -1,12 +1,20 @@
 """
 Тесты API эндпоинтов.
 """
+from datetime import UTC, datetime
+
 import pytest
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.constants import UserRole
+from app.core.constants import DifficultyLevel, Subject, UserRole
 from app.core.security import create_access_token
+from app.database import get_db
 from app.main import app
+from app.models.progress import TaskAttempt
+from app.models.student import Student
+from app.models.task import Task
+from app.services.telemetry import get_event_buffer
 
 
 @pytest.fixture
@@ -110,3 +118,78 @@ class TestOpenAPIDocumentation:
             response = await client.get("/redoc")
 
         assert response.status_code == 200
+
+
+class TestRangeStats:
+    """Тесты статистики за период."""
+
+    @pytest.mark.asyncio
+    async def test_range_too_long(self, auth_headers):
+        """Слишком длинный период отклоняется до обращения к БД."""
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get(
+                "/api/v1/progress/range/1",
+                params={"from": "2000-01-01", "to": "2024-12-31", "bucket": "day"},
+                headers=auth_headers(),
+            )
+
+        assert response.status_code == 400
+        assert "366" in response.json()["detail"]
+
+
+class TestAttemptEvents:
+    """Тесты приёма телеметрии попыток."""
+
+    @pytest.mark.asyncio
+    async def test_events_are_buffered(self, auth_headers, db_session: AsyncSession):
+        """События открытой попытки ждут записи в буфере, чужие и неизвестные — 404."""
+        student = Student(first_name="Телеметрия", last_name="Тест", grade=2)
+        db_session.add(student)
+        await db_session.flush()
+        task = Task(
+            title="Счёт",
+            student_id=student.id,
+            subject=Subject.MATH,
+            topic="Счёт",
+            difficulty=DifficultyLevel.EASY,
+            content={},
+        )
+        db_session.add(task)
+        await db_session.flush()
+        attempt = TaskAttempt(task_id=task.id, student_id=student.id, started_at=datetime.now(UTC))
+        db_session.add(attempt)
+        await db_session.commit()
+
+        async def override_db():
+            yield db_session
+
+        get_event_buffer.cache_clear()
+        app.dependency_overrides[get_db] = override_db
+        url = f"/api/v1/tasks/attempts/{attempt.id}/events"
+        events = {"events": [{"type": "heartbeat"}, {"type": "focus_loss", "payload": {"ms": 900}}]}
+        try:
+            transport = ASGITransport(app=app)
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.post(url, json=events, headers=auth_headers())
+                invalid = await client.post(
+                    url, json={"events": [{"type": "unknown"}]}, headers=auth_headers()
+                )
+                foreign = await client.post(
+                    url, json=events, headers=auth_headers(role=UserRole.STUDENT)
+                )
+                missing = await client.post(
+                    f"/api/v1/tasks/attempts/{attempt.id + 1}/events",
+                    json=events,
+                    headers=auth_headers(),
+                )
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 202
+        assert response.json() == {"accepted": 2}
+        assert invalid.status_code == 422
+        assert foreign.status_code == 404
+        assert missing.status_code == 404
+        assert len(get_event_buffer()) == 2
+        get_event_buffer.cache_clear()
@@ -0,0 +1,1386 @@
+"""
+Тесты сервисов прогресса и аналитики.
+"""
+import json
+from collections import namedtuple
+from datetime import UTC, date, datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cli.backfill_skills import compute_chunk
+from app.config import get_settings
+from app.core.cache import StudentCache, get_progress_cache
+from app.core.constants import (
+    CohortMetric,
+    DifficultyLevel,
+    ExportFormat,
+    GoalMetric,
+    GoalStatus,
+    GoalUnit,
+    IEPStatus,
+    ReadMode,
+    RecommendationStrategy,
+    ScaffoldingLevel,
+    StatsBucket,
+    Subject,
+    TaskStatus,
+    UserRole,
+)
+from app.core.exceptions import BadRequestException, NotFoundException
+from app.core.sketch import QuantileSketch
+from app.models.iep import IEP, IEPGoal
+from app.models.organization import Class, Organization
+from app.models.progress import (
+    ReviewSchedule,
+    StudentSubjectLevel,
+    StudentTopicStats,
+    TaskAttempt,
+    WeeklyReportSnapshot,
+)
+from app.models.student import Student, StudentProfile
+from app.models.task import Task
+from app.models.user import User
+from app.models.views import (
+    goal_progress_view,
+    student_daily_stats_view,
+    student_topic_mastery_view,
+    views_metadata,
+)
+from app.schemas.iep import IEPGoalUpdate
+from app.schemas.progress import DailyStats, RangeStats
+from app.schemas.task import TaskAttemptCreate, TaskAttemptSubmit, TaskAttemptUpdate, TaskUpdate
+from app.services.cohorts import CohortSketchService
+from app.services.difficulty import DifficultyController, step_staircase
+from app.services.export import ExportFilters, ExportService, make_encoder
+from app.services.goals import GoalMetricService, parse_goal_metric, parse_goal_unit
+from app.services.group_analytics import GroupAnalyticsService
+from app.services.iep import IEPService
+from app.services.progress import (
+    AnalyticsService,
+    ProgressService,
+    RecommendationEngine,
+    bucket_starts,
+)
+from app.services.recommendations import RecommendationService
+from app.services.reports import WeeklyReportService
+from app.services.review import ReviewScheduler, schedule_review
+from app.services.skills import (
+    expected_success,
+    learning_gain,
+    replay_ratings,
+    skill_level,
+    update_rating,
+)
+from app.services.stats import TopicStatsService
+from app.services.task import TaskAttemptService, TaskService
+
+
+async def create_student(db: AsyncSession, grade: int = 3) -> Student:
+    """Создать ученика для тестов."""
+    student = Student(first_name="Прогресс", last_name="Тест", grade=grade)
+    db.add(student)
+    await db.flush()
+    return student
+
+
+def make_task(
+    student_id: int,
+    subject: Subject = Subject.MATH,
+    topic: str = "Сложение",
+    status: TaskStatus = TaskStatus.ACTIVE,
+) -> Task:
+    """Собрать задание для тестов."""
+    return Task(
+        title=f"Задание: {topic}",
+        student_id=student_id,
+        subject=subject,
+        topic=topic,
+        difficulty=DifficultyLevel.EASY,
+        content={"type": "multiple_choice", "question": "?"},
+        status=status,
+    )
+
+
+def make_attempt(
+    task: Task,
+    score: float | None,
+    is_correct: bool | None = None,
+    time_spent: int = 60,
+    hints_used: int = 0,
+    completed: bool = True,
+) -> TaskAttempt:
+    """Собрать попытку для тестов."""
+    started = datetime.now(UTC) - timedelta(minutes=5)
+    return TaskAttempt(
+        task_id=task.id,
+        student_id=task.student_id,
+        started_at=started,
+        completed_at=started + timedelta(seconds=time_spent) if completed else None,
+        score=score,
+        is_correct=is_correct,
+        time_spent=time_spent,
+        hints_used=hints_used,
+        answers={},
+        feedback={},
+    )
+
+
+class TestProgressSummary:
+    """Тесты сводки прогресса."""
+
+    @pytest.mark.asyncio
+    async def test_summary_aggregates(self, db_session: AsyncSession):
+        """Сводка собирает задания и попытки одним запросом."""
+        student = await create_student(db_session)
+        done = make_task(student.id, status=TaskStatus.COMPLETED)
+        active = make_task(student.id)
+        db_session.add_all([done, active])
+        await db_session.flush()
+
+        db_session.add_all([
+            make_attempt(done, 100, is_correct=True, time_spent=30, hints_used=1),
+            make_attempt(active, 50, is_correct=False, time_spent=90, hints_used=2),
+            make_attempt(active, None, completed=False, hints_used=5),
+        ])
+        await db_session.commit()
+        await TopicStatsService(db_session).rebuild(student.id)
+
+        summary = await ProgressService(db_session).get_student_summary(student.id)
+
+        assert summary.total_tasks == 2
+        assert summary.completed_tasks == 1
+        assert summary.correct_answers == 1
+        assert summary.average_score == 75
+        assert summary.average_time_spent == 60
+        assert summary.total_hints_used == 3
+        assert summary.completion_rate == 50
+
+    @pytest.mark.asyncio
+    async def test_summary_empty_student(self, db_session: AsyncSession):
+        """Сводка для ученика без заданий."""
+        student = await create_student(db_session)
+        await db_session.commit()
+
+        summary = await ProgressService(db_session).get_student_summary(student.id)
+
+        assert summary.total_tasks == 0
+        assert summary.correct_answers == 0
+        assert summary.average_score == 0
+        assert summary.completion_rate == 0
+
+
+class TestRangeBuckets:
+    """Тесты разбиения периода на интервалы."""
+
+    def test_day_buckets(self):
+        """Каждый день периода — отдельный интервал."""
+        starts = bucket_starts(date(2024, 3, 30), date(2024, 4, 2), StatsBucket.DAY)
+
+        assert starts == [
+            date(2024, 3, 30),
+            date(2024, 3, 31),
+            date(2024, 4, 1),
+            date(2024, 4, 2),
+        ]
+
+    def test_week_buckets_start_on_monday(self):
+        """Недели начинаются с понедельника, как в date_trunc('week')."""
+        starts = bucket_starts(date(2024, 4, 3), date(2024, 4, 15), StatsBucket.WEEK)
+
+        assert starts == [date(2024, 4, 1), date(2024, 4, 8), date(2024, 4, 15)]
+
+    def test_month_buckets(self):
+        """Месяцы начинаются с первого числа."""
+        starts = bucket_starts(date(2024, 1, 31), date(2024, 3, 1), StatsBucket.MONTH)
+
+        assert starts == [date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)]
+
+    def test_range_limit(self):
+        """Период длиннее предела для интервала отклоняется."""
+        start = date(2024, 1, 1)
+
+        assert len(bucket_starts(start, date(2024, 12, 31), StatsBucket.DAY)) == 366
+        with pytest.raises(BadRequestException):
+            bucket_starts(start, date(2025, 1, 1), StatsBucket.DAY)
+        assert len(bucket_starts(start, date(2025, 1, 1), StatsBucket.WEEK)) == 53
+        with pytest.raises(BadRequestException):
+            bucket_starts(date(1, 1, 1), date(9999, 12, 31), StatsBucket.MONTH)
+
+    @pytest.mark.asyncio
+    async def test_default_timezone(self, db_session: AsyncSession):
+        """Ученик без класса получает часовой пояс по умолчанию."""
+        student = await create_student(db_session)
+        await db_session.commit()
+
+        tz_name = await ProgressService(db_session).get_timezone(student.id)
+
+        assert tz_name == get_settings().DEFAULT_TIMEZONE
+
+
+class TestAnalytics:
+    """Тесты полной аналитики."""
+
+    @pytest.mark.asyncio
+    async def test_full_analytics_by_subject(self, db_session: AsyncSession):
+        """Предметы и темы собираются из одного сгруппированного запроса."""
+        student = await create_student(db_session)
+        fractions = make_task(student.id, topic="Дроби", status=TaskStatus.COMPLETED)
+        addition = make_task(student.id, topic="Сложение")
+        letters = make_task(student.id, subject=Subject.RUSSIAN, topic="Буквы")
+        db_session.add_all([fractions, addition, letters])
+        await db_session.flush()
+
+        db_session.add_all([
+            make_attempt(fractions, 40),
+            make_attempt(fractions, 60),
+            make_attempt(addition, 90),
+        ])
+        await db_session.commit()
+        await TopicStatsService(db_session).rebuild(student.id)
+
+        analytics = await AnalyticsService(db_session).get_full_analytics(student.id)
+
+        subjects = {sp.subject: sp for sp in analytics.subjects_progress}
+        assert set(subjects) == {Subject.MATH, Subject.RUSSIAN}
+
+        math = subjects[Subject.MATH]
+        assert math.total_tasks == 2
+        assert math.completed_tasks == 1
+        assert math.weak_topics == ["Дроби"]
+        assert math.strong_topics == ["Сложение"]
+        assert math.average_score == 63.33  # (40 + 60 + 90) / 3 по попыткам
+        assert subjects[Subject.RUSSIAN].average_score == 0
+
+    @pytest.mark.asyncio
+    async def test_subject_progress_ignores_other_subjects(self, db_session: AsyncSession):
+        """Прогресс по предмету учитывает только его темы."""
+        student = await create_student(db_session)
+        math = make_task(student.id, topic="Счёт")
+        reading = make_task(student.id, subject=Subject.READING, topic="Сказки")
+        db_session.add_all([math, reading])
+        await db_session.flush()
+        db_session.add_all([make_attempt(math, 95), make_attempt(reading, 10)])
+        await db_session.commit()
+        await TopicStatsService(db_session).rebuild(student.id)
+
+        progress = await ProgressService(db_session, ReadMode.LIVE).get_subject_progress(
+            student.id, Subject.MATH
+        )
+
+        assert progress.total_tasks == 1
+        assert progress.topics_covered == ["Счёт"]
+        assert progress.strong_topics == ["Счёт"]
+        assert progress.current_difficulty == DifficultyLevel.HARD
+        assert progress.data_as_of is None  # живой режим, а не снимок
+
+
+class TestTopicStats:
+    """Тесты накопительной статистики по темам."""
+
+    @pytest.mark.asyncio
+    async def test_incremental_updates(self, db_session: AsyncSession):
+        """Отправка и оценка попытки обновляют статистику темы."""
+        student = await create_student(db_session)
+        task = make_task(student.id, topic="Деление")
+        db_session.add(task)
+        await db_session.commit()
+
+        service = TaskAttemptService(db_session)
+        attempt = await service.start_attempt(
+            TaskAttemptCreate(task_id=task.id, student_id=student.id)
+        )
+        await service.use_hint(attempt.id, student.id)
+        await service.submit_attempt(
+            attempt.id, TaskAttemptSubmit(answers={"text": "3"}, time_spent=40), student.id
+        )
+        await service.update_attempt(attempt.id, TaskAttemptUpdate(score=80, is_correct=True))
+
+        [stats] = await TopicStatsService(db_session).get_by_student(student.id)
+        assert (stats.subject, stats.topic) == (Subject.MATH, "Деление")
+        assert stats.attempts_count == 1
+        assert stats.correct_count == 1
+        assert stats.average_score == 80
+        assert stats.time_sum == 40
+        assert stats.hints_sum == 1
+        assert stats.last_activity_at is not None
+
+        assert stats.skill_updates == 1
+        graded_rating = stats.skill_rating
+        assert graded_rating > 0
+
+        # Повторная оценка заменяет вклад, а не добавляет его
+        await service.update_attempt(attempt.id, TaskAttemptUpdate(score=60, is_correct=False))
+        [stats] = await TopicStatsService(db_session).get_by_student(student.id)
+        assert stats.attempts_count == 1
+        assert stats.correct_count == 0
+        assert stats.average_score == 60
+        assert stats.skill_updates == 1
+        assert stats.skill_rating < graded_rating
+
+        # Пересчёт сумм сохраняет навык
+        regraded_rating = stats.skill_rating
+        await TopicStatsService(db_session).rebuild(student.id)
+        [stats] = await TopicStatsService(db_session).get_by_student(student.id)
+        assert stats.skill_updates == 1
+        assert stats.skill_rating == pytest.approx(regraded_rating)
+
+    @pytest.mark.asyncio
+    async def test_task_move_and_delete(self, db_session: AsyncSession):
+        """Смена темы задания переносит его попытки, удаление — вычитает."""
+        student = await create_student(db_session)
+        moved = make_task(student.id, topic="Сложение")
+        kept = make_task(student.id, topic="Сложение")
+        db_session.add_all([moved, kept])
+        await db_session.commit()
+
+        attempts = TaskAttemptService(db_session)
+        for task, score in ((moved, 20), (moved, 40), (kept, 90)):
+            attempt = await attempts.start_attempt(
+                TaskAttemptCreate(task_id=task.id, student_id=student.id)
+            )
+            await attempts.submit_attempt(
+                attempt.id, TaskAttemptSubmit(answers={}, time_spent=30), student.id
+            )
+            await attempts.update_attempt(attempt.id, TaskAttemptUpdate(score=score))
+
+        service = TaskService(db_session)
+        await service.update(moved.id, TaskUpdate(topic="Вычитание"))
+
+        stats = {s.topic: s for s in await TopicStatsService(db_session).get_by_student(student.id)}
+        assert stats["Вычитание"].attempts_count == 2
+        assert stats["Вычитание"].average_score == 30
+        assert stats["Вычитание"].skill_updates == 2
+        assert stats["Сложение"].attempts_count == 1
+        assert stats["Сложение"].average_score == 90
+        assert stats["Сложение"].skill_updates == 1
+        summary = await ProgressService(db_session).get_student_summary(student.id)
+        assert summary.average_score == pytest.approx(50)
+        topics = {r.topic for r in await RecommendationService(db_session).get(student.id)}
+        assert "Вычитание" in topics
+
+        await service.delete(kept.id)
+        stats = await TopicStatsService(db_session).get_by_student(student.id)
+        assert [s.topic for s in stats] == ["Вычитание"]
+        summary = await ProgressService(db_session).get_student_summary(student.id)
+        assert summary.total_tasks == 1
+        assert summary.average_score == pytest.approx(30)
+
+
+class TestSkillModel:
+    """Тесты модели навыка."""
+
+    def test_expected_success_decreases_with_difficulty(self):
+        """Чем сложнее уровень, тем ниже ожидаемый успех."""
+        chances = [expected_success(0.0, level) for level in DifficultyLevel]
+
+        assert chances == sorted(chances, reverse=True)
+        assert expected_success(0.0, DifficultyLevel.MEDIUM) == 0.5
+
+    def test_rating_moves_toward_outcome(self):
+        """Успех повышает рейтинг, неудача понижает, шаг затухает."""
+        assert update_rating(0.0, 0, DifficultyLevel.MEDIUM, 1.0) > 0
+        assert update_rating(0.0, 0, DifficultyLevel.MEDIUM, 0.0) < 0
+        assert update_rating(0.0, 50, DifficultyLevel.MEDIUM, 1.0) < update_rating(
+            0.0, 0, DifficultyLevel.MEDIUM, 1.0
+        )
+
+    def test_skill_level_targets_success_rate(self):
+        """Рекомендуемый уровень растёт с рейтингом и ограничен шкалой."""
+        assert skill_level(-10.0) == (DifficultyLevel.VERY_EASY, 0.0)
+        assert skill_level(10.0) == (DifficultyLevel.VERY_HARD, 0.0)
+
+        level, _ = skill_level(2.0)
+        assert expected_success(2.0, level) >= 0.7
+        assert level > skill_level(0.0)[0]
+
+    def test_replay_matches_online_updates(self):
+        """Векторный пересчёт истории совпадает с последовательными обновлениями."""
+        rng = np.random.default_rng(7)
+        lengths = rng.integers(1, 20, size=50)
+        group_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        levels = rng.integers(1, 6, size=lengths.sum())
+        outcomes = rng.random(lengths.sum())
+
+        ratings, updates, gains = replay_ratings(group_starts, levels, outcomes)
+
+        for group, start in enumerate(group_starts):
+            rating, gain = 0.0, 0.0
+            for i in range(lengths[group]):
+                level, outcome = int(levels[start + i]), outcomes[start + i]
+                gain += learning_gain(outcome, expected_success(rating, level))
+                rating = update_rating(rating, i, level, outcome)
+            assert ratings[group] == pytest.approx(rating)
+            assert updates[group] == lengths[group]
+            assert gains[group] == pytest.approx(gain)
+
+    def test_backfill_chunk_groups_by_topic(self):
+        """Пачка бэкфилла даёт строку на каждую пару (ученик, тема)."""
+        Row = namedtuple("Row", "student_id subject topic difficulty outcome")
+        rows = [
+            Row(1, Subject.MATH, "Дроби", 3, 1.0),
+            Row(1, Subject.MATH, "Дроби", 3, 0.0),
+            Row(1, Subject.MATH, "Счёт", 2, 1.0),
+            Row(2, Subject.MATH, "Дроби", 3, 0.5),
+        ]
+
+        results = compute_chunk(rows)
+
+        assert [(r["student_id"], r["topic"], r["skill_updates"]) for r in results] == [
+            (1, "Дроби", 2),
+            (1, "Счёт", 1),
+            (2, "Дроби", 1),
+        ]
+        assert results[2]["skill_rating"] == pytest.approx(0.0)
+        assert results[2]["gain_successes"] == pytest.approx(0.5)
+        assert results[0]["gain_successes"] + results[0]["gain_failures"] == pytest.approx(2)
+
+    @pytest.mark.asyncio
+    async def test_recommendations_refreshed_on_grading(self, db_session: AsyncSession):
+        """Оценка попытки обновляет список рекомендаций без пересчёта."""
+        student = await create_student(db_session)
+        task = make_task(student.id, topic="Дроби")
+        db_session.add(task)
+        await db_session.commit()
+
+        service = TaskAttemptService(db_session)
+        attempt = await service.start_attempt(
+            TaskAttemptCreate(task_id=task.id, student_id=student.id)
+        )
+        await service.submit_attempt(
+            attempt.id, TaskAttemptSubmit(answers={}, time_spent=30), student.id
+        )
+        await service.update_attempt(attempt.id, TaskAttemptUpdate(score=0, is_correct=False))
+
+        engine = RecommendationEngine(db_session)
+        [recommendation] = await engine.get_recommendations(student.id)
+        assert recommendation.topic == "Дроби"
+        assert recommendation.priority == 10
+        assert await engine.get_recommendations(student.id, subject=Subject.READING) == []
+
+    @pytest.mark.asyncio
+    async def test_recommendations_from_skills(self, db_session: AsyncSession):
+        """Слабая тема рекомендуется первой, сильная — на уровне выше."""
+        student = await create_student(db_session)
+        weak = make_task(student.id, topic="Дроби")
+        strong = make_task(student.id, topic="Счёт")
+        db_session.add_all([weak, strong])
+        await db_session.commit()
+
+        db_session.add_all([
+            StudentTopicStats(
+                student_id=student.id, subject=Subject.MATH, topic="Дроби",
+                attempts_count=2, scored_count=2, score_sum=10, time_sum=120,
+                skill_rating=-1.0, skill_updates=2,
+            ),
+            StudentTopicStats(
+                student_id=student.id, subject=Subject.MATH, topic="Счёт",
+                attempts_count=5, scored_count=5, score_sum=500, time_sum=300,
+                skill_rating=2.0, skill_updates=5,
+            ),
+        ])
+        await db_session.commit()
+        assert await RecommendationService(db_session).rebuild() == 1
+
+        recommendations = await RecommendationEngine(db_session).get_recommendations(student.id)
+
+        assert [r.topic for r in recommendations] == ["Дроби", "Счёт"]
+        assert recommendations[0].difficulty < recommendations[1].difficulty
+
+        analytics = await AnalyticsService(db_session).get_full_analytics(student.id)
+        assert [skill.skill_name for skill in analytics.skill_levels] == ["Счёт", "Дроби"]
+
+    @pytest.mark.asyncio
+    async def test_bandit_recommendations(self, db_session: AsyncSession):
+        """Оценка копит прирост навыка, бандит предпочитает растущую тему."""
+        student = await create_student(db_session)
+        task = make_task(student.id, topic="Дроби")
+        db_session.add(task)
+        db_session.add(StudentTopicStats(
+            student_id=student.id, subject=Subject.MATH, topic="Счёт",
+            attempts_count=40, scored_count=40, score_sum=2000,
+            gain_successes=2.0, gain_failures=38.0,
+        ))
+        await db_session.commit()
+
+        service = TaskAttemptService(db_session)
+        for _ in range(3):
+            attempt = await service.start_attempt(
+                TaskAttemptCreate(task_id=task.id, student_id=student.id)
+            )
+            await service.submit_attempt(
+                attempt.id, TaskAttemptSubmit(answers={}, time_spent=30), student.id
+            )
+            await service.update_attempt(attempt.id, TaskAttemptUpdate(score=100))
+
+        result = await db_session.execute(
+            select(StudentTopicStats).where(StudentTopicStats.topic == "Дроби")
+        )
+        stats = result.scalar_one()
+        assert stats.gain_successes + stats.gain_failures == pytest.approx(3.0)
+        assert stats.gain_successes > stats.gain_failures
+
+        recommendations = await RecommendationService(db_session).sample(
+            student.id, rng=np.random.default_rng(0)
+        )
+        assert [r.topic for r in recommendations] == ["Дроби", "Счёт"]
+        assert recommendations[0].priority > recommendations[1].priority
+
+        engine = RecommendationEngine(db_session)
+        assert await engine.get_recommendations(
+            student.id, Subject.READING, strategy=RecommendationStrategy.BANDIT
+        ) == []
+
+
+class TestGroupAnalytics:
+    """Тесты аналитики класса и организации."""
+
+    @pytest.mark.asyncio
+    async def test_class_analytics(self, db_session: AsyncSession):
+        """Аналитика класса: распределение, трудные темы, группа риска."""
+        organization = Organization(name="Школа №1")
+        db_session.add(organization)
+        await db_session.flush()
+        school_class = Class(
+            name="3А", grade=3, academic_year="2024-2025", organization_id=organization.id
+        )
+        db_session.add(school_class)
+        await db_session.flush()
+
+        strong = await create_student(db_session)
+        weak = await create_student(db_session)
+        idle = await create_student(db_session)
+        for student in (strong, weak, idle):
+            student.class_id = school_class.id
+
+        tasks = {
+            (student.id, topic): make_task(student.id, topic=topic)
+            for student in (strong, weak)
+            for topic in ("Дроби", "Счёт")
+        }
+        db_session.add_all(tasks.values())
+        await db_session.flush()
+        db_session.add_all([
+            make_attempt(tasks[strong.id, "Дроби"], 70, is_correct=True),
+            make_attempt(tasks[strong.id, "Счёт"], 100, is_correct=True),
+            make_attempt(tasks[weak.id, "Дроби"], 10, is_correct=False),
+            make_attempt(tasks[weak.id, "Счёт"], 80, is_correct=True),
+        ])
+        await db_session.commit()
+        await TopicStatsService(db_session).rebuild()
+
+        service = GroupAnalyticsService(db_session)
+        analytics = await service.get_class_analytics(school_class.id)
+
+        assert analytics.total_students == 3
+        assert analytics.active_students == 2
+        assert analytics.total_attempts == 4
+        assert analytics.average_score == 65
+        assert analytics.accuracy == 75
+        assert analytics.score_distribution.counts == [0, 0, 1, 0, 1]
+        assert analytics.score_distribution.median == 65
+
+        [weak_topic] = analytics.weak_topics
+        assert weak_topic.topic == "Дроби"
+        assert weak_topic.average_score == 40
+        assert weak_topic.students_attempted == 2
+        assert weak_topic.students_struggling == 1
+
+        at_risk = {s.student_id: s for s in analytics.at_risk_students}
+        assert set(at_risk) == {weak.id, idle.id}
+        assert at_risk[idle.id].reasons == ["Нет завершённых попыток"]
+
+        org_analytics = await service.get_organization_analytics(organization.id)
+        assert org_analytics.total_students == 3
+        assert org_analytics.average_score == analytics.average_score
+
+    @pytest.mark.asyncio
+    async def test_unknown_class(self, db_session: AsyncSession):
+        """Несуществующий класс."""
+        with pytest.raises(NotFoundException):
+            await GroupAnalyticsService(db_session).get_class_analytics(99999)
+
+
+class TestProgressCache:
+    """Тесты кэша прогресса."""
+
+    @pytest.mark.asyncio
+    async def test_invalidated_by_student_changes(self, db_session: AsyncSession):
+        """Сводка берётся из кэша, пока не изменились задания ученика."""
+        student = await create_student(db_session)
+        task = make_task(student.id)
+        db_session.add(task)
+        await db_session.commit()
+
+        service = ProgressService(db_session)
+        assert (await service.get_student_summary(student.id)).completed_tasks == 0
+
+        # Прямое изменение в БД не видно: ответ из кэша
+        task.status = TaskStatus.COMPLETED
+        await db_session.commit()
+        assert (await service.get_student_summary(student.id)).completed_tasks == 0
+
+        # Изменение через сервис сбрасывает кэш ученика
+        await TaskService(db_session).complete(task.id)
+        assert (await service.get_student_summary(student.id)).completed_tasks == 1
+
+    @pytest.mark.asyncio
+    async def test_stale_result_not_stored(self):
+        """Результат, посчитанный до сброса, не попадает в кэш."""
+        cache = StudentCache(ttl=60, max_students=10)
+
+        async def compute_during_write():
+            cache.invalidate(1)
+            return "old"
+
+        async def compute_fresh():
+            return "new"
+
+        assert await cache.get_or_compute(1, "key", compute_during_write) == "old"
+        assert await cache.get_or_compute(1, "key", compute_fresh) == "new"
+        assert await cache.get_or_compute(1, "key", compute_during_write) == "new"
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        """При переполнении вытесняется давно не использованный ученик."""
+        cache = StudentCache(ttl=60, max_students=2)
+
+        async def value():
+            return object()
+
+        first = await cache.get_or_compute(1, "key", value)
+        await cache.get_or_compute(2, "key", value)
+        assert await cache.get_or_compute(1, "key", value) is first
+        await cache.get_or_compute(3, "key", value)  # вытесняет ученика 2
+
+        assert await cache.get_or_compute(1, "key", value) is first
+        assert 2 not in cache._entries
+
+
+class TestWeeklyReports:
+    """Тесты сохранённых недельных отчётов."""
+
+    @pytest.mark.asyncio
+    async def test_closed_week_served_from_store(self, db_session: AsyncSession):
+        """Отчёт за прошедшую неделю сохраняется и читается без пересчёта."""
+        student = await create_student(db_session)
+        await db_session.commit()
+
+        service = ProgressService(db_session)
+        service.compute_range_stats = fake_range_stats(student.id, completed=3)
+        history = await service.get_weekly_history(student.id, limit=2)
+
+        assert len(history) == 2
+        assert history[0].week_start > history[1].week_start
+        assert all(report.total_tasks == 21 for report in history)
+
+        # Повторный запрос не обращается к статистике попыток
+        get_progress_cache().clear()
+        service.compute_range_stats = fake_range_stats(student.id, completed=0)
+        report = await service.get_weekly_report(student.id, history[1].week_start)
+        assert report.total_tasks == 21
+
+    @pytest.mark.asyncio
+    async def test_edit_of_past_attempt_invalidates_week(self, db_session: AsyncSession):
+        """Правка попытки за прошедшую неделю удаляет отчёт этой недели."""
+        student = await create_student(db_session)
+        task = make_task(student.id)
+        db_session.add(task)
+        await db_session.flush()
+        attempt = make_attempt(task, 50)
+        # Среда три недели назад: соседние недели не задеваются
+        today = datetime.now(UTC).date()
+        wednesday = today - timedelta(days=today.weekday(), weeks=3) + timedelta(days=2)
+        attempt.started_at = datetime.combine(wednesday, datetime.min.time(), UTC).replace(hour=12)
+        db_session.add(attempt)
+        await db_session.commit()
+
+        service = ProgressService(db_session)
+        service.compute_range_stats = fake_range_stats(student.id, completed=1)
+        history = await service.get_weekly_history(student.id, limit=4)
+        weeks = await WeeklyReportService(db_session).get_many(
+            student.id, [date.fromisoformat(r.week_start) for r in history]
+        )
+        assert len(weeks) == 4
+
+        await TaskAttemptService(db_session).update_attempt(
+            attempt.id, TaskAttemptUpdate(score=90)
+        )
+
+        weeks = await WeeklyReportService(db_session).get_many(
+            student.id, [date.fromisoformat(r.week_start) for r in history]
+        )
+        assert len(weeks) == 3
+        assert all(
+            not (start <= attempt.started_at.date() <= start + timedelta(days=6))
+            for start in weeks
+        )
+
+    @pytest.mark.asyncio
+    async def test_current_week_skips_invalidation(self, db_session: AsyncSession):
+        """Попытка текущей недели не трогает сохранённые отчёты, прошлой — сбрасывает."""
+        student = await create_student(db_session)
+        await db_session.commit()
+        service = ProgressService(db_session)
+        service.compute_range_stats = fake_range_stats(student.id, completed=1)
+        history = await service.get_weekly_history(student.id, limit=1)
+        [start] = [date.fromisoformat(r.week_start) for r in history]
+
+        reports = WeeklyReportService(db_session)
+        executed = []
+        original = db_session.execute
+
+        async def tracking(statement, *args, **kwargs):
+            executed.append(statement)
+            return await original(statement, *args, **kwargs)
+
+        db_session.execute = tracking
+        # Через день после «завтра» по UTC: неделя не закрыта ни в одном поясе
+        await reports.invalidate(student.id, datetime.now(UTC) + timedelta(days=2))
+        assert executed == []
+
+        await reports.invalidate(student.id, datetime.combine(start, datetime.min.time(), UTC))
+        db_session.execute = original
+        assert len(executed) == 1
+        assert await reports.get_many(student.id, [start]) == {}
+
+    @pytest.mark.asyncio
+    async def test_saved_report_bypasses_stale_cache(self, db_session: AsyncSession):
+        """Сохраняемый отчёт считается по БД, даже если кэш периода устарел."""
+        student = await create_student(db_session)
+        await db_session.commit()
+        today = datetime.now(UTC).date()
+        monday = today - timedelta(days=today.weekday(), weeks=2)
+        sunday = monday + timedelta(days=6)
+
+        service = ProgressService(db_session)
+        service.compute_range_stats = fake_range_stats(student.id, completed=1)
+        cached = await service.get_range_stats(student.id, monday, sunday)
+        assert sum(s.tasks_completed for s in cached.stats) == 7
+
+        # Правка в другом воркере: данные и отчёт в БД меняются, кэш процесса — нет
+        service.compute_range_stats = fake_range_stats(student.id, completed=2)
+        reports = WeeklyReportService(db_session)
+        await reports.invalidate(student.id, datetime.combine(monday, datetime.min.time(), UTC))
+        await db_session.commit()
+
+        report = await service.get_weekly_report(student.id, monday.isoformat())
+        assert report.total_tasks == 14
+        stored = await reports.get_many(student.id, [monday])
+        assert stored[monday].total_tasks == 14
+
+
+def fake_range_stats(student_id: int, completed: int):
+    """Подмена get_range_stats: по `completed` заданий в каждый день периода."""
+
+    async def get_range_stats(student_id_, date_from, date_to, bucket=StatsBucket.DAY):
+        days = bucket_starts(date_from, date_to, StatsBucket.DAY)
+        return RangeStats(
+            student_id=student_id,
+            date_from=date_from.isoformat(),
+            date_to=date_to.isoformat(),
+            bucket=bucket,
+            timezone=get_settings().DEFAULT_TIMEZONE,
+            stats=[DailyStats(date=day.isoformat(), tasks_completed=completed) for day in days],
+        )
+
+    return get_range_stats
+
+
+class TestDifficultyController:
+    """Тесты контроллера сложности."""
+
+    def test_staircase_two_up_one_down(self):
+        """Два успеха подряд повышают сложность, неудача понижает."""
+        level = StudentSubjectLevel(
+            difficulty=DifficultyLevel.MEDIUM,
+            scaffolding_level=ScaffoldingLevel.MEDIUM_SUPPORT,
+            success_streak=0,
+        )
+
+        step_staircase(level, 0.9)
+        assert level.difficulty == DifficultyLevel.MEDIUM
+        step_staircase(level, 1.0)
+        assert level.difficulty == DifficultyLevel.HARD
+        step_staircase(level, 0.2)
+        assert level.difficulty == DifficultyLevel.MEDIUM
+        assert level.success_streak == 0
+
+    def test_staircase_adjusts_scaffolding_at_bounds(self):
+        """На краях шкалы сложности меняется поддержка."""
+        level = StudentSubjectLevel(
+            difficulty=DifficultyLevel.VERY_EASY,
+            scaffolding_level=ScaffoldingLevel.MEDIUM_SUPPORT,
+            success_streak=0,
+        )
+
+        step_staircase(level, 0.0)
+
+        assert level.difficulty == DifficultyLevel.VERY_EASY
+        assert level.scaffolding_level == ScaffoldingLevel.HIGH_SUPPORT
+
+    @pytest.mark.asyncio
+    async def test_graded_attempts_move_subject_level(self, db_session: AsyncSession):
+        """Оценка попыток сдвигает уровень предмета и профиль ученика."""
+        student = await create_student(db_session)
+        profile = StudentProfile(student_id=student.id, current_difficulty=DifficultyLevel.EASY)
+        task = make_task(student.id)
+        db_session.add_all([profile, task])
+        await db_session.commit()
+
+        service = TaskAttemptService(db_session)
+        for _ in range(2):
+            attempt = await service.start_attempt(
+                TaskAttemptCreate(task_id=task.id, student_id=student.id)
+            )
+            await service.submit_attempt(
+                attempt.id, TaskAttemptSubmit(answers={}, time_spent=30), student.id
+            )
+            await service.update_attempt(attempt.id, TaskAttemptUpdate(score=90))
+
+        # Переоценка не двигает лестницу повторно
+        await service.update_attempt(attempt.id, TaskAttemptUpdate(score=95))
+
+        level = await DifficultyController(db_session).get_level(student.id, Subject.MATH)
+        assert level.difficulty == DifficultyLevel.MEDIUM
+        await db_session.refresh(profile)
+        assert profile.current_difficulty == DifficultyLevel.MEDIUM
+
+        progress = await ProgressService(db_session).get_subject_progress(student.id, Subject.MATH)
+        assert progress.current_difficulty == DifficultyLevel.MEDIUM
+
+
+class TestReviewSchedule:
+    """Тесты интервального повторения."""
+
+    def test_intervals_grow_and_reset(self):
+        """Успехи удлиняют интервал, неудача сбрасывает серию."""
+        item = ReviewSchedule(easiness=2.5, interval_days=0, repetitions=0)
+        now = datetime(2025, 1, 6, 10, tzinfo=UTC)
+
+        intervals = []
+        for _ in range(3):
+            schedule_review(item, 5, now)
+            intervals.append(item.interval_days)
+            now = item.due_at
+        assert intervals == [1, 6, 16]
+
+        # Раньше срока успех интервал не удлиняет
+        schedule_review(item, 5, now - timedelta(days=3))
+        assert item.interval_days == 16
+
+        schedule_review(item, 1, now)
+        assert (item.repetitions, item.interval_days) == (0, 1)
+        assert item.easiness < 2.8
+        assert item.due_at == now + timedelta(days=1)
+
+    @pytest.mark.asyncio
+    async def test_grading_schedules_due_topics(self, db_session: AsyncSession):
+        """Оценка попытки ставит тему в очередь ученика и класса."""
+        organization = Organization(name="Школа №1")
+        db_session.add(organization)
+        await db_session.flush()
+        school_class = Class(
+            name="3А", grade=3, academic_year="2024-2025", organization_id=organization.id
+        )
+        db_session.add(school_class)
+        await db_session.flush()
+
+        student = await create_student(db_session)
+        student.class_id = school_class.id
+        task = make_task(student.id, topic="Дроби")
+        db_session.add(task)
+        await db_session.commit()
+
+        service = TaskAttemptService(db_session)
+        attempt = await service.start_attempt(
+            TaskAttemptCreate(task_id=task.id, student_id=student.id)
+        )
+        await service.submit_attempt(
+            attempt.id, TaskAttemptSubmit(answers={}, time_spent=30), student.id
+        )
+        await service.update_attempt(attempt.id, TaskAttemptUpdate(score=20))
+
+        scheduler = ReviewScheduler(db_session)
+        now = datetime.now(UTC)
+        assert await scheduler.get_due(student.id, now) == []
+
+        [due] = await scheduler.get_due(student.id, now + timedelta(days=1, minutes=1))
+        assert (due.topic, due.interval_days, due.repetitions) == ("Дроби", 1, 0)
+
+        [class_due] = await scheduler.get_class_due_today(
+            school_class.id, now + timedelta(days=1)
+        )
+        assert class_due.student_id == student.id
+
+        with pytest.raises(NotFoundException):
+            await scheduler.get_class_due_today(school_class.id + 1, now)
+
+
+async def create_goal(
+    db: AsyncSession,
+    student: Student,
+    target_metric: str,
+    target_value: float,
+) -> IEPGoal:
+    """Создать ИОП с одной целью для тестов."""
+    teacher = User(
+        email=f"goal{student.id}@test.com",
+        hashed_password="hash",
+        role=UserRole.TEACHER,
+        first_name="Учитель",
+        last_name="Целей",
+    )
+    db.add(teacher)
+    await db.flush()
+
+    iep = IEP(
+        student_id=student.id,
+        created_by_id=teacher.id,
+        title="ИОП",
+        status=IEPStatus.ACTIVE,
+        start_date=date.today(),
+        end_date=date.today() + timedelta(days=180),
+    )
+    db.add(iep)
+    await db.flush()
+
+    goal = IEPGoal(
+        iep_id=iep.id,
+        subject=Subject.MATH,
+        title="Цель",
+        target_metric=target_metric,
+        target_value=target_value,
+    )
+    db.add(goal)
+    await db.flush()
+    return goal
+
+
+class TestGoalMetrics:
+    """Тесты автоматического прогресса целей ИОП."""
+
+    def test_parse_goal_metric(self):
+        """Метрика распознаётся по описанию, прочие ведутся вручную."""
+        assert parse_goal_metric("правильных ответов %") == GoalMetric.PERCENT_CORRECT
+        assert parse_goal_metric("Средний балл") == GoalMetric.AVERAGE_SCORE
+        assert parse_goal_metric("среднее время, сек") == GoalMetric.AVERAGE_TIME
+        assert parse_goal_metric("выполненных заданий") == GoalMetric.TASKS_COMPLETED
+        assert parse_goal_metric("слов в минуту") is None
+
+    def test_parse_goal_unit(self):
+        """Единица распознаётся целыми словами, а не подстрокой."""
+        assert parse_goal_unit("среднее время, мин") == GoalUnit.MINUTES
+        assert parse_goal_unit("время решения (минут)") == GoalUnit.MINUTES
+        assert parse_goal_unit("среднее время, сек") == GoalUnit.SECONDS
+        assert parse_goal_unit("время на задание, минимум") is None
+
+    @pytest.mark.asyncio
+    async def test_goal_update_recomputes_value(self, db_session: AsyncSession):
+        """Смена метрики или целевого значения пересчитывает значение и статус."""
+        student = await create_student(db_session)
+        goal = await create_goal(db_session, student, "средний балл", 90)
+        task = make_task(student.id)
+        task.iep_goal_id = goal.id
+        db_session.add(task)
+        await db_session.flush()
+        db_session.add(make_attempt(task, 70, time_spent=120))
+        await GoalMetricService(db_session).recompute([goal.id])
+        await db_session.commit()
+
+        service = IEPService(db_session)
+        goal = await service.update_goal(goal.id, IEPGoalUpdate(target_value=60))
+        assert goal.current_value == pytest.approx(70.0)
+        assert goal.status == GoalStatus.ACHIEVED
+
+        goal = await service.update_goal(
+            goal.id, IEPGoalUpdate(target_metric="среднее время, мин", target_value=3)
+        )
+        assert goal.target_unit == GoalUnit.MINUTES
+        assert goal.current_value == pytest.approx(2.0)
+        assert goal.status == GoalStatus.ACHIEVED
+
+        goal = await service.update_goal(goal.id, IEPGoalUpdate(target_unit=GoalUnit.SECONDS))
+        assert goal.current_value == pytest.approx(120.0)
+        assert goal.status == GoalStatus.IN_PROGRESS
+
+    @pytest.mark.asyncio
+    async def test_attempts_update_goal(self, db_session: AsyncSession):
+        """Оценка попыток по заданиям цели обновляет значение и статус."""
+        student = await create_student(db_session)
+        goal = await create_goal(db_session, student, "правильных ответов %", 75)
+        task = make_task(student.id)
+        task.iep_goal_id = goal.id
+        db_session.add(task)
+        await db_session.commit()
+
+        service = TaskAttemptService(db_session)
+        for is_correct in (True, False, True, True):
+            attempt = await service.start_attempt(
+                TaskAttemptCreate(task_id=task.id, student_id=student.id)
+            )
+            await service.submit_attempt(
+                attempt.id, TaskAttemptSubmit(answers={}, time_spent=30), student.id
+            )
+            await service.update_attempt(
+                attempt.id, TaskAttemptUpdate(score=80, is_correct=is_correct)
+            )
+
+        await db_session.refresh(goal)
+        assert goal.current_value == pytest.approx(75.0)
+        assert goal.status == GoalStatus.ACHIEVED
+
+        # Переоценка пересчитывает сумму, а не добавляет попытку
+        await service.update_attempt(attempt.id, TaskAttemptUpdate(is_correct=False))
+        await db_session.refresh(goal)
+        assert goal.current_value == pytest.approx(50.0)
+        assert goal.status == GoalStatus.IN_PROGRESS
+
+        await TaskService(db_session).complete(task.id)
+        progress = await ProgressService(db_session).get_goal_progress(goal.id)
+        assert progress.tasks_completed == 1
+        assert progress.average_score == pytest.approx(80.0)
+        assert progress.current_progress == pytest.approx(50.0)
+
+        # Полный пересчёт совпадает с инкрементальным
+        assert await GoalMetricService(db_session).recompute() == 1
+        await db_session.refresh(goal)
+        assert (goal.attempts_count, goal.correct_count, goal.tasks_completed) == (4, 2, 1)
+        assert goal.current_value == pytest.approx(50.0)
+
+    @pytest.mark.asyncio
+    async def test_iep_goals_progress(self, db_session: AsyncSession):
+        """Прогресс всех целей ИОП — в порядке отображения."""
+        student = await create_student(db_session)
+        score_goal = await create_goal(db_session, student, "средний балл", 90)
+        manual_goal = IEPGoal(
+            iep_id=score_goal.iep_id,
+            subject=Subject.READING,
+            title="Скорость чтения",
+            target_metric="слов в минуту",
+            target_value=60,
+            current_value=45,
+            status=GoalStatus.IN_PROGRESS,
+            order=-1,
+        )
+        task = make_task(student.id)
+        task.iep_goal_id = score_goal.id
+        db_session.add_all([manual_goal, task])
+        await db_session.flush()
+        db_session.add(make_attempt(task, 70))
+        await GoalMetricService(db_session).recompute([score_goal.id])
+        await db_session.commit()
+
+        service = ProgressService(db_session)
+        progress = await service.get_iep_goals_progress(score_goal.iep_id)
+
+        assert [p.goal_description for p in progress] == ["Скорость чтения", "Цель"]
+        assert progress[0].current_progress == 45
+        assert progress[1].current_progress == pytest.approx(70.0)
+        assert progress[1].average_score == pytest.approx(70.0)
+        assert progress[1].status == GoalStatus.IN_PROGRESS
+
+        with pytest.raises(NotFoundException):
+            await service.get_iep_goals_progress(score_goal.iep_id + 1)
+
+
+class TestExport:
+    """Тесты потоковой выгрузки."""
+
+    @pytest.mark.asyncio
+    async def test_attempts_stream_by_class(self, db_session: AsyncSession):
+        """Выгрузка фильтрует по классу и отдаёт кусок на пачку строк."""
+        organization = Organization(name="Школа №1")
+        db_session.add(organization)
+        await db_session.flush()
+        school_class = Class(
+            name="3А", grade=3, academic_year="2024-2025", organization_id=organization.id
+        )
+        db_session.add(school_class)
+        await db_session.flush()
+
+        pupil = await create_student(db_session)
+        pupil.class_id = school_class.id
+        outsider = await create_student(db_session)
+        tasks = [make_task(pupil.id), make_task(outsider.id)]
+        db_session.add_all(tasks)
+        await db_session.flush()
+        db_session.add_all([make_attempt(tasks[0], score) for score in (10, 20, 30)])
+        db_session.add(make_attempt(tasks[1], 40))
+        await db_session.commit()
+
+        service = ExportService(db_session)
+        query = service.attempts_query(ExportFilters(class_id=school_class.id))
+
+        chunks = [
+            chunk
+            async for chunk in service.stream(
+                query, make_encoder(ExportFormat.CSV, query), chunk_size=2
+            )
+        ]
+        lines = b"".join(chunks).decode().splitlines()
+        assert lines[0].startswith("id,task_id,student_id,subject,topic")
+        assert len(lines) == 4
+        assert len([chunk for chunk in chunks if chunk]) == 3  # заголовок + 2 пачки
+
+        ndjson = b"".join([
+            chunk
+            async for chunk in service.stream(query, make_encoder(ExportFormat.NDJSON, query))
+        ])
+        rows = [json.loads(line) for line in ndjson.decode().splitlines()]
+        assert [row["score"] for row in rows] == [10, 20, 30]
+        assert {row["student_id"] for row in rows} == {pupil.id}
+        assert rows[0]["subject"] == Subject.MATH
+
+
+class TestCohortSketches:
+    """Тесты сравнения с когортами."""
+
+    def test_sketch_ranks_after_merge(self):
+        """Слитые скетчи дают ранги с ошибкой около 1/k и сохраняют вес."""
+        rng = np.random.default_rng(0)
+        values = rng.normal(50, 15, 20000)
+        parts = [QuantileSketch() for _ in range(4)]
+        for i, value in enumerate(values):
+            parts[i % 4].update(value)
+
+        sketch = QuantileSketch.from_dict(parts[0].to_dict())
+        for part in parts[1:]:
+            sketch.merge(part)
+
+        assert sketch.count == len(values)
+        assert sum(len(items) << level for level, items in enumerate(sketch.levels)) == len(values)
+        assert sum(len(items) for items in sketch.levels) < 1000
+        for q in (0.1, 0.5, 0.9):
+            assert sketch.rank(float(np.quantile(values, q))) == pytest.approx(q, abs=0.03)
+
+    @pytest.mark.asyncio
+    async def test_positions_from_student_averages(self, db_session: AsyncSession):
+        """Скетчи копят средние учеников при пересборке, отправки их не трогают."""
+        organization = Organization(name="Школа №1")
+        db_session.add(organization)
+        await db_session.flush()
+        school_class = Class(
+            name="4А", grade=4, academic_year="2024-2025", organization_id=organization.id
+        )
+        db_session.add(school_class)
+        await db_session.flush()
+
+        strong = await create_student(db_session, grade=4)
+        middle = await create_student(db_session, grade=4)
+        weak = await create_student(db_session, grade=4)
+        strong.class_id = middle.class_id = school_class.id
+        db_session.add(StudentProfile(student_id=weak.id, disability_types=["adhd"]))
+        students = (strong, middle, weak)
+        tasks = {student.id: make_task(student.id) for student in students}
+        db_session.add_all(tasks.values())
+        await db_session.commit()
+
+        service = TaskAttemptService(db_session)
+        for student, scores in zip(students, ((90, 100), (70,), (20, 40, 60)), strict=True):
+            for score in scores:
+                attempt = await service.start_attempt(
+                    TaskAttemptCreate(task_id=tasks[student.id].id, student_id=student.id)
+                )
+                await service.submit_attempt(
+                    attempt.id, TaskAttemptSubmit(answers={}, time_spent=30), student.id
+                )
+                await service.update_attempt(attempt.id, TaskAttemptUpdate(score=score))
+
+        cohorts = CohortSketchService(db_session)
+        assert await cohorts.get_positions(strong.id) == []
+
+        assert await cohorts.rebuild() == 3
+        positions = {
+            (p.cohort, p.metric): p for p in await cohorts.get_positions(middle.id)
+        }
+        grade_score = positions[("grade:4", CohortMetric.SCORE)]
+        assert grade_score.cohort_students == 3
+        assert grade_score.value == pytest.approx(70.0)
+        assert grade_score.percentile == pytest.approx(66.7)
+        assert grade_score.cohort_median == pytest.approx(70.0)
+        assert positions[("grade:4", CohortMetric.TIME)].percentile == 100.0
+        # Параллель слита из частей «с классом» и «без класса»
+        class_score = positions[(f"class:{school_class.id}", CohortMetric.SCORE)]
+        assert (class_score.cohort_students, class_score.percentile) == (2, 50.0)
+
+        weak_positions = await cohorts.get_positions(weak.id)
+        assert {p.cohort for p in weak_positions} == {"grade:4", "disability:adhd"}
+        assert await CohortSketchService(db_session).rebuild() == 3
+        adhd_score = next(
+            p for p in weak_positions
+            if (p.cohort, p.metric) == ("disability:adhd", CohortMetric.SCORE)
+        )
+        assert (adhd_score.cohort_students, adhd_score.percentile) == (1, 100.0)
+
+
+class TestSnapshotMode:
+    """Тесты чтения из материализованных представлений (режим снимка)."""
+
+    REFRESHED_AT = datetime(2024, 5, 1, 3, 0)
+
+    @staticmethod
+    async def create_views(db: AsyncSession) -> None:
+        """Представления в SQLite — обычные таблицы с теми же колонками."""
+        connection = await db.connection()
+        await connection.run_sync(views_metadata.create_all)
+
+    @pytest.mark.asyncio
+    async def test_topic_stats_include_skill(self, db_session: AsyncSession):
+        """Снимок тем отдаёт навык и время так же, как живой режим."""
+        student = await create_student(db_session)
+        await self.create_views(db_session)
+        await db_session.execute(insert(student_topic_mastery_view), [
+            {
+                "student_id": student.id, "subject": Subject.MATH, "topic": "Дроби",
+                "task_count": 2, "completed_count": 1, "attempts_count": 3,
+                "correct_count": 1, "avg_score": 40.0, "scored_count": 3,
+                "time_sum": 600, "skill_rating": -1.0, "skill_updates": 3,
+                "refreshed_at": self.REFRESHED_AT,
+            },
+            {
+                "student_id": student.id, "subject": Subject.MATH, "topic": "Счёт",
+                "task_count": 1, "completed_count": 1, "attempts_count": 1,
+                "correct_count": 1, "avg_score": 100.0, "scored_count": 1,
+                "time_sum": 120, "skill_rating": 2.0, "skill_updates": 1,
+                "refreshed_at": self.REFRESHED_AT,
+            },
+        ])
+        await db_session.commit()
+
+        live = await ProgressService(db_session).get_subject_progress(student.id, Subject.MATH)
+        assert live.total_tasks == 0
+        assert live.data_as_of is None
+
+        progress = await ProgressService(db_session, ReadMode.SNAPSHOT).get_subject_progress(
+            student.id, Subject.MATH
+        )
+        assert progress.total_tasks == 3
+        assert progress.average_score == pytest.approx(55.0)
+        assert progress.weak_topics == ["Дроби"]
+        assert progress.current_difficulty == skill_level(-0.25)[0]
+        assert progress.data_as_of.replace(tzinfo=None) == self.REFRESHED_AT
+
+        analytics = await AnalyticsService(db_session, ReadMode.SNAPSHOT).get_full_analytics(
+            student.id
+        )
+        assert [(s.skill_name, s.total_practice_time) for s in analytics.skill_levels] == [
+            ("Счёт", 2),
+            ("Дроби", 10),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_range_and_weekly_report(self, db_session: AsyncSession):
+        """Дни снимка суммируются по интервалам, отчёт из снимка не сохраняется."""
+        student = await create_student(db_session)
+        await self.create_views(db_session)
+        monday = date(2024, 4, 1)
+        await db_session.execute(insert(student_daily_stats_view), [
+            {
+                "student_id": student.id, "day": monday + timedelta(days=offset),
+                "tasks_attempted": 2, "tasks_completed": 2, "correct_answers": 1,
+                "time_spent": 300, "hints_used": 1, "refreshed_at": self.REFRESHED_AT,
+            }
+            for offset in (0, 3, 7)
+        ])
+        await db_session.commit()
+
+        service = ProgressService(db_session, ReadMode.SNAPSHOT)
+        range_stats = await service.get_range_stats(
+            student.id, monday, monday + timedelta(days=13), StatsBucket.WEEK
+        )
+        assert [(s.date, s.tasks_completed) for s in range_stats.stats] == [
+            ("2024-04-01", 4),
+            ("2024-04-08", 2),
+        ]
+        assert range_stats.data_as_of is not None
+
+        report = await service.get_weekly_report(student.id, monday.isoformat())
+        assert report.total_tasks == 4
+        assert report.data_as_of is not None
+        stored = await db_session.execute(select(func.count()).select_from(WeeklyReportSnapshot))
+        assert stored.scalar() == 0
+
+    @pytest.mark.asyncio
+    async def test_goal_progress_from_view(self, db_session: AsyncSession):
+        """Прогресс цели берёт задания и балл из снимка, без строки снимка — нули."""
+        student = await create_student(db_session)
+        goal = await create_goal(db_session, student, "средний балл", 90)
+        await self.create_views(db_session)
+        await db_session.commit()
+
+        service = ProgressService(db_session, ReadMode.SNAPSHOT)
+        progress = await service.get_goal_progress(goal.id)
+        assert (progress.tasks_completed, progress.average_score) == (0, 0)
+        assert progress.data_as_of is None
+
+        await db_session.execute(insert(goal_progress_view).values(
+            goal_id=goal.id, iep_id=goal.iep_id, student_id=student.id, tasks_total=3,
+            tasks_completed=2, average_score=75.0, refreshed_at=self.REFRESHED_AT,
+        ))
+        await db_session.commit()
+
+        progress = await service.get_goal_progress(goal.id)
+        assert (progress.tasks_completed, progress.average_score) == (2, 75.0)
+        assert progress.data_as_of is not None
+
+
+class TestKeysetPagination:
+    """Тесты курсорной пагинации списков."""
+
+    @pytest.mark.asyncio
+    async def test_pages_cover_list_once(self, db_session: AsyncSession):
+        """Страницы идут от новых к старым без пропусков и повторов, в том числе при равном времени."""
+        student = await create_student(db_session)
+        created = datetime(2026, 3, 2, 10, 0, tzinfo=UTC)
+        tasks = [make_task(student.id, topic=f"Тема {i}") for i in range(5)]
+        for i, task in enumerate(tasks):
+            # Два задания с одинаковым временем — порядок между ними по id
+            task.created_at = created + timedelta(minutes=min(i, 3))
+        db_session.add_all(tasks)
+        await db_session.commit()
+
+        service = TaskService(db_session)
+        seen, cursor, pages = [], None, 0
+        while True:
+            items, cursor = await service.get_all(cursor=cursor, limit=2, student_id=student.id)
+            seen.extend(task.id for task in items)
+            pages += 1
+            if cursor is None:
+                break
+
+        expected = sorted(tasks, key=lambda task: (task.created_at, task.id), reverse=True)
+        assert seen == [task.id for task in expected]
+        assert pages == 3
+
+        # Вставка нового задания не сдвигает уже начатый обход
+        first, cursor = await service.get_all(limit=2, student_id=student.id)
+        db_session.add(make_task(student.id, topic="Новая"))
+        await db_session.commit()
+        second, _ = await service.get_all(cursor=cursor, limit=2, student_id=student.id)
+        assert [task.id for task in first + second] == seen[:4]
+
+        with pytest.raises(BadRequestException):
+            await service.get_all(cursor="не-курсор")
+
+    @pytest.mark.asyncio
+    async def test_attempt_pages(self, db_session: AsyncSession):
+        """Попытки ученика листаются по времени начала."""
+        student = await create_student(db_session)
+        task = make_task(student.id)
+        db_session.add(task)
+        await db_session.flush()
+        attempts = [make_attempt(task, score=50) for _ in range(3)]
+        for i, attempt in enumerate(attempts):
+            attempt.started_at = datetime(2026, 3, 2, 10, i, tzinfo=UTC)
+        db_session.add_all(attempts)
+        await db_session.commit()
+
+        service = TaskAttemptService(db_session)
+        first, cursor = await service.get_by_student(student.id, limit=2)
+        second, last_cursor = await service.get_by_student(student.id, cursor=cursor, limit=2)
+
+        assert [a.id for a in first + second] == [a.id for a in reversed(attempts)]
+        assert last_cursor is None
@@ -2,23 +2,39 @@
 Тесты сервисов.
 """
 import pytest
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.constants import (
+    AttemptEventType,
     DifficultyLevel,
     DisabilityType,
     LearningStyle,
     ScaffoldingLevel,
     Subject,
     TaskStatus,
+    UserRole,
 )
-from app.core.exceptions import NotFoundException
+from app.core.exceptions import BadRequestException, ForbiddenException, NotFoundException
+from app.models.progress import AttemptEvent
 from app.models.student import Student, StudentProfile
 from app.models.task import Task
+from app.models.user import User
 from app.schemas.student import StudentCreate, StudentProfileCreate
-from app.schemas.task import TaskCreate, TaskTemplateCreate
+from app.schemas.task import (
+    AttemptEventCreate,
+    TaskAttemptCreate,
+    TaskAttemptSubmit,
+    TaskBulkCreate,
+    TaskCreate,
+    TaskListResponse,
+    TaskResponse,
+    TaskTemplateCreate,
+)
+from app.services.grading import grade_attempt
 from app.services.student import StudentService
-from app.services.task import TaskService, TaskTemplateService
+from app.services.task import TaskAttemptService, TaskService, TaskTemplateService
+from app.services.telemetry import AttemptEventBuffer
 
 
 class TestStudentService:
@@ -156,6 +172,62 @@ class TestTaskService:
 
         assert completed.status == TaskStatus.COMPLETED
 
+    @pytest.mark.asyncio
+    async def test_lists_skip_task_payload(self, db_session: AsyncSession):
+        """Списки читают только колонки схемы, карточка задания — все поля."""
+        student = Student(first_name="Список", last_name="Тест", grade=2)
+        db_session.add(student)
+        await db_session.commit()
+
+        service = TaskService(db_session)
+        created = await service.create(TaskCreate(
+            title="С контентом",
+            student_id=student.id,
+            subject=Subject.MATH,
+            topic="Счёт",
+            difficulty=DifficultyLevel.EASY,
+            content={"type": "fill_blank", "question": "1 + 2 = ?"},
+        ))
+        assert TaskResponse.model_validate(created).content["question"] == "1 + 2 = ?"
+        db_session.expunge_all()
+
+        [listed] = await service.get_by_student(student.id)
+        assert isinstance(listed, TaskListResponse)
+        assert listed.id == created.id
+        assert not db_session.identity_map
+
+        task = await service.get_by_id(created.id)
+        assert task.content == {"type": "fill_blank", "question": "1 + 2 = ?"}
+
+    @pytest.mark.asyncio
+    async def test_create_many(self, db_session: AsyncSession):
+        """Пачка заданий пишется одной транзакцией в порядке запроса."""
+        students = [Student(first_name=f"Класс{i}", last_name="Тест", grade=2) for i in range(2)]
+        db_session.add_all(students)
+        await db_session.commit()
+
+        def item(student_id: int, number: int) -> TaskCreate:
+            return TaskCreate(
+                title=f"Банк {number}",
+                student_id=student_id,
+                subject=Subject.MATH,
+                topic="Счёт",
+                difficulty=DifficultyLevel.EASY,
+                content={"type": "fill_blank", "question": f"{number} + 1 = ?"},
+            )
+
+        service = TaskService(db_session)
+        items = [item(students[i % 2].id, i) for i in range(5)]
+        created = await service.create_many(TaskBulkCreate(tasks=items))
+
+        assert [task.title for task in created] == [f"Банк {i}" for i in range(5)]
+        assert all(task.status == TaskStatus.ACTIVE for task in created)
+        assert len(await service.get_by_student(students[0].id)) == 3
+
+        with pytest.raises(BadRequestException, match="999"):
+            await service.create_many(TaskBulkCreate(tasks=[item(students[0].id, 5), item(999, 6)]))
+        assert len(await service.get_by_student(students[0].id)) == 3
+
 
 class TestTaskTemplateService:
     """Тесты сервиса шаблонов."""
@@ -253,3 +325,229 @@ class TestAdapters:
         assert full_support.scaffolding_level == 1
         assert independent.scaffolding_level == 5
         assert len(full_support.content_modifications) > len(independent.content_modifications)
+
+
+class TestGrading:
+    """Тесты автопроверки ответов."""
+
+    def test_multiple_choice(self):
+        """Выбор засчитывается по тексту, букве или номеру варианта."""
+        content = {"type": "multiple_choice", "options": ["3", "4", "5"], "correct_answer": "4"}
+        assert grade_attempt(content, {"answer": "4"}).is_correct
+        assert grade_attempt(content, {"answer": "Б"}).is_correct
+        assert grade_attempt(content, {"answer": 2}).is_correct
+        assert grade_attempt(content, {"answer": "5"}).score == 0
+
+    def test_fill_blank_normalization_and_typos(self):
+        """Пропуск сверяется без учёта регистра, ё и опечаток в длинных словах."""
+        content = {"type": "fill_blank", "correct_answer": "Ёжик"}
+        assert grade_attempt(content, {"text": " ежик. "}).is_correct
+        assert grade_attempt({"type": "fill_blank", "correct_answer": "молоко"}, {"answer": "малоко"}).is_correct
+        assert not grade_attempt({"type": "fill_blank", "correct_answer": "кот"}, {"answer": "кит"}).is_correct
+        assert grade_attempt({"type": "fill_blank", "correct_answer": "3,5"}, {"answer": "3.5"}).is_correct
+        assert not grade_attempt({"type": "fill_blank", "correct_answer": "15"}, {"answer": "16"}).is_correct
+
+        blanks = {"type": "fill_blank", "correct_answer": ["мама", "рама"]}
+        assert grade_attempt(blanks, {"answer": ["мама", "дом"]}).score == 50
+
+    def test_partial_credit(self):
+        """Сопоставление и порядок оцениваются частично."""
+        matching = {"type": "matching", "correct_answer": {"кошка": "мяу", "собака": "гав"}}
+        grade = grade_attempt(matching, {"answer": {"Кошка": "мяу", "собака": "мяу"}})
+        assert grade.score == 50 and not grade.is_correct
+
+        ordering = {"type": "ordering", "correct_answer": ["1", "2", "3", "4"]}
+        assert grade_attempt(ordering, {"answer": ["1", "2", "3", "4"]}).is_correct
+        assert grade_attempt(ordering, {"answer": ["2", "1", "3", "4"]}).score == 75
+
+    def test_not_gradable(self):
+        """Развёрнутый ответ и задание без правильного ответа не оцениваются."""
+        assert grade_attempt({"type": "open_ended", "correct_answer": "x"}, {"answer": "x"}) is None
+        assert grade_attempt({"type": "multiple_choice", "question": "?"}, {"answer": "x"}) is None
+
+    @pytest.mark.asyncio
+    async def test_submit_grades_attempt(self, db_session: AsyncSession):
+        """Отправка сразу проставляет балл и правильность."""
+        student = Student(first_name="Проверка", last_name="Тест", grade=2)
+        db_session.add(student)
+        await db_session.flush()
+        task = Task(
+            title="Порядок",
+            student_id=student.id,
+            subject=Subject.MATH,
+            topic="Счёт",
+            difficulty=DifficultyLevel.EASY,
+            content={"type": "ordering", "correct_answer": ["1", "2", "3", "4"]},
+        )
+        db_session.add(task)
+        await db_session.commit()
+
+        service = TaskAttemptService(db_session)
+        attempt = await service.start_attempt(TaskAttemptCreate(task_id=task.id, student_id=student.id))
+        attempt = await service.submit_attempt(
+            attempt.id,
+            TaskAttemptSubmit(answers={"answer": ["1", "3", "2", "4"]}, time_spent=20),
+            student.id,
+        )
+
+        assert attempt.score == 75
+        assert attempt.is_correct is False
+
+
+class TestAttemptMutations:
+    """Тесты изменений попытки одним запросом."""
+
+    @pytest.mark.asyncio
+    async def test_start_hint_submit(self, db_session: AsyncSession):
+        """Попытка заводится по заданию, подсказки копятся, повторная отправка отклоняется."""
+        student = Student(first_name="Урок", last_name="Тест", grade=2)
+        db_session.add(student)
+        await db_session.flush()
+        task = Task(
+            title="Пропуск",
+            student_id=student.id,
+            subject=Subject.RUSSIAN,
+            topic="Буквы",
+            difficulty=DifficultyLevel.EASY,
+            content={"type": "fill_blank", "correct_answer": "мама"},
+        )
+        db_session.add(task)
+        await db_session.commit()
+
+        service = TaskAttemptService(db_session)
+        attempt = await service.start_task_attempt(task.id)
+        assert attempt.student_id == student.id
+        assert attempt.hints_used == 0 and attempt.answers == {}
+
+        await service.use_hint(attempt.id)
+        attempt = await service.use_hint(attempt.id, student.id)
+        assert attempt.hints_used == 2
+
+        with pytest.raises(ForbiddenException, match="не ваша"):
+            await service.use_hint(attempt.id, student.id + 1)
+
+        # Задание читается при отправке один раз, обработчики его не перечитывают
+        task_reads = []
+        original = db_session.execute
+
+        async def tracking(statement, *args, **kwargs):
+            if statement.is_select and Task.__table__ in statement.get_final_froms()[0]._from_objects:
+                task_reads.append(statement)
+            return await original(statement, *args, **kwargs)
+
+        db_session.execute = tracking
+        attempt = await service.submit_attempt(attempt.id, TaskAttemptSubmit(answers={"answer": "Мама"}))
+        db_session.execute = original
+        assert attempt.is_correct and attempt.completed_at is not None
+        assert len(task_reads) == 1
+
+        with pytest.raises(ForbiddenException, match="завершена"):
+            await service.submit_attempt(attempt.id, TaskAttemptSubmit(answers={"answer": "папа"}))
+        with pytest.raises(ForbiddenException, match="завершена"):
+            await service.use_hint(attempt.id)
+        with pytest.raises(NotFoundException):
+            await service.start_task_attempt(task.id + 100)
+
+    @pytest.mark.asyncio
+    async def test_owner_checked_in_update(self, db_session: AsyncSession):
+        """Ученик и родитель меняют только свои попытки, чужая не затрагивается."""
+        users = [
+            User(email=f"owner{i}@test.ru", hashed_password="x", first_name="В", last_name="Л", role=role)
+            for i, role in enumerate((UserRole.STUDENT, UserRole.STUDENT, UserRole.PARENT))
+        ]
+        db_session.add_all(users)
+        await db_session.flush()
+        student = Student(
+            first_name="Свой", last_name="Тест", grade=2, user_id=users[0].id, parent_id=users[2].id
+        )
+        db_session.add(student)
+        await db_session.flush()
+        task = Task(
+            title="Чужое",
+            student_id=student.id,
+            subject=Subject.MATH,
+            topic="Счёт",
+            difficulty=DifficultyLevel.EASY,
+            content={"type": "fill_blank", "correct_answer": "2"},
+        )
+        db_session.add(task)
+        await db_session.commit()
+
+        service = TaskAttemptService(db_session)
+        attempt = await service.start_task_attempt(task.id)
+        stranger = TaskAttemptService.owner_condition(UserRole.STUDENT, users[1].id)
+
+        with pytest.raises(ForbiddenException, match="не ваша"):
+            await service.use_hint(attempt.id, owner=stranger)
+        with pytest.raises(ForbiddenException, match="не ваша"):
+            await service.submit_attempt(attempt.id, TaskAttemptSubmit(answers={"answer": "2"}), owner=stranger)
+        attempt = await service.get_by_id(attempt.id)
+        assert attempt.hints_used == 0 and attempt.completed_at is None
+
+        with pytest.raises(NotFoundException):
+            await service.check_open(attempt.id, stranger)
+
+        parent = TaskAttemptService.owner_condition(UserRole.PARENT, users[2].id)
+        assert (await service.use_hint(attempt.id, owner=parent)).hints_used == 1
+        own = TaskAttemptService.owner_condition(UserRole.STUDENT, users[0].id)
+        await service.check_open(attempt.id, own)
+        attempt = await service.submit_attempt(attempt.id, TaskAttemptSubmit(answers={"answer": "2"}), owner=own)
+        assert attempt.is_correct
+        with pytest.raises(NotFoundException):
+            await service.check_open(attempt.id, own)
+        assert TaskAttemptService.owner_condition(UserRole.TEACHER, users[2].id) is None
+
+
+class TestAttemptEventBuffer:
+    """Тесты буфера телеметрии попыток."""
+
+    @pytest.mark.asyncio
+    async def test_flush_in_batches(self, db_session: AsyncSession):
+        """Буфер сигналит о заполнении и пишет события пачками."""
+        buffer = AttemptEventBuffer(batch_size=3, max_buffered=100)
+        events = [AttemptEventCreate(type=AttemptEventType.OPTION_CHANGE, payload={"option": i}) for i in range(4)]
+
+        assert buffer.add(1, events[:2]) == 2
+        assert not buffer._full.is_set()
+        buffer.add(2, events[2:])
+        assert buffer._full.is_set()
+
+        assert await buffer.flush(db_session) == 4
+        assert len(buffer) == 0
+        assert await buffer.flush(db_session) == 0
+
+        result = await db_session.execute(
+            select(AttemptEvent.attempt_id, func.count()).group_by(AttemptEvent.attempt_id)
+        )
+        assert dict(result.all()) == {1: 2, 2: 2}
+
+    def test_overflow_drops_oldest(self):
+        """Переполненный буфер отбрасывает самые старые события."""
+        buffer = AttemptEventBuffer(batch_size=10, max_buffered=3)
+        buffer.add(1, [AttemptEventCreate(type=AttemptEventType.HEARTBEAT)] * 2)
+        buffer.add(2, [AttemptEventCreate(type=AttemptEventType.HINT_VIEW)] * 2)
+
+        assert len(buffer) == 3
+        assert [row["attempt_id"] for row in buffer._rows] == [1, 2, 2]
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_newest(self):
+        """Незаписанная пачка возвращается без вытеснения пришедших во время записи."""
+        buffer = AttemptEventBuffer(batch_size=2, max_buffered=4)
+        buffer.add(1, [
+            AttemptEventCreate(type=AttemptEventType.OPTION_CHANGE, payload={"option": i})
+            for i in range(4)
+        ])
+
+        class FailingSession:
+            async def execute(self, *args):
+                # Пока идёт запись, буфер заполняется новыми событиями
+                buffer.add(2, [AttemptEventCreate(type=AttemptEventType.HEARTBEAT)] * 3)
+                raise ConnectionError("БД недоступна")
+
+        with pytest.raises(ConnectionError):
+            await buffer.flush(FailingSession())
+
+        assert len(buffer) == 4
+        assert [row["attempt_id"] for row in buffer._rows] == [1, 2, 2, 2]
+        assert buffer._rows[0]["payload"] == {"option": 3}